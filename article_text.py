@@ -0,0 +1,188 @@
+"""
+Main-content extraction for news pages, used by postgen.py.
+
+Readability-style: after dropping page furniture (scripts, nav, cookie and
+consent banners, share bars, related-link lists, paywall prompts), every
+paragraph scores its parent and grandparent by how much running text it
+holds. The best-scoring container, discounted by its link density, is the
+article; siblings that score close to it are kept too. Its paragraphs are then
+taken in order until the prompt's token budget is spent, so the budget goes on
+the story rather than on whatever comes first in the page.
+"""
+import re
+
+from bs4 import BeautifulSoup
+
+# Approximate prompt tokens of article text sent to Claude
+TOKEN_BUDGET = 1500
+
+# Stored with cached extractions (page_cache.py); bump when the output changes
+VERSION = f'2:{TOKEN_BUDGET}'
+
+DROP_TAGS = ['script', 'style', 'noscript', 'nav', 'header', 'footer', 'aside', 'form', 'iframe', 'svg',
+             'button', 'figure', 'template']
+
+# class/id fragments of page furniture, and of likely article containers
+NEGATIVE = re.compile(
+    r'cookie|consent|gdpr|banner|related|recommend|promo|newsletter|subscribe|signup|paywall|'
+    r'share|social|comment|advert|\bads?\b|sponsor|footer|masthead|modal|popup|outbrain|taboola|'
+    r'breadcrumb|byline-share|tags|most-?read|trending|read-?more|more-stories|gallery|slideshow|carousel|'
+    # a sidebar, but not a layout class naming the column beside the article ("c-fixed-sidebar-layout")
+    r'sidebar(?!-?layout)',
+    re.IGNORECASE
+)
+POSITIVE = re.compile(r'article|story|body|content|entry|post|text|main', re.IGNORECASE)
+# Furniture-looking elements with these in their class are kept (e.g. "article-body ads-inline")
+KEEP = re.compile(r'article|story|entry|\bmain\b', re.IGNORECASE)
+
+TEXT_TAGS = ['p', 'pre', 'blockquote', 'li', 'h2', 'h3', 'td']
+SCORED_TAGS = ['p', 'pre', 'blockquote', 'td']
+MIN_PARAGRAPH = 25
+
+TOKEN_PATTERN = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text):
+    """Rough Claude token count: words and punctuation marks, long words as two."""
+    return sum(2 if len(token) > 8 else 1 for token in TOKEN_PATTERN.findall(text))
+
+
+def _attributes(el):
+    return ' '.join(el.get('class') or []) + ' ' + (el.get('id') or '')
+
+
+def _link_density(el, text_length=None):
+    text_length = text_length if text_length is not None else len(el.get_text(' ', strip=True))
+    if not text_length:
+        return 0.0
+    link_length = sum(len(a.get_text(' ', strip=True)) for a in el.find_all('a'))
+    return min(link_length / text_length, 1.0)
+
+
+def _class_weight(el):
+    attributes = _attributes(el)
+    weight = 0
+    if NEGATIVE.search(attributes):
+        weight -= 25
+    if POSITIVE.search(attributes):
+        weight += 25
+    if el.name in ('article', 'main'):
+        weight += 20
+    return weight
+
+
+def clean(soup):
+    """Remove page furniture from soup in place."""
+    for tag in soup(DROP_TAGS):
+        tag.decompose()
+    for el in soup.find_all(True):
+        if el.decomposed or el.name in ('html', 'body', 'article', 'main'):
+            continue
+        if NEGATIVE.search(_attributes(el)) and not KEEP.search(' '.join(el.get('class') or [])):
+            el.decompose()
+
+
+def _candidates(soup):
+    """Score containers by the paragraphs inside them: {id(element): (element, score)}.
+
+    Keyed by id(): a bs4 Tag hashes by serializing itself and compares equal
+    to any tag with the same markup.
+    """
+    scores = {}
+    for p in soup.find_all(SCORED_TAGS):
+        text = p.get_text(' ', strip=True)
+        if len(text) < MIN_PARAGRAPH:
+            continue
+        score = 1 + text.count(',') + min(len(text) // 100, 3)
+        for ancestor, share in ((p.parent, 1.0), (p.parent.parent if p.parent else None, 0.5)):
+            if ancestor is None or ancestor.name is None:
+                continue
+            if id(ancestor) not in scores:
+                scores[id(ancestor)] = [ancestor, _class_weight(ancestor)]
+            scores[id(ancestor)][1] += score * share
+    return {key: (el, score * (1 - _link_density(el))) for key, (el, score) in scores.items()}
+
+
+def main_content(soup):
+    """The elements that make up the article body, in document order."""
+    scores = _candidates(soup)
+    if not scores:
+        return [soup.body or soup]
+    top, top_score = max(scores.values(), key=lambda item: item[1])
+    threshold = max(10, top_score * 0.2)
+
+    # Siblings that score well (or are plain text paragraphs) belong to the article too
+    parent = top.parent
+    if parent is None:
+        return [top]
+    selected = []
+    for sibling in parent.find_all(recursive=False):
+        if sibling is top or scores.get(id(sibling), (None, 0))[1] >= threshold:
+            selected.append(sibling)
+        elif sibling.name == 'p':
+            text = sibling.get_text(' ', strip=True)
+            if len(text) > 80 and _link_density(sibling, len(text)) < 0.25:
+                selected.append(sibling)
+    return selected
+
+
+def paragraphs(elements):
+    """Text blocks of the given elements, skipping link lists and fragments."""
+    blocks = []
+    for el in elements:
+        nodes = [el] if el.name in TEXT_TAGS else el.find_all(TEXT_TAGS)
+        for node in nodes:
+            # A p inside a blockquote or li is read once, with the outer block
+            outer = node.find_parent(TEXT_TAGS)
+            if outer is not None and node is not el and el in outer.parents:
+                continue
+            text = ' '.join(node.get_text(' ', strip=True).split())
+            if not text:
+                continue
+            if node.name in ('h2', 'h3'):
+                blocks.append(text)
+            elif len(text) >= MIN_PARAGRAPH and _link_density(node, len(text)) < 0.5:
+                blocks.append(text)
+    return blocks
+
+
+def within_budget(blocks, budget=TOKEN_BUDGET):
+    """Leading blocks that fit in budget tokens; the last one is cut at a sentence if needed."""
+    kept, used = [], 0
+    for block in blocks:
+        tokens = estimate_tokens(block)
+        if used + tokens <= budget:
+            kept.append(block)
+            used += tokens
+            continue
+        partial = []
+        for sentence in re.split(r'(?<=[.!?])\s+', block):
+            tokens = estimate_tokens(sentence)
+            if used + tokens > budget:
+                break
+            partial.append(sentence)
+            used += tokens
+        if partial:
+            kept.append(' '.join(partial))
+        break
+    return kept
+
+
+def page_title(soup):
+    meta = soup.find('meta', property='og:title') or soup.find('meta', attrs={'name': 'twitter:title'})
+    if meta and meta.get('content'):
+        return meta['content'].strip()
+    title = soup.find('title')
+    return title.get_text(strip=True) if title else None
+
+
+def extract(html, budget=TOKEN_BUDGET):
+    """Return (title or None, article text within budget tokens) for a page."""
+    soup = BeautifulSoup(html, 'html.parser')
+    title = page_title(soup)
+    clean(soup)
+    blocks = paragraphs(main_content(soup))
+    if not blocks:
+        # Nothing paragraph-like: fall back to all of the page's text
+        blocks = [' '.join(soup.get_text(' ', strip=True).split())]
+    return title, '\n\n'.join(within_budget(blocks, budget))
@@ -0,0 +1,224 @@
+"""
+Columnar analytics for the author report.
+
+build_frame() flattens the per-month stats and posts responses into NumPy
+column arrays, with authors and months stored as integer codes. Every
+aggregate is then a vectorized group-by over those codes, so multi-year
+datasets with hundreds of thousands of post-view rows stay interactive.
+
+A frame is a plain dict:
+
+    authors     array of author names (code -> name)
+    months      list of "YYYY-MM" strings (code -> month)
+    posts       columns for posts written in the period, one row per post:
+                post_id, author, month, views, date, title
+    totals      columns for the stats API's per-author month totals:
+                author, month, all_views
+
+Requires numpy.
+"""
+
+import numpy as np
+
+EXCLUDED_AUTHORS = ["Boing Boing", "Boing Boing's Shop"]
+
+# Post IDs fit comfortably below 2**40, so (month, post_id) packs into one int64
+KEY_SHIFT = 40
+
+
+def pack_keys(months, post_ids):
+    return (np.asarray(months, dtype=np.int64) << KEY_SHIFT) | np.asarray(post_ids, dtype=np.int64)
+
+
+def build_frame(month_data):
+    """Build a columnar frame from {month: (stats_data, posts_data)}."""
+    months = sorted(month_data)
+
+    post_ids, post_authors, post_months, post_dates, post_titles = [], [], [], [], []
+    view_ids, view_months, view_counts, view_titles = [], [], [], []
+    total_authors, total_months, total_views = [], [], []
+
+    for month_code, month_str in enumerate(months):
+        stats_data, posts_data = month_data[month_str]
+
+        for post in posts_data.get("posts", []):
+            post_ids.append(post["ID"])
+            post_authors.append(post.get("author", {}).get("name", "Unknown"))
+            post_months.append(month_code)
+            post_dates.append(post.get("date", "")[:10])
+            post_titles.append(post.get("title", ""))
+
+        for day in stats_data.get("days", {}).values():
+            for author in day.get("authors", []):
+                total_authors.append(author["name"])
+                total_months.append(month_code)
+                total_views.append(author["views"])
+                for post in author.get("posts", []):
+                    view_ids.append(post["id"])
+                    view_months.append(month_code)
+                    view_counts.append(post["views"])
+                    view_titles.append(post.get("title", ""))
+
+    authors, codes = np.unique(np.array(post_authors + total_authors, dtype=object), return_inverse=True)
+    post_author_codes = codes[:len(post_authors)]
+    total_author_codes = codes[len(post_authors):]
+
+    # Attach stats views to the posts written in the period (0 if the stats have none)
+    post_keys = pack_keys(post_months, post_ids)
+    view_keys = pack_keys(view_months, view_ids)
+    view_counts = np.asarray(view_counts, dtype=np.int64)
+    view_titles = np.array(view_titles, dtype=object)
+    order = np.argsort(view_keys, kind="stable")
+    sorted_keys = view_keys[order]
+    found = np.searchsorted(sorted_keys, post_keys)
+    found = np.minimum(found, max(len(sorted_keys) - 1, 0))
+    matched = (sorted_keys[found] == post_keys) if len(sorted_keys) else np.zeros(len(post_keys), dtype=bool)
+    views = np.where(matched, view_counts[order][found] if len(sorted_keys) else 0, 0)
+
+    # The stats API's titles are plain text; prefer them over the posts API's
+    titles = np.array(post_titles, dtype=object)
+    if len(sorted_keys):
+        titles = np.where(matched, view_titles[order][found], titles)
+
+    keep_posts = ~np.isin(authors[post_author_codes], EXCLUDED_AUTHORS) if len(authors) else np.ones(0, bool)
+    keep_totals = ~np.isin(authors[total_author_codes], EXCLUDED_AUTHORS) if len(authors) else np.ones(0, bool)
+
+    return {
+        "authors": authors,
+        "months": months,
+        "posts": {
+            "post_id": np.asarray(post_ids, dtype=np.int64)[keep_posts],
+            "author": post_author_codes[keep_posts],
+            "month": np.asarray(post_months, dtype=np.int32)[keep_posts],
+            "views": views[keep_posts],
+            "date": np.array(post_dates, dtype="datetime64[D]")[keep_posts],
+            "title": titles[keep_posts],
+        },
+        "totals": {
+            "author": total_author_codes[keep_totals],
+            "month": np.asarray(total_months, dtype=np.int32)[keep_totals],
+            "all_views": np.asarray(total_views, dtype=np.int64)[keep_totals],
+        },
+    }
+
+
+def group_bounds(groups):
+    """For sorted group codes, return (unique groups, start index, count)."""
+    unique, starts, counts = np.unique(groups, return_index=True, return_counts=True)
+    return unique, starts, counts
+
+
+def group_quantile(groups, values, q, size):
+    """Per-group q-quantile (linear interpolation, as np.quantile), NaN for empty groups."""
+    result = np.full(size, np.nan)
+    if len(values) == 0:
+        return result
+
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order].astype(float)
+    unique, starts, counts = group_bounds(groups)
+
+    position = starts + (counts - 1) * q
+    lower = np.floor(position).astype(np.int64)
+    upper = np.ceil(position).astype(np.int64)
+    fraction = position - lower
+    result[unique] = values[lower] + (values[upper] - values[lower]) * fraction
+    return result
+
+
+def author_summary(frame):
+    """Per-author aggregates over the whole frame, sorted by evergreen score.
+
+    Returns columns: author, posts, new_views, avg_new, median_new, p90_new,
+    all_views, evergreen. Authors appear if the stats API lists them and they
+    wrote at least one post in the period.
+    """
+    size = len(frame["authors"])
+    posts, totals = frame["posts"], frame["totals"]
+
+    num_posts = np.bincount(posts["author"], minlength=size)
+    new_views = np.bincount(posts["author"], weights=posts["views"], minlength=size).astype(np.int64)
+    all_views = np.bincount(totals["author"], weights=totals["all_views"], minlength=size).astype(np.int64)
+    median_new = group_quantile(posts["author"], posts["views"], 0.5, size)
+    p90_new = group_quantile(posts["author"], posts["views"], 0.9, size)
+
+    in_stats = np.zeros(size, dtype=bool)
+    in_stats[totals["author"]] = True
+    rows = np.flatnonzero(in_stats & (num_posts > 0))
+
+    avg_new = new_views[rows] / num_posts[rows]
+    evergreen = all_views[rows] / num_posts[rows]
+    order = np.argsort(-evergreen, kind="stable")
+    rows = rows[order]
+
+    return {
+        "author": frame["authors"][rows],
+        "posts": num_posts[rows],
+        "new_views": new_views[rows],
+        "avg_new": avg_new[order],
+        "median_new": median_new[rows],
+        "p90_new": p90_new[rows],
+        "all_views": all_views[rows],
+        "evergreen": evergreen[order],
+    }
+
+
+def monthly_avg_new(frame, authors):
+    """Average views per new post for each (author, month), NaN where the author wrote nothing.
+
+    authors is an array of author names; rows come back in the same order.
+    """
+    size, months = len(frame["authors"]), len(frame["months"])
+    posts = frame["posts"]
+    cell = posts["author"].astype(np.int64) * months + posts["month"]
+
+    counts = np.bincount(cell, minlength=size * months).reshape(size, months)
+    views = np.bincount(cell, weights=posts["views"], minlength=size * months).reshape(size, months)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        averages = np.where(counts > 0, views / np.maximum(counts, 1), np.nan)
+
+    codes = np.searchsorted(frame["authors"], authors)
+    return averages[codes]
+
+
+def top_posts(frame, n=3, per_author=False):
+    """Top-n posts by views, overall or for each author.
+
+    Returns columns: post_id, title, author, views, date, month (and rank
+    within the author when per_author is set).
+    """
+    posts = frame["posts"]
+    if per_author:
+        order = np.lexsort((-posts["views"], posts["author"]))
+        authors = posts["author"][order]
+        _, starts, counts = group_bounds(authors)
+        rank = np.arange(len(order)) - np.repeat(starts, counts)
+        selected = order[rank < n]
+        ranks = rank[rank < n] + 1
+    else:
+        selected = np.argsort(-posts["views"], kind="stable")[:n]
+        ranks = np.arange(1, len(selected) + 1)
+
+    return post_columns(frame, selected, ranks)
+
+
+def post_columns(frame, selected, ranks):
+    posts = frame["posts"]
+    columns = {
+        "post_id": posts["post_id"][selected],
+        "title": posts["title"][selected],
+        "author": frame["authors"][posts["author"][selected]],
+        "views": posts["views"][selected],
+        "date": posts["date"][selected],
+        "month": np.array(frame["months"], dtype=object)[posts["month"][selected]] if frame["months"]
+        else np.array([], dtype=object),
+    }
+    if ranks is not None:
+        columns["rank"] = ranks
+    return columns
+
+
+def posts_by_views(frame):
+    """Every post in the frame, most viewed first (columns as top_posts, without rank)."""
+    order = np.argsort(-frame["posts"]["views"], kind="stable")
+    return post_columns(frame, order, None)
@@ -3,25 +3,72 @@
 Boing Boing Author Performance Report
 
 Usage:
-    python3 author_report.py [YYYY-MM]
+    python3 author_report.py [YYYY-MM] [--store]
+    python3 author_report.py --from YYYY-MM [--to YYYY-MM]
 
 Examples:
     python3 author_report.py           # Current month
     python3 author_report.py 2025-11   # November 2025
     python3 author_report.py 2025-12   # December 2025
-
-Requires WP_ACCESS_TOKEN environment variable to be set.
+    python3 author_report.py 2025-12 --store   # Post counts from the local post store
+    python3 author_report.py --from 2025-01 --to 2025-12   # Yearly report with trends
+    python3 author_report.py 2025-12 --format csv > authors.csv     # Per-author summary
+    python3 author_report.py 2025-12 --format csv --rows posts      # Every post, most viewed first
+    python3 author_report.py --from 2025-01 --format json -o report.json
+    python3 author_report.py --from 2025-01 --format parquet --rows posts -o posts.parquet
+
+Completed months are cached for good in ~/.author_report_cache/ (posts plus
+top-authors stats); only the current month is refetched. --refresh ignores
+the cache.
+
+The numbers are computed by author_analytics.py (vectorized, requires numpy);
+this script fetches the data and renders the console report, or with
+--format csv|json|parquet writes the computed rows instead (progress then
+goes to stderr). Parquet output requires pyarrow.
+
+Requires WP_ACCESS_TOKEN environment variable to be set. --store also needs
+WP_USER and WP_APP_PASSWORD to sync the store (see post_store.py).
 """
+import csv
 import json
 import sys
 import os
-import urllib.request
-import urllib.error
-from datetime import datetime, timedelta
+import math
+import time
+import argparse
+import queue
+import threading
+import http.client
+import urllib.parse
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta, timezone
+from pathlib import Path
+
+import author_analytics
 
 # Configuration
 SITE_ID = "87954168"  # boingboing.net
 BASE_URL = "https://public-api.wordpress.com/rest/v1.1"
+PAGE_SIZE = 100
+MAX_IN_FLIGHT = 6  # Concurrent API requests (and pooled connections)
+MAX_MONTHS_IN_FLIGHT = 3  # Months fetched at once in range reports
+
+# Completed months never change, so their stats and posts are cached for good
+CACHE_DIR = Path.home() / ".author_report_cache"
+MONTH_SETTLE_DAYS = 2
+
+# Keep-alive HTTPS connections shared by all request threads
+CONNECTION_POOL = queue.LifoQueue()
+
+# Request timings per group: {group: [seconds, ...]}, and wall time per group
+TIMINGS = {}
+GROUP_WALLS = {}
+TIMINGS_LOCK = threading.Lock()
+
+# Columns written by --format, for --rows authors and --rows posts
+AUTHOR_FIELDS = ["author", "posts", "new_views", "avg_new", "median_new", "p90_new", "all_views", "evergreen"]
+POST_FIELDS = ["post_id", "title", "author", "views", "date", "month"]
 
 def get_token():
     token = os.environ.get("WP_ACCESS_TOKEN")
@@ -31,177 +78,386 @@ def get_token():
         sys.exit(1)
     return token
 
-def api_request(url, token):
-    req = urllib.request.Request(url)
-    req.add_header("Authorization", "Bearer " + token)
+def get_connection(host):
     try:
-        with urllib.request.urlopen(req) as response:
-            return json.loads(response.read().decode())
-    except urllib.error.HTTPError as e:
-        print("API Error: {} {}".format(e.code, e.reason))
+        return CONNECTION_POOL.get_nowait()
+    except queue.Empty:
+        return http.client.HTTPSConnection(host, timeout=60)
+
+def api_request(url, token, group="other"):
+    parts = urllib.parse.urlsplit(url)
+    path = parts.path + ("?" + parts.query if parts.query else "")
+    headers = {"Authorization": "Bearer " + token}
+
+    started = time.perf_counter()
+    for attempt in range(2):
+        conn = get_connection(parts.netloc)
+        try:
+            conn.request("GET", path, headers=headers)
+            response = conn.getresponse()
+            body = response.read()
+            break
+        except (http.client.HTTPException, OSError):
+            # Stale keep-alive connection: retry once on a fresh one
+            conn.close()
+            if attempt:
+                raise
+
+    with TIMINGS_LOCK:
+        TIMINGS.setdefault(group, []).append(time.perf_counter() - started)
+
+    if response.status >= 400:
+        conn.close()
+        print("API Error: {} {}".format(response.status, response.reason))
         sys.exit(1)
 
+    CONNECTION_POOL.put(conn)
+    return json.loads(body.decode())
+
 def fetch_stats(token, date_str):
     url = "{}/sites/{}/stats/top-authors?period=month&date={}".format(BASE_URL, SITE_ID, date_str)
-    return api_request(url, token)
+    return api_request(url, token, group="stats")
+
+def fetch_posts_page(token, after_date, before_date, offset):
+    url = "{}/sites/{}/posts?number={}&offset={}&after={}&before={}&fields=ID,author,date,title".format(
+        BASE_URL, SITE_ID, PAGE_SIZE, offset, after_date, before_date
+    )
+    return api_request(url, token, group="posts")
 
 def fetch_posts(token, after_date, before_date):
-    posts = []
-    offset = 0
-    while True:
-        url = "{}/sites/{}/posts?number=100&offset={}&after={}&before={}&fields=ID,author,date,title".format(
-            BASE_URL, SITE_ID, offset, after_date, before_date
-        )
-        data = api_request(url, token)
-        batch = data.get("posts", [])
-        if not batch:
-            break
-        posts.extend(batch)
-        offset += 100
-        if len(batch) < 100:
-            break
+    # The first page tells us how many posts there are, so the remaining
+    # offsets can be fetched concurrently
+    first = fetch_posts_page(token, after_date, before_date, 0)
+    posts = first.get("posts", [])
+    found = first.get("found", len(posts))
+
+    offsets = range(PAGE_SIZE, found, PAGE_SIZE)
+    with ThreadPoolExecutor(max_workers=MAX_IN_FLIGHT) as pool:
+        pages = pool.map(lambda offset: fetch_posts_page(token, after_date, before_date, offset), offsets)
+        for page in pages:
+            posts.extend(page.get("posts", []))
+
     return {"posts": posts}
 
-def main():
-    # Parse command line argument for month
-    if len(sys.argv) > 1:
-        try:
-            target_date = datetime.strptime(sys.argv[1] + "-15", "%Y-%m-%d")
-        except ValueError:
-            print("Invalid date format. Use YYYY-MM (e.g., 2025-11)")
-            sys.exit(1)
-    else:
-        target_date = datetime.now()
-
-    # Calculate month boundaries
-    year = target_date.year
-    month = target_date.month
-    first_day = datetime(year, month, 1)
-    if month == 12:
-        last_day = datetime(year + 1, 1, 1)
-    else:
-        last_day = datetime(year, month + 1, 1)
+def print_timings(group_walls):
+    if not group_walls:
+        return
+    print()
+    print("Request timings:")
+    for group, wall in group_walls.items():
+        durations = TIMINGS.get(group, [])
+        if not durations:
+            print("  {:<8} {:>6.2f}s wall".format(group, wall))
+            continue
+        print("  {:<8} {:>3} requests  {:>6.2f}s wall  {:>6.2f}s total  {:>6.2f}s slowest".format(
+            group, len(durations), wall, sum(durations), max(durations)
+        ))
 
-    after_date = first_day.strftime("%Y-%m-%dT00:00:00")
-    before_date = last_day.strftime("%Y-%m-%dT00:00:00")
+def store_time(date_str):
+    return datetime.strptime(date_str, "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc)
 
-    token = get_token()
+def sync_store(months):
+    """Sync the local post store once for the whole span of months, before any month reads it."""
+    import post_store
 
-    print("Fetching stats for {}...".format(first_day.strftime("%B %Y")))
-    stats_data = fetch_stats(token, target_date.strftime("%Y-%m-%d"))
+    start = store_time(month_bounds(months[0])[0].strftime("%Y-%m-%dT00:00:00"))
+    end = store_time(month_bounds(months[-1])[1].strftime("%Y-%m-%dT00:00:00"))
+    with post_store.open_store() as conn:
+        post_store.sync(conn, since=start, until=end)
 
-    print("Fetching posts...")
-    posts_data = fetch_posts(token, after_date, before_date)
-    print("Found {} posts\n".format(len(posts_data.get("posts", []))))
+def fetch_posts_from_store(after_date, before_date):
+    """Read posts from the local post store (see post_store.py) instead of the API.
 
-    # Build post ID to author mapping and count posts per author
-    author_post_counts = {}
-    for post in posts_data.get("posts", []):
-        author_name = post.get("author", {}).get("name", "Unknown")
-        author_post_counts[author_name] = author_post_counts.get(author_name, 0) + 1
+    The store must already be synced (see sync_store); this only reads it.
+    """
+    import post_store
 
-    # Get the month key from stats data
-    month_key = list(stats_data["days"].keys())[0]
-    authors_data = stats_data["days"][month_key]["authors"]
+    start, end = store_time(after_date), store_time(before_date)
+    with post_store.open_store(read_only=True) as conn:
+        rows = post_store.post_summaries_between(conn, start, end)
 
-    # Format the month name
-    month_date = datetime.strptime(month_key, "%Y-%m-%d")
-    month_name = month_date.strftime("%B %Y")
+    posts = [
+        {"ID": post_id, "author": {"name": author_name}, "date": date_gmt, "title": title}
+        for post_id, author_name, date_gmt, title in rows
+    ]
+    return {"posts": posts}
+
+def month_bounds(month_str):
+    first_day = datetime.strptime(month_str + "-01", "%Y-%m-%d")
+    if first_day.month == 12:
+        last_day = datetime(first_day.year + 1, 1, 1)
+    else:
+        last_day = datetime(first_day.year, first_day.month + 1, 1)
+    return first_day, last_day
+
+def month_range(from_month, to_month):
+    months = []
+    day, _ = month_bounds(from_month)
+    last, _ = month_bounds(to_month)
+    while day <= last:
+        months.append(day.strftime("%Y-%m"))
+        day = month_bounds(day.strftime("%Y-%m"))[1]
+    return months
+
+def is_complete_month(month_str):
+    # Stats keep trickling in for a day or so after the month ends
+    _, last_day = month_bounds(month_str)
+    return datetime.now() >= last_day + timedelta(days=MONTH_SETTLE_DAYS)
+
+def timed(group, func, *func_args):
+    started = time.perf_counter()
+    result = func(*func_args)
+    with TIMINGS_LOCK:
+        GROUP_WALLS[group] = GROUP_WALLS.get(group, 0) + time.perf_counter() - started
+    return result
+
+def fetch_month(token, month_str, use_store=False, refresh=False):
+    """Return (stats_data, posts_data, source) for a month.
+
+    Completed months never change, so they are kept in CACHE_DIR for good;
+    the current month is always refetched.
+    """
+    cache_file = CACHE_DIR / "{}.json".format(month_str)
+    if not refresh and cache_file.exists():
+        cached = json.loads(cache_file.read_text())
+        return cached["stats"], cached["posts"], "cache"
+
+    first_day, last_day = month_bounds(month_str)
+    after_date = first_day.strftime("%Y-%m-%dT00:00:00")
+    before_date = last_day.strftime("%Y-%m-%dT00:00:00")
+    stats_date = first_day.replace(day=15).strftime("%Y-%m-%d")
+
+    # The stats and posts requests are independent, so run them side by side
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        stats_future = pool.submit(timed, "stats", fetch_stats, token, stats_date)
+        if use_store:
+            posts_future = pool.submit(timed, "store", fetch_posts_from_store, after_date, before_date)
+        else:
+            posts_future = pool.submit(timed, "posts", fetch_posts, token, after_date, before_date)
+        stats_data = stats_future.result()
+        posts_data = posts_future.result()
+
+    if is_complete_month(month_str):
+        CACHE_DIR.mkdir(exist_ok=True)
+        cache_file.write_text(json.dumps({"stats": stats_data, "posts": posts_data}, separators=(",", ":")))
+
+    return stats_data, posts_data, "api"
+
+def fetch_months(token, months, use_store=False, refresh=False):
+    if use_store:
+        # One sync for the months that aren't cached, so concurrent months only read the store
+        missing = [m for m in months if refresh or not (CACHE_DIR / "{}.json".format(m)).exists()]
+        if missing:
+            timed("store", sync_store, missing)
+    with ThreadPoolExecutor(max_workers=MAX_MONTHS_IN_FLIGHT) as pool:
+        fetched = list(pool.map(lambda m: fetch_month(token, m, use_store, refresh), months))
+
+    for month_str, (_, posts_data, source) in zip(months, fetched):
+        print("  {}: {} posts ({})".format(month_str, len(posts_data.get("posts", [])), source))
+
+    return {month_str: (stats, posts) for month_str, (stats, posts, _) in zip(months, fetched)}
+
+def print_results_table(summary, period="this month"):
+    header = "{:<20} {:>6} {:>12} {:>10} {:>8} {:>8} {:>12} {:>12}".format(
+        "Author", "Posts", "New Views", "Avg/New", "Median", "P90", "All Views", "Evergreen"
+    )
+    print(header)
+    print("-" * 96)
+
+    for row in zip(summary["author"], summary["posts"], summary["new_views"], summary["avg_new"],
+                   summary["median_new"], summary["p90_new"], summary["all_views"], summary["evergreen"]):
+        print("{:<20} {:>6} {:>12,} {:>10,.0f} {:>8,.0f} {:>8,.0f} {:>12,} {:>12,.0f}".format(*row))
 
-    print("=" * 70)
-    print("BOING BOING AUTHOR PERFORMANCE REPORT - {}".format(month_name))
-    print("=" * 70)
     print()
+    print("=" * 96)
+    print()
+    print("Posts: Articles written {}".format(period))
+    print("New Views: Views on posts written {}".format(period))
+    print("Avg/New: Average views per new post")
+    print("Median/P90: Median and 90th percentile views per new post")
+    print("All Views: Total views across all posts (new + evergreen)")
+    print("Evergreen: All views divided by new posts (higher = stronger back catalog)")
 
-    # Build a set of post IDs from this month
-    month_post_ids = set()
-    for post in posts_data.get("posts", []):
-        month_post_ids.add(post["ID"])
+def print_top_posts(top, label):
+    if len(top["post_id"]):
+        print()
+        print("TOP {} POSTS {}".format(len(top["post_id"]), label))
+        print("-" * 96)
+        for i, (title, views, author) in enumerate(zip(top["title"], top["views"], top["author"]), 1):
+            if len(title) > 50:
+                title = title[:47] + "..."
+            print("{}. {:,} views - {} ({})".format(i, views, title, author))
 
-    # Build views per author from stats
-    results = []
-    for author in authors_data:
-        name = author["name"]
+def print_trends(frame, summary):
+    # Month-over-month trend: average views per new post in each month
+    months = frame["months"]
+    averages = author_analytics.monthly_avg_new(frame, summary["author"])
 
-        # Skip "Boing Boing" and "Boing Boing's Shop" as authors
-        if name in ["Boing Boing", "Boing Boing's Shop"]:
-            continue
+    print()
+    print("MONTH-OVER-MONTH AVG VIEWS PER NEW POST")
+    print("-" * 96)
+    header = "{:<20}".format("Author") + "".join(
+        " {:>7}".format(datetime.strptime(m, "%Y-%m").strftime("%b%y")) for m in months
+    ) + " {:>8}".format("MoM")
+    print(header)
 
-        # Use actual post count from posts API
-        num_posts = author_post_counts.get(name, 0)
+    for name, values in zip(summary["author"], averages):
+        cells = "".join(" {:>7}".format("-" if math.isnan(v) else "{:,.0f}".format(v)) for v in values)
+        print("{:<20}{} {:>8}".format(name, cells, format_change(values[-2], values[-1])))
 
-        if num_posts == 0:
-            continue
+    print()
+    print("MoM: Change in Avg/New between the last two months")
 
-        # Total views from stats API (includes all posts, new and old)
-        all_views = author["views"]
+def format_change(previous, current):
+    if math.isnan(previous) or math.isnan(current) or not previous:
+        return "-"
+    return "{:+.0%}".format((current - previous) / previous)
 
-        # Views from posts written this month only
-        month_views = sum(p["views"] for p in author["posts"] if p["id"] in month_post_ids)
+def print_report(frame):
+    months = frame["months"]
+    summary = author_analytics.author_summary(frame)
 
-        # Average views per new post
-        avg_new = month_views / num_posts
+    first_name = datetime.strptime(months[0], "%Y-%m").strftime("%B %Y")
+    last_name = datetime.strptime(months[-1], "%Y-%m").strftime("%B %Y")
+    period = "this month" if len(months) == 1 else "in this period"
 
-        # Evergreen score: all views divided by new posts written
-        evergreen = all_views / num_posts
+    print("=" * 70)
+    if len(months) == 1:
+        print("BOING BOING AUTHOR PERFORMANCE REPORT - {}".format(first_name))
+    else:
+        print("BOING BOING AUTHOR PERFORMANCE REPORT - {} TO {}".format(first_name.upper(), last_name.upper()))
+    print("=" * 70)
+    print()
 
-        results.append((name, num_posts, month_views, avg_new, all_views, evergreen))
+    print_results_table(summary, period)
+    if len(months) > 1:
+        print_trends(frame, summary)
+    print_top_posts(author_analytics.top_posts(frame, 3), period.upper())
+
+def export_value(value):
+    # NumPy scalars to plain Python values; NaN (no posts) becomes None
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+def export_rows(columns, fields):
+    for row in zip(*(columns[field] for field in fields)):
+        yield {field: export_value(value) for field, value in zip(fields, row)}
+
+def export_tables(frame):
+    return {
+        "authors": (author_analytics.author_summary(frame), AUTHOR_FIELDS),
+        "posts": (author_analytics.posts_by_views(frame), POST_FIELDS),
+    }
+
+def write_csv(frame, table, out):
+    columns, fields = export_tables(frame)[table]
+    writer = csv.DictWriter(out, fieldnames=fields)
+    writer.writeheader()
+    for row in export_rows(columns, fields):
+        writer.writerow(row)
+
+def write_json(frame, table, out):
+    # Written row by row, so a year of posts never sits in memory as one string
+    columns, fields = export_tables(frame)[table]
+    out.write('{{"months": {}, "{}": ['.format(json.dumps(frame["months"]), table))
+    for i, row in enumerate(export_rows(columns, fields)):
+        out.write((",\n  " if i else "\n  ") + json.dumps(row))
+    out.write("\n]}\n")
+
+def write_parquet(frame, table, path):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        print("Error: --format parquet requires pyarrow (pip install pyarrow)")
+        sys.exit(1)
 
-    # Sort by evergreen score descending
-    results.sort(key=lambda x: x[5], reverse=True)
+    columns, fields = export_tables(frame)[table]
+    arrays = []
+    for field in fields:
+        values = columns[field]
+        if field in ("author", "month"):
+            # Few distinct values repeated on every row: store them once
+            arrays.append(pa.array(values, type=pa.string()).dictionary_encode())
+        elif field == "title":
+            arrays.append(pa.array(values, type=pa.string()))
+        else:
+            arrays.append(pa.array(values))
+    pq.write_table(pa.Table.from_arrays(arrays, names=fields), path)
+
+def write_export(frame, fmt, table, output):
+    if fmt == "parquet":
+        write_parquet(frame, table, output)
+        return
+
+    out = open(output, "w", newline="") if output else sys.stdout
+    try:
+        if fmt == "csv":
+            write_csv(frame, table, out)
+        else:
+            write_json(frame, table, out)
+    finally:
+        if output:
+            out.close()
 
-    header = "{:<20} {:>6} {:>12} {:>10} {:>12} {:>12}".format(
-        "Author", "Posts", "New Views", "Avg/New", "All Views", "Evergreen"
-    )
-    print(header)
-    print("-" * 80)
+def main():
+    parser = argparse.ArgumentParser(description="Boing Boing author performance report")
+    parser.add_argument("month", nargs="?", help="Month to report on (YYYY-MM). Default: current month")
+    parser.add_argument("--from", dest="from_month", help="First month of a range report (YYYY-MM)")
+    parser.add_argument("--to", dest="to_month", help="Last month of a range report (YYYY-MM). Default: current month")
+    parser.add_argument("--store", action="store_true", help="Take post counts from the local post store")
+    parser.add_argument("--refresh", action="store_true", help="Refetch months even if they are cached")
+    parser.add_argument("--format", choices=["text", "csv", "json", "parquet"], default="text",
+                        help="Output format. Default: text (the console report)")
+    parser.add_argument("--rows", choices=["authors", "posts"], default="authors",
+                        help="Rows to export: per-author summary or every post. Default: authors")
+    parser.add_argument("--output", "-o", help="Export file. Default: stdout (required for parquet)")
+    args = parser.parse_args()
+
+    if args.format == "parquet" and not args.output:
+        parser.error("--format parquet needs --output")
+
+    current_month = datetime.now().strftime("%Y-%m")
+    try:
+        if args.from_month:
+            months = month_range(args.from_month, args.to_month or current_month)
+        else:
+            months = [args.month or current_month]
+            month_bounds(months[0])
+    except ValueError:
+        print("Invalid date format. Use YYYY-MM (e.g., 2025-11)")
+        sys.exit(1)
 
-    for name, num_posts, month_views, avg_new, all_views, evergreen in results:
-        row = "{:<20} {:>6} {:>12,} {:>10,.0f} {:>12,} {:>12,.0f}".format(
-            name, num_posts, month_views, avg_new, all_views, evergreen
-        )
-        print(row)
+    if not months:
+        print("--from must not be after --to")
+        sys.exit(1)
 
-    print()
-    print("=" * 80)
-    print()
-    print("Posts: Articles written this month")
-    print("New Views: Views on posts written this month")
-    print("Avg/New: Average views per new post")
-    print("All Views: Total views across all posts (new + evergreen)")
-    print("Evergreen: All views divided by new posts (higher = stronger back catalog)")
+    token = get_token()
 
-    # Collect all posts with views from stats data
-    all_posts_with_views = []
-    post_id_to_author = {}
-    for post in posts_data.get("posts", []):
-        post_id_to_author[post["ID"]] = post.get("author", {}).get("name", "Unknown")
+    # Exports may go to stdout, so progress output moves to stderr
+    progress = sys.stdout if args.format == "text" else sys.stderr
+    with contextlib.redirect_stdout(progress):
+        if len(months) == 1:
+            print("Fetching stats and posts for {}...".format(month_bounds(months[0])[0].strftime("%B %Y")))
+        else:
+            print("Fetching {} months ({} to {})...".format(len(months), months[0], months[-1]))
+        started = time.perf_counter()
+        month_data = fetch_months(token, months, use_store=args.store, refresh=args.refresh)
+        print("Fetched in {:.2f}s\n".format(time.perf_counter() - started))
+
+    frame = author_analytics.build_frame(month_data)
+    if args.format == "text":
+        print_report(frame)
+    else:
+        write_export(frame, args.format, args.rows, args.output)
 
-    for author in authors_data:
-        author_name = author["name"]
-        if author_name in ["Boing Boing", "Boing Boing's Shop"]:
-            continue
-        for post in author["posts"]:
-            if post["id"] in month_post_ids:
-                all_posts_with_views.append({
-                    "title": post["title"],
-                    "views": post["views"],
-                    "author": author_name
-                })
-
-    # Sort by views and get top 3
-    all_posts_with_views.sort(key=lambda x: x["views"], reverse=True)
-    top_posts = all_posts_with_views[:3]
-
-    if top_posts:
-        print()
-        print("TOP 3 POSTS THIS MONTH")
-        print("-" * 80)
-        for i, post in enumerate(top_posts, 1):
-            title = post["title"]
-            if len(title) > 50:
-                title = title[:47] + "..."
-            print("{}. {:,} views - {} ({})".format(i, post["views"], title, post["author"]))
+    with contextlib.redirect_stdout(progress):
+        print_timings(GROUP_WALLS)
 
 if __name__ == "__main__":
     main()
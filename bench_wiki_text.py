@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark the wiki text extractors on large articles.
+
+Compares the old regex path (four full-document passes, one flat line) with
+wiki_text.py's single-pass HTMLParser extractor: median time, peak memory
+and output size.
+
+Usage:
+  python3 bench_wiki_text.py "World War II" "Titanic"   # Articles (fetched once, then cached)
+  python3 bench_wiki_text.py page.html                  # Saved Parsoid HTML files
+  python3 bench_wiki_text.py --synthetic                # A generated ~2 MB article, no network
+"""
+import re
+import sys
+import time
+import statistics
+import tracemalloc
+from html import unescape
+from pathlib import Path
+
+import wiki_text
+from wiki_fetch import fetch_article_html
+
+RUNS = 5
+
+
+def regex_text(html):
+    """The extractor fetch_article_content used before wiki_text.py."""
+    text = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL)
+    text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL)
+    text = re.sub(r'<[^>]+>', ' ', text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    text = unescape(text)
+    return text
+
+
+def synthetic_article(sections=500):
+    """Parsoid-shaped HTML with infobox, citations, lists, tables and a navbox."""
+    parts = ['<html><head><style>.x{color:red}</style></head><body>',
+             '<table class="infobox"><tr><th>Born</th><td>1900</td></tr></table>']
+    for s in range(sections):
+        parts.append(f'<section><div class="mw-heading mw-heading2"><h2 id="S{s}">Section {s}</h2></div>')
+        for p in range(6):
+            parts.append(f'<p>Paragraph {p} of section {s} with a <a href="./Link">link</a> and a citation'
+                         f'<sup class="mw-ref reference"><a href="#cite">[{p}]</a></sup>. ' + 'Filler text. ' * 30 + '</p>')
+        parts.append('<ul>' + ''.join(f'<li>Item {i} &amp; more</li>' for i in range(8)) + '</ul>')
+        parts.append('<table class="wikitable"><tr><th>Year</th><th>Event</th></tr>'
+                     + ''.join(f'<tr><td>{1900 + i}</td><td>Event {i}</td></tr>' for i in range(5)) + '</table>')
+        parts.append('</section>')
+    parts.append('<section><h2 id="References">References</h2><ol class="mw-references references">'
+                 + ''.join(f'<li>Reference {i}</li>' for i in range(500)) + '</ol></section>')
+    parts.append('<div role="navigation" class="navbox">' + 'Nav link ' * 500 + '</div></body></html>')
+    return ''.join(parts)
+
+
+def measure(func, html):
+    times = []
+    for _ in range(RUNS):
+        started = time.perf_counter()
+        output = func(html)
+        times.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    func(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(times), peak, output
+
+
+def bench(name, html):
+    print(f"{name}: {len(html) / 1024:,.0f} KB of HTML")
+    for label, func in (('regex', regex_text), ('streaming', wiki_text.extract_text)):
+        seconds, peak, output = measure(func, html)
+        print(f"  {label:<10} {seconds * 1000:>8.1f} ms  {peak / 1024 / 1024:>6.1f} MB peak  "
+              f"{len(output) / 1024:>6.0f} KB text  {output.count(chr(10)) + 1:>6} lines")
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:] or ['--synthetic']
+    for arg in args:
+        if arg == '--synthetic':
+            bench('synthetic article', synthetic_article())
+        elif Path(arg).is_file():
+            bench(arg, Path(arg).read_text())
+        else:
+            bench(arg, fetch_article_html(arg))
@@ -0,0 +1,1190 @@
+#!/usr/bin/env python3
+"""
+Daily Generation Engine
+
+Fetches the noon-to-noon window of published posts from the WordPress REST API
+once, parses each post once, asks Claude for a subhead and introduction (one
+for the digest-style variants, one for the newsletter, which leaves out shop
+posts), and renders any combination of output variants in the same run:
+
+    digest      HTML digest with excerpts and "Read more" links
+    newsletter  HTML newsletter with full post content (shop posts excluded)
+    text        Plain-text body (the text/plain part of a multipart email)
+    eml         multipart/alternative message with the text and digest parts
+
+digest.py and newsletter.py are thin wrappers around this module.
+
+Posts are read from the local post store (post_store.py), which is synced
+incrementally before each run. Use --api to query WordPress directly instead.
+
+Usage:
+    python3 daily.py                                  # All variants for today
+    python3 daily.py --variants digest,newsletter     # Only some variants
+    python3 daily.py --date 2026-01-14                # Generate for a specific date
+    python3 daily.py --open                           # Open HTML outputs in browser
+    python3 daily.py --no-sync --date 2025-11-03      # Answer from the store only
+    python3 daily.py --from 2026-01-01 --to 2026-01-31 --variants digest
+                                                      # One file per day; unchanged days skipped
+    python3 daily.py --watch --variants digest        # Pre-render through the day, assemble at noon
+    python3 daily.py --optimize --budget 100 --trim   # Email-ready HTML within a size budget
+
+Environment variables:
+    WP_USER          Your WordPress username
+    WP_APP_PASSWORD  WordPress application password
+    ANTHROPIC_API_KEY  Anthropic API key for AI intro generation
+"""
+
+import os
+import sys
+import re
+import json
+import argparse
+import base64
+import hashlib
+import inspect
+import textwrap
+import time
+import webbrowser
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from email.mime.multipart import MIMEMultipart
+from email.mime.text import MIMEText
+from pathlib import Path
+from html import unescape, escape
+
+import requests
+import pytz
+from bs4 import BeautifulSoup
+from anthropic import Anthropic
+from dotenv import load_dotenv
+
+# Configuration
+SCRIPT_DIR = Path(__file__).parent
+
+# Load environment variables from .env file
+load_dotenv(SCRIPT_DIR / ".env")
+WP_SITE = "https://boingboing.net"
+WP_USER = os.environ.get("WP_USER", "")
+WP_APP_PASSWORD = os.environ.get("WP_APP_PASSWORD", "")
+PACIFIC = pytz.timezone('US/Pacific')
+
+SHOP_AUTHOR = "Boing Boing's Shop"
+DEFAULT_SUBHEAD = "Today's posts"
+DEFAULT_INTRO = "Here are today's Boing Boing stories. Thanks for reading!"
+NEWSLETTER_SUBHEAD = "All our posts from the past 24 hours"
+NEWSLETTER_INTRO = "Here are today's Boing Boing stories. Thanks for supporting independent journalism!"
+
+# Intro audiences: (includes shop posts, fallback subhead, fallback intro)
+INTRO_KINDS = {
+    "digest": (True, DEFAULT_SUBHEAD, DEFAULT_INTRO),
+    "newsletter": (False, NEWSLETTER_SUBHEAD, NEWSLETTER_INTRO),
+}
+
+# Paragraphs WordPress appends to feed content that we never want to send
+BOILERPLATE_PHRASES = (
+    'appeared first on',
+    'this entry was posted',
+    'published under a creative commons license',
+)
+
+# Elements that start a new paragraph in the plain-text rendering
+TEXT_BLOCK_TAGS = ['p', 'blockquote', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'figcaption', 'pre']
+
+# Post-set hashes of days generated by --from/--to, kept in the output directory
+MANIFEST_NAME = ".daily_manifest.json"
+
+# Rendered article fragments, cached by post ID and modified time
+FRAGMENT_DIR = SCRIPT_DIR / ".digest_cache"
+FRAGMENT_MAX_AGE_DAYS = 7
+# Part of every fragment's cache key: bump it when a change outside the hashed
+# functions (see template_version) changes rendered output, e.g. TEXT_BLOCK_TAGS
+FRAGMENT_CACHE_VERSION = 1
+
+# Cache for author names
+AUTHOR_CACHE = {}
+
+
+def get_time_window(target_date=None):
+    """Get noon-to-noon time window for the target date.
+
+    Returns (start_dt, end_dt) in UTC for API queries.
+    """
+    if target_date:
+        end_date = datetime.strptime(target_date, "%Y-%m-%d")
+        end_date = PACIFIC.localize(end_date.replace(hour=12, minute=0, second=0, microsecond=0))
+    else:
+        now = datetime.now(PACIFIC)
+        end_date = now.replace(hour=12, minute=0, second=0, microsecond=0)
+
+    start_date = end_date - timedelta(days=1)
+    start_utc = start_date.astimezone(pytz.UTC)
+    end_utc = end_date.astimezone(pytz.UTC)
+
+    return start_utc, end_utc
+
+
+def get_auth_headers():
+    """Create authentication headers for WordPress API."""
+    if not WP_USER or not WP_APP_PASSWORD:
+        print("Error: WP_USER and WP_APP_PASSWORD environment variables required.")
+        print("\nSet them with:")
+        print('  export WP_USER="your-username"')
+        print('  export WP_APP_PASSWORD="xxxx xxxx xxxx xxxx"')
+        sys.exit(1)
+
+    credentials = f"{WP_USER}:{WP_APP_PASSWORD}"
+    auth_header = base64.b64encode(credentials.encode()).decode()
+
+    return {
+        "Authorization": f"Basic {auth_header}",
+        "User-Agent": "BoingBoingTools/1.0"
+    }
+
+
+def fetch_author(author_id, headers):
+    """Fetch author name by ID, with caching."""
+    if author_id in AUTHOR_CACHE:
+        return AUTHOR_CACHE[author_id]
+
+    try:
+        response = requests.get(
+            f"{WP_SITE}/wp-json/wp/v2/users/{author_id}",
+            headers=headers,
+            timeout=10
+        )
+        if response.status_code == 200:
+            data = response.json()
+            name = data.get("name", "Unknown")
+            AUTHOR_CACHE[author_id] = name
+            return name
+    except Exception:
+        pass
+
+    return "Unknown"
+
+
+def fetch_post_pages(params, headers):
+    """Page through /wp/v2/posts with the given query and return every post."""
+    all_posts = []
+    page = 1
+
+    while True:
+        try:
+            response = requests.get(
+                f"{WP_SITE}/wp-json/wp/v2/posts",
+                params={
+                    "status": "publish",
+                    "per_page": 100,
+                    "page": page,
+                    "_embed": "author,wp:featuredmedia",
+                    **params
+                },
+                headers=headers,
+                timeout=30
+            )
+
+            if response.status_code == 400:
+                break
+
+            if response.status_code == 401:
+                print("Error: Authentication failed.")
+                sys.exit(1)
+
+            if response.status_code == 403:
+                print("Error: Access forbidden. IP may need Cloudflare whitelist.")
+                sys.exit(1)
+
+            response.raise_for_status()
+            posts = response.json()
+
+            if not posts:
+                break
+
+            all_posts.extend(posts)
+
+            total_pages = int(response.headers.get("X-WP-TotalPages", 1))
+            if page >= total_pages:
+                break
+
+            page += 1
+
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching posts: {e}")
+            sys.exit(1)
+
+    return all_posts
+
+
+def set_author_names(posts, headers):
+    """Store each post's author name in post["_author_name"]."""
+    for post in posts:
+        author_id = post.get("author")
+        embedded = post.get("_embedded", {})
+        author_data = embedded.get("author", [{}])[0] if embedded.get("author") else {}
+        author_name = author_data.get("name") if author_data else None
+
+        if not author_name and author_id:
+            author_name = fetch_author(author_id, headers)
+
+        post["_author_name"] = author_name or "Unknown"
+
+
+def print_window(start_utc, end_utc):
+    """Print the time window in Pacific time."""
+    print(f"Fetching posts from {start_utc.astimezone(PACIFIC).strftime('%Y-%m-%d %I:%M %p PT')}")
+    print(f"                  to {end_utc.astimezone(PACIFIC).strftime('%Y-%m-%d %I:%M %p PT')}")
+
+
+def fetch_published_posts(start_utc, end_utc):
+    """Fetch published posts within the time window (shop posts included)."""
+    headers = get_auth_headers()
+
+    print_window(start_utc, end_utc)
+
+    all_posts = fetch_post_pages({
+        "after": start_utc.strftime("%Y-%m-%dT%H:%M:%S"),
+        "before": end_utc.strftime("%Y-%m-%dT%H:%M:%S"),
+        "orderby": "date",
+        "order": "desc",
+    }, headers)
+
+    # Get author names for all posts (including shop posts)
+    set_author_names(all_posts, headers)
+
+    print(f"Found {len(all_posts)} posts")
+    return all_posts
+
+
+def load_published_posts(start_utc, end_utc, use_store=True, sync=True):
+    """Load posts in the time window from the local post store, or the API."""
+    if not use_store:
+        return fetch_published_posts(start_utc, end_utc)
+
+    import post_store
+
+    with post_store.open_store() as conn:
+        if sync:
+            post_store.sync(conn, since=start_utc, until=end_utc)
+        print_window(start_utc, end_utc)
+        posts = post_store.posts_between(conn, start_utc, end_utc)
+
+    print(f"Found {len(posts)} posts (local store)")
+    return posts
+
+
+def format_post_date(date_str):
+    """Format ISO date to 'Day, DD Mon YYYY'."""
+    dt = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+    dt_pacific = dt.astimezone(PACIFIC)
+    return dt_pacific.strftime("%a, %d %b %Y")
+
+
+def format_newsletter_date(date_str):
+    """Format ISO date to 'h:mm am PT Day Mon DD, YYYY'."""
+    dt = datetime.fromisoformat(date_str.replace("Z", "+00:00"))
+    dt_pacific = dt.astimezone(PACIFIC)
+    formatted = dt_pacific.strftime("%-I:%M %p PT %a %b %-d, %Y")
+    return formatted.replace("AM", "am").replace("PM", "pm")
+
+
+def block_text(elements, skip_nested=True):
+    """Join the text of block elements into paragraphs separated by blank lines."""
+    paragraphs = []
+    for el in elements:
+        # Nested blocks (e.g. a <p> inside a <blockquote>) are covered by their parent
+        if skip_nested and el.find_parent(TEXT_BLOCK_TAGS):
+            continue
+        text = el.get_text(" ", strip=True)
+        if text:
+            paragraphs.append(text)
+    return "\n\n".join(paragraphs)
+
+
+def parse_content(html_content, max_paragraphs=2):
+    """Parse post content once and return (excerpt_html, excerpt_text, full_html, full_text).
+
+    The full content keeps everything except scripts, styles, ad placeholders
+    and WordPress boilerplate. The excerpt is the first 1-2 real paragraphs
+    (falling back to blockquotes, which are often used in posts).
+    """
+    if not html_content:
+        return "", "", "", ""
+
+    soup = BeautifulSoup(html_content, "html.parser")
+
+    # Remove unwanted elements
+    for tag in soup.find_all(['script', 'style']):
+        tag.decompose()
+
+    # Remove ad placeholders
+    for div in soup.find_all('div', class_=lambda x: x and 'boing-primis' in x):
+        div.decompose()
+    for div in soup.find_all('div', class_=lambda x: x and 'advads' in x):
+        div.decompose()
+
+    # Remove "The post X appeared first on Y" and similar text
+    for p in soup.find_all('p'):
+        text = p.get_text(strip=True).lower()
+        if any(phrase in text for phrase in BOILERPLATE_PHRASES):
+            p.decompose()
+
+    full_html = str(soup).strip()
+    full_text = block_text(soup.find_all(TEXT_BLOCK_TAGS))
+
+    # Embeds never make sense in an excerpt
+    for tag in soup.find_all('iframe'):
+        tag.decompose()
+
+    # Get paragraphs
+    excerpt = []
+    for p in soup.find_all('p'):
+        text = p.get_text(strip=True)
+        if text and len(text) > 20:  # Skip very short paragraphs
+            excerpt.append(p)
+            if len(excerpt) >= max_paragraphs:
+                break
+
+    # Also check for blockquotes (often used in posts)
+    if len(excerpt) < max_paragraphs:
+        for bq in soup.find_all('blockquote'):
+            excerpt.append(bq)
+            if len(excerpt) >= max_paragraphs:
+                break
+
+    excerpt_html = '\n'.join(str(el) for el in excerpt)
+    excerpt_text = block_text(excerpt, skip_nested=False)
+
+    return excerpt_html, excerpt_text, full_html, full_text
+
+
+def extract_featured_image(post):
+    """Extract featured image URL, alt text, and caption from embedded data."""
+    embedded = post.get("_embedded", {})
+    media = embedded.get("wp:featuredmedia", [])
+
+    if media and len(media) > 0:
+        media_item = media[0]
+        source_url = media_item.get("source_url", "")
+        alt_text = media_item.get("alt_text", "")
+
+        # Get caption
+        caption = ""
+        caption_data = media_item.get("caption", {})
+        if isinstance(caption_data, dict):
+            caption = caption_data.get("rendered", "")
+        elif isinstance(caption_data, str):
+            caption = caption_data
+
+        # Clean caption HTML
+        if caption:
+            soup = BeautifulSoup(caption, "html.parser")
+            caption = soup.get_text().strip()
+
+        return source_url, alt_text, caption
+
+    return None, None, None
+
+
+def prepare_post(post):
+    """Parse a WordPress post into the fields every output variant needs."""
+    title = unescape(post.get("title", {}).get("rendered", "Untitled"))
+    author = post.get("_author_name", "Unknown")
+    content = post.get("content", {}).get("rendered", "")
+
+    excerpt_html, excerpt_text, full_html, full_text = parse_content(content)
+    img_url, alt_text, caption = extract_featured_image(post)
+
+    return {
+        "id": post.get("id"),
+        "title": title,
+        "author": author,
+        "date": post.get("date", ""),
+        "link": post.get("link", ""),
+        "is_shop": author == SHOP_AUTHOR,
+        "img_url": img_url,
+        "alt_text": alt_text or "",
+        "caption": caption or "",
+        "excerpt_html": excerpt_html,
+        "excerpt_text": excerpt_text,
+        "full_html": full_html,
+        "full_text": full_text,
+    }
+
+
+def generate_ai_intro(posts, kind="digest"):
+    """Generate subhead and introduction using Claude.
+
+    kind is an INTRO_KINDS key: the newsletter's intro is written from its
+    own posts (no shop posts) and has its own fallback text.
+    """
+    with_shop, default_subhead, default_intro = INTRO_KINDS[kind]
+    api_key = os.environ.get("ANTHROPIC_API_KEY")
+    if not api_key:
+        print("Warning: ANTHROPIC_API_KEY not set. Using default intro.")
+        return default_subhead, default_intro
+
+    headlines = [post["title"] for post in posts if with_shop or not post["is_shop"]]
+    headlines_text = "\n".join([f"- {h}" for h in headlines[:30]])
+
+    client = Anthropic(api_key=api_key)
+
+    prompt = f"""You're writing the newsletter intro for Boing Boing, a blog about tech, culture, science, and politics.
+
+Here are today's post headlines:
+{headlines_text}
+
+Generate:
+1. SUBHEAD: A witty 5-10 word subhead that captures the day's theme or highlights an interesting story. Don't use generic phrases like "{default_subhead}". Be specific and clever.
+
+2. INTRO: A 1-2 sentence introduction (under 50 words) that gives readers a taste of what's inside. Mention 1-2 specific stories. End with a brief thanks for reading.
+
+Return ONLY valid JSON:
+{{"subhead": "your subhead here", "intro": "your intro here"}}"""
+
+    try:
+        response = client.messages.create(
+            model="claude-sonnet-4-20250514",
+            max_tokens=256,
+            messages=[{"role": "user", "content": prompt}]
+        )
+
+        text = response.content[0].text
+        json_match = re.search(r'\{[\s\S]*\}', text)
+        if json_match:
+            data = json.loads(json_match.group())
+            return data.get("subhead", ""), data.get("intro", "")
+
+    except Exception as e:
+        print(f"Warning: AI intro generation failed: {e}")
+
+    return default_subhead, default_intro
+
+
+def generate_intros(posts, variants):
+    """Generate the intros the variants need: {kind: (subhead, intro)}."""
+    kinds = {VARIANT_INTROS[variant] for variant in variants}
+    return {kind: generate_ai_intro(posts, kind) for kind in INTRO_KINDS if kind in kinds}
+
+
+def format_date_header(target_date):
+    """Format the header date, e.g. 'January 14, 2026'."""
+    if target_date:
+        dt = datetime.strptime(target_date, "%Y-%m-%d")
+    else:
+        dt = datetime.now(PACIFIC)
+
+    return dt.strftime("%B %-d, %Y")
+
+
+def render_digest_article(post):
+    """Render one digest article (excerpt, or full content for shop posts)."""
+    title_escaped = escape(post["title"])
+    link = post["link"]
+    formatted_date = format_post_date(post["date"]) if post["date"] else ""
+
+    # Shop posts get full content, others get excerpt
+    is_shop_post = post["is_shop"]
+    article_content = post["full_html"] if is_shop_post else post["excerpt_html"]
+
+    img_url = post["img_url"]
+    caption = post["caption"]
+    # Use caption as alt text fallback
+    alt_escaped = escape(post["alt_text"] or caption)
+    caption_escaped = escape(caption)
+
+    html = f'''
+            <article class="article">
+                <h2>{post["title"]}</h2>
+                <h6>By {post["author"]} / {formatted_date}</h6>
+
+                <div class="article-content">
+                    '''
+
+    if img_url:
+        if caption:
+            html += f'<figure class="article-figure"><a href="{link}" title="{title_escaped}" rel="nofollow"><img src="{img_url}" alt="{alt_escaped}" /></a><figcaption>{caption_escaped}</figcaption></figure>'
+        else:
+            html += f'<a href="{link}" title="{title_escaped}" rel="nofollow"><img src="{img_url}" class="article-image" alt="{alt_escaped}" /></a>'
+
+    html += article_content
+
+    # Only show "Read more" for non-shop posts
+    if is_shop_post:
+        html += '''
+                </div>
+            </article>
+            '''
+    else:
+        html += f'''
+                </div>
+                <p><a href="{link}" class="read-more">Read more →</a></p>
+            </article>
+            '''
+
+    return html
+
+
+def render_digest(target_date, subhead, intro, posts):
+    """Render digest HTML (excerpts, full content for shop posts)."""
+    date_header = format_date_header(target_date)
+
+    html = f'''
+        <!DOCTYPE html>
+        <html lang="en">
+        <head>
+            <meta charset="UTF-8">
+            <meta name="viewport" content="width=device-width, initial-scale=1.0">
+            <title>Boing Boing Digest</title>
+            <style>
+                body {{
+                    max-width: 800px;
+                    margin: 0 auto;
+                    padding: 20px;
+                    font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif;
+                    line-height: 1.6;
+                }}
+                .digest-header {{
+                    margin-bottom: 40px;
+                }}
+                .digest-header h1 {{
+                    margin-bottom: 5px;
+                }}
+                .digest-header h3 {{
+                    margin-top: 0;
+                    color: #666;
+                    font-weight: normal;
+                }}
+                .digest-header p {{
+                    margin-top: 10px;
+                    color: #333;
+                }}
+                .article {{
+                    margin-bottom: 40px;
+                    padding-bottom: 20px;
+                    border-bottom: 1px solid #eee;
+                }}
+                .article h2 {{
+                    color: #333;
+                    margin-bottom: 10px;
+                }}
+                h6 {{
+                    color: #666;
+                    font-size: 0.9em;
+                    font-weight: normal;
+                    margin: 10px 0;
+                }}
+                .article-image {{
+                    width: 100%;
+                    max-width: 800px;
+                    height: auto;
+                    margin: 20px 0;
+                    border-radius: 8px;
+                    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+                }}
+                img {{
+                    max-width: 100%;
+                    height: auto;
+                }}
+                .read-more {{
+                    color: #0066cc;
+                    text-decoration: none;
+                }}
+                .read-more:hover {{
+                    text-decoration: underline;
+                }}
+                .article-figure {{
+                    margin: 20px 0;
+                }}
+                .article-figure figcaption {{
+                    color: #666;
+                    font-size: 0.9em;
+                    margin-top: 8px;
+                    text-align: center;
+                    font-style: italic;
+                }}
+                a {{
+                    color: #0066cc;
+                }}
+                blockquote {{
+                    border-left: 3px solid #ccc;
+                    margin: 15px 0;
+                    padding-left: 15px;
+                    color: #555;
+                }}
+            </style>
+        </head>
+        <body>
+            <div class="digest-header">
+                <h1>Boing Boing Digest, {date_header}</h1>
+                <h3>{subhead}</h3>
+                <p>{intro}</p>
+            </div>
+        '''
+
+    for post in posts:
+        html += article_fragment(post, "digest")
+
+    html += '''
+        </body>
+        </html>
+        '''
+
+    return html
+
+
+def render_newsletter_article(post):
+    """Render one newsletter article with its full content."""
+    author = post["author"]
+    formatted_date = format_newsletter_date(post["date"]) if post["date"] else ""
+    img_url = post["img_url"]
+    # Try alt text if no caption
+    caption = post["caption"] or post["alt_text"]
+
+    html = '<article>'
+    html += f'<h2>{post["title"]}</h2>'
+
+    if author and formatted_date:
+        html += f'<h6>{author} / {formatted_date}</h6>'
+
+    if img_url:
+        if caption:
+            html += f'<figure><img src="{img_url}"/><figcaption class="image-caption">{caption}</figcaption></figure>'
+        else:
+            html += f'<img src="{img_url}"/>'
+
+    html += post["full_html"]
+
+    html += '</article>'
+
+    return html
+
+
+def render_newsletter(target_date, subhead, intro, posts):
+    """Render newsletter HTML (full content, shop posts excluded)."""
+    date_header = format_date_header(target_date)
+    posts = [post for post in posts if not post["is_shop"]]
+
+    html = f'''
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Boing Boing Feed</title>
+    <style>
+        body {{
+            font-family: -apple-system, BlinkMacSystemFont, "Segoe UI", Roboto, Helvetica, Arial, sans-serif;
+            line-height: 1.6;
+            padding: 20px;
+            max-width: 800px;
+            margin: 0 auto;
+            background-color: #f5f5f5;
+            color: #333;
+        }}
+        article {{
+            background: white;
+            padding: 30px;
+            margin-bottom: 30px;
+            border-radius: 8px;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.1);
+        }}
+        h2 {{
+            color: #1a1a1a;
+            margin-top: 0;
+            margin-bottom: 10px;
+            font-size: 24px;
+            line-height: 1.3;
+        }}
+        h6 {{
+            color: #666;
+            font-weight: normal;
+            margin-top: 0;
+            margin-bottom: 20px;
+            font-size: 14px;
+        }}
+        img {{
+            max-width: 100%;
+            height: auto;
+            display: block;
+            margin: 20px auto;
+            border-radius: 4px;
+        }}
+        figcaption.image-caption {{
+            color: #666;
+            text-align: center;
+            margin: 10px 0 20px;
+            font-size: 14px;
+            font-style: italic;
+        }}
+        p {{
+            margin: 15px 0;
+        }}
+        a {{
+            color: #0066cc;
+            text-decoration: none;
+        }}
+        a:hover {{
+            text-decoration: underline;
+        }}
+        .meta {{
+            font-size: 14px;
+            color: #666;
+            margin-bottom: 30px;
+            padding-bottom: 10px;
+            border-bottom: 1px solid #eee;
+        }}
+        h1 {{
+            text-align: center;
+            margin-bottom: 10px;
+            font-size: 32px;
+        }}
+        h3 {{
+            text-align: center;
+            color: #666;
+            margin-top: 0;
+            margin-bottom: 30px;
+            font-weight: normal;
+        }}
+        blockquote {{
+            border-left: 3px solid #ccc;
+            margin: 20px 0;
+            padding-left: 20px;
+            color: #555;
+        }}
+    </style>
+</head>
+<body>
+    <h1>Boing Boing, {date_header}</h1>
+    <h3>{subhead}</h3>
+<p>Generated on: {datetime.now(pytz.UTC).strftime('%Y-%m-%d %H:%M:%S %Z')}</p><p>{intro}</p>'''
+
+    for i, post in enumerate(posts):
+        html += article_fragment(post, "newsletter")
+
+        # Add spacer between articles (except after last one)
+        if i < len(posts) - 1:
+            html += '<p> </p>'
+
+    html += '''
+</body>
+</html>
+'''
+
+    return html
+
+
+def render_text_article(post):
+    """Render one article as wrapped plain text."""
+    formatted_date = format_post_date(post["date"]) if post["date"] else ""
+    body = post["full_text"] if post["is_shop"] else post["excerpt_text"]
+
+    lines = [post["title"], f"By {post['author']} / {formatted_date}", ""]
+    for paragraph in body.split("\n\n"):
+        lines.extend(textwrap.wrap(paragraph, 72))
+        lines.append("")
+
+    if not post["is_shop"]:
+        lines.append(f"Read more: {post['link']}")
+
+    return "\n".join(lines).rstrip("\n")
+
+
+def render_text(target_date, subhead, intro, posts):
+    """Render the plain-text body that accompanies the digest HTML."""
+    date_header = format_date_header(target_date)
+
+    lines = [f"Boing Boing Digest, {date_header}", subhead, ""]
+    lines.extend(textwrap.wrap(intro, 72))
+
+    for post in posts:
+        lines.extend(["", "-" * 72, article_fragment(post, "text")])
+
+    lines.append("")
+    return "\n".join(lines)
+
+
+def render_eml(target_date, subhead, intro, posts, html=None):
+    """Render a multipart/alternative message with the text and digest HTML parts.
+
+    Pass html to use an already rendered (e.g. optimized) digest as the HTML part.
+    """
+    message = MIMEMultipart("alternative")
+    message["Subject"] = f"Boing Boing Digest, {format_date_header(target_date)}: {subhead}"
+    message.attach(MIMEText(render_text(target_date, subhead, intro, posts), "plain", "utf-8"))
+    message.attach(MIMEText(html or render_digest(target_date, subhead, intro, posts), "html", "utf-8"))
+    return message.as_string()
+
+
+# Output variants: name -> (renderer, output filename template)
+VARIANTS = {
+    "digest": (render_digest, "digest_{date}.html"),
+    "newsletter": (render_newsletter, "newsletter_{date}.html"),
+    "text": (render_text, "digest_{date}.txt"),
+    "eml": (render_eml, "digest_{date}.eml"),
+}
+
+# The intro kind (see INTRO_KINDS) each variant uses
+VARIANT_INTROS = {"digest": "digest", "newsletter": "newsletter", "text": "digest", "eml": "digest"}
+
+# Per-article fragment renderers, cached with each prepared post
+ARTICLE_RENDERERS = {
+    "digest": render_digest_article,
+    "newsletter": render_newsletter_article,
+    "text": render_text_article,
+}
+
+# Functions that turn a WordPress post into the fields the renderers use
+PREPARE_FUNCTIONS = [prepare_post, parse_content, block_text, extract_featured_image]
+
+
+def article_fragment(post, kind):
+    """Return a post's rendered article fragment, rendering it on first use."""
+    fragments = post.setdefault("fragments", {})
+    if kind not in fragments:
+        fragments[kind] = ARTICLE_RENDERERS[kind](post)
+    return fragments[kind]
+
+
+def template_version():
+    """Short hash of the post preparation and article renderers, so editing either invalidates cached fragments."""
+    functions = PREPARE_FUNCTIONS + list(ARTICLE_RENDERERS.values())
+    source = f"{FRAGMENT_CACHE_VERSION}\n" + "".join(inspect.getsource(function) for function in functions)
+    return hashlib.sha256(source.encode()).hexdigest()[:8]
+
+
+def fragment_path(raw_post, version):
+    """Cache file for a post, keyed by post ID, modified time and template version."""
+    modified = raw_post.get("modified_gmt", "").replace(":", "")
+    return FRAGMENT_DIR / f"{raw_post['id']}-{modified}-{version}.json"
+
+
+def prepare_posts(raw_posts):
+    """Prepare posts and render their article fragments, reusing the on-disk fragment cache.
+
+    Returns (posts, rendered) where rendered is how many posts were not cached.
+    A post edited after it was cached has a new modified time, so it is
+    re-rendered and its stale cache files are removed.
+    """
+    version = template_version()
+    FRAGMENT_DIR.mkdir(exist_ok=True)
+    posts = []
+    rendered = 0
+
+    for raw_post in raw_posts:
+        path = fragment_path(raw_post, version)
+        if path.exists():
+            posts.append(json.loads(path.read_text()))
+            continue
+
+        post = prepare_post(raw_post)
+        for kind in ARTICLE_RENDERERS:
+            article_fragment(post, kind)
+
+        for stale in FRAGMENT_DIR.glob(f"{raw_post['id']}-*.json"):
+            stale.unlink()
+        path.write_text(json.dumps(post))
+
+        posts.append(post)
+        rendered += 1
+
+    return posts, rendered
+
+
+def prune_fragment_cache(max_age_days=FRAGMENT_MAX_AGE_DAYS):
+    """Delete cached fragments that haven't been written for max_age_days."""
+    cutoff = time.time() - max_age_days * 86400
+    for path in FRAGMENT_DIR.glob("*.json"):
+        if path.stat().st_mtime < cutoff:
+            path.unlink()
+
+
+def parse_variants(value):
+    """Parse a comma-separated variant list, e.g. 'digest,text'."""
+    variants = [v.strip() for v in value.split(",") if v.strip()]
+    unknown = [v for v in variants if v not in VARIANTS]
+    if unknown or not variants:
+        raise argparse.ArgumentTypeError(
+            f"unknown variant(s): {', '.join(unknown) or value} (choose from {', '.join(VARIANTS)})"
+        )
+    return variants
+
+
+def write_outputs(target_date, variants, intros, posts, output=None, output_dir=SCRIPT_DIR,
+                  email_budget=None):
+    """Render each variant and write it to disk. Returns {variant: path}.
+
+    intros is generate_intros()'s {kind: (subhead, intro)}.
+
+    email_budget is None, or a dict of email_weight.optimize() options
+    (budget_kb, trim) to run the HTML outputs through the email post-processor.
+    """
+    date_name = target_date or datetime.now(PACIFIC).strftime("%Y-%m-%d")
+    outputs = {}
+    optimized = {}
+
+    def optimize_html(variant, html):
+        import email_weight
+
+        if variant not in optimized:
+            optimized[variant], report = email_weight.optimize(html, **email_budget)
+            email_weight.print_report(report, variant)
+        return optimized[variant]
+
+    for variant in variants:
+        renderer, filename = VARIANTS[variant]
+        subhead, intro = intros[VARIANT_INTROS[variant]]
+
+        if email_budget is not None and variant in ("digest", "newsletter"):
+            content = optimize_html(variant, renderer(target_date, subhead, intro, posts))
+        elif email_budget is not None and variant == "eml":
+            html = optimize_html("digest", render_digest(target_date, subhead, intro, posts))
+            content = render_eml(target_date, subhead, intro, posts, html=html)
+        else:
+            content = renderer(target_date, subhead, intro, posts)
+
+        output_file = Path(output) if output else Path(output_dir) / filename.format(date=date_name)
+        output_file.write_text(content)
+        outputs[variant] = output_file
+
+    return outputs
+
+
+def generate(target_date, variants, output=None, use_store=True, sync=True, email_budget=None):
+    """Fetch, parse and render the requested variants. Returns {variant: path}."""
+    start_utc, end_utc = get_time_window(target_date)
+    raw_posts = load_published_posts(start_utc, end_utc, use_store=use_store, sync=sync)
+
+    if not raw_posts:
+        print("No posts found in the time window.")
+        return {}
+
+    posts, _ = prepare_posts(raw_posts)
+
+    print("Generating AI subhead and introduction...")
+    intros = generate_intros(posts, variants)
+    for kind, (subhead, _) in intros.items():
+        print(f"  Subhead ({kind}): {subhead}")
+
+    print(f"Rendering {', '.join(variants)}...")
+    outputs = write_outputs(target_date, variants, intros, posts, output, email_budget=email_budget)
+
+    print()
+    for variant, output_file in outputs.items():
+        print(f"{variant.capitalize()} saved to: {output_file}")
+    print(f"  Posts included: {len(posts)} ({sum(p['is_shop'] for p in posts)} shop)")
+
+    return outputs
+
+
+def date_range(from_date, to_date):
+    """List the YYYY-MM-DD dates from from_date to to_date, inclusive."""
+    day = datetime.strptime(from_date, "%Y-%m-%d")
+    last = datetime.strptime(to_date, "%Y-%m-%d")
+    dates = []
+    while day <= last:
+        dates.append(day.strftime("%Y-%m-%d"))
+        day += timedelta(days=1)
+    return dates
+
+
+def bucket_by_window(posts, dates):
+    """Group posts into the noon-to-noon window (as in get_time_window) of each date."""
+    windows = [(date, *get_time_window(date)) for date in dates]
+    buckets = {date: [] for date in dates}
+
+    for post in posts:
+        published = pytz.UTC.localize(datetime.strptime(post["date_gmt"], "%Y-%m-%dT%H:%M:%S"))
+        for date, start_utc, end_utc in windows:
+            if start_utc <= published < end_utc:
+                buckets[date].append(post)
+                break
+
+    return buckets
+
+
+def post_set_hash(posts, variants):
+    """Hash a day's post set (IDs and modified times) together with the templates used.
+
+    Including the renderer source means a template change regenerates every day.
+    """
+    digest = hashlib.sha256()
+    for post in sorted(posts, key=lambda p: p["id"]):
+        digest.update(f"{post['id']}:{post.get('modified_gmt', '')}\n".encode())
+    for variant in variants:
+        digest.update(inspect.getsource(VARIANTS[variant][0]).encode())
+    digest.update(template_version().encode())
+    return digest.hexdigest()
+
+
+def generate_range(from_date, to_date, variants, output_dir=SCRIPT_DIR, jobs=4,
+                   force=False, use_store=True, sync=True, email_budget=None):
+    """Generate one set of outputs per day for every date from from_date to to_date.
+
+    The whole span is fetched in one sweep and split into noon-to-noon windows.
+    Days whose post set (and templates) haven't changed since the last run are
+    skipped, and the remaining intros are generated concurrently.
+    """
+    output_dir = Path(output_dir)
+    dates = date_range(from_date, to_date)
+    if not dates:
+        return {}
+    start_utc = get_time_window(dates[0])[0]
+    end_utc = get_time_window(dates[-1])[1]
+
+    raw_posts = load_published_posts(start_utc, end_utc, use_store=use_store, sync=sync)
+    buckets = bucket_by_window(raw_posts, dates)
+
+    manifest_file = output_dir / MANIFEST_NAME
+    manifest = json.loads(manifest_file.read_text()) if manifest_file.exists() else {}
+
+    pending = {}
+    for date in dates:
+        day_posts = buckets[date]
+        if not day_posts:
+            print(f"{date}: no posts")
+            continue
+
+        post_hash = post_set_hash(day_posts, variants)
+        expected = [output_dir / VARIANTS[v][1].format(date=date) for v in variants]
+        if not force and manifest.get(date) == post_hash and all(f.exists() for f in expected):
+            print(f"{date}: unchanged, skipping")
+            continue
+
+        pending[date] = (post_hash, prepare_posts(day_posts)[0])
+
+    if not pending:
+        print("Nothing to generate.")
+        return {}
+
+    print(f"Generating {len(pending)} intros ({jobs} at a time)...")
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        intros = dict(zip(pending, pool.map(lambda posts: generate_intros(posts, variants),
+                                            [posts for _, posts in pending.values()])))
+
+    results = {}
+    for date, (post_hash, posts) in pending.items():
+        results[date] = write_outputs(date, variants, intros[date], posts, output_dir=output_dir,
+                                      email_budget=email_budget)
+        manifest[date] = post_hash
+        subhead, _ = next(iter(intros[date].values()))
+        print(f"{date}: {len(posts)} posts - {subhead}")
+
+    manifest_file.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+    print(f"\nWrote {len(results)} days to {output_dir}")
+    return results
+
+
+def next_digest_date():
+    """Date of the next noon Pacific cutoff: today before noon, tomorrow after."""
+    now = datetime.now(PACIFIC)
+    day = now if now.hour < 12 else now + timedelta(days=1)
+    return day.strftime("%Y-%m-%d")
+
+
+def watch(variants, interval=600, use_store=True, email_budget=None):
+    """Pre-render the next digest through the day, then assemble it at noon.
+
+    Every poll picks up newly published (or edited) posts in the window and
+    renders their article fragments into the cache, so at the cutoff only
+    the intro call and the final assembly are left.
+    """
+    target_date = next_digest_date()
+    start_utc, end_utc = get_time_window(target_date)
+    print(f"Watching for the {target_date} digest, polling every {interval // 60} minutes")
+
+    while True:
+        raw_posts = load_published_posts(start_utc, end_utc, use_store=use_store)
+        posts, rendered = prepare_posts(raw_posts)
+        print(f"[{datetime.now(PACIFIC).strftime('%I:%M %p')}] {len(posts)} posts in window, {rendered} newly rendered\n")
+
+        remaining = (end_utc - datetime.now(pytz.UTC)).total_seconds()
+        if remaining <= 0:
+            break
+        time.sleep(min(interval, remaining))
+
+    prune_fragment_cache()
+
+    if not posts:
+        print("No posts found in the time window.")
+        return {}
+
+    print("Generating AI subhead and introduction...")
+    intros = generate_intros(posts, variants)
+    for kind, (subhead, _) in intros.items():
+        print(f"  Subhead ({kind}): {subhead}")
+
+    outputs = write_outputs(target_date, variants, intros, posts, email_budget=email_budget)
+    print()
+    for variant, output_file in outputs.items():
+        print(f"{variant.capitalize()} saved to: {output_file}")
+    print(f"  Posts included: {len(posts)}")
+
+    return outputs
+
+
+def main(default_variants=None, description=None):
+    default_variants = default_variants or list(VARIANTS)
+
+    parser = argparse.ArgumentParser(
+        description=description or "Generate daily digest, newsletter and text outputs from Boing Boing posts"
+    )
+    parser.add_argument("--date", "-d", help="Target date (YYYY-MM-DD). Default: today")
+    parser.add_argument("--from", dest="from_date", help="First date of a range to generate (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="to_date", help="Last date of the range (YYYY-MM-DD). Default: today")
+    parser.add_argument("--jobs", "-j", type=int, default=4, help="Concurrent intro generations for ranges. Default: 4")
+    parser.add_argument("--force", action="store_true", help="Regenerate days in a range even if unchanged")
+    parser.add_argument("--output-dir", type=Path, default=SCRIPT_DIR, help="Directory for range outputs")
+    parser.add_argument("--watch", action="store_true",
+                        help="Poll and pre-render posts until the next noon cutoff, then assemble the outputs")
+    parser.add_argument("--interval", type=int, default=10, help="Minutes between polls in --watch mode. Default: 10")
+    parser.add_argument("--optimize", action="store_true",
+                        help="Inline CSS, minify and size-check HTML outputs for email (see email_weight.py)")
+    parser.add_argument("--budget", type=int, default=100, help="Email size budget in KB for --optimize. Default: 100")
+    parser.add_argument("--trim", action="store_true", help="With --optimize, trim excerpts to fit the budget")
+    parser.add_argument("--open", "-o", action="store_true", help="Open HTML outputs in browser after generating")
+    parser.add_argument("--variants", "-v", type=parse_variants, default=default_variants,
+                        help=f"Comma-separated outputs: {', '.join(VARIANTS)}. "
+                             f"Default: {','.join(default_variants)}")
+    parser.add_argument("--output", help="Output filename (only with a single variant)")
+    parser.add_argument("--api", action="store_true", help="Fetch directly from WordPress, bypassing the local post store")
+    parser.add_argument("--no-sync", action="store_true", help="Use the local post store as-is, without syncing first")
+    args = parser.parse_args()
+
+    if args.output and len(args.variants) > 1:
+        parser.error("--output can only be used with a single variant")
+
+    if args.to_date and not args.from_date:
+        parser.error("--to requires --from")
+
+    email_budget = {"budget_kb": args.budget, "trim": args.trim} if args.optimize else None
+
+    if args.watch:
+        if args.date or args.from_date or args.output:
+            parser.error("--watch cannot be combined with --date, --from or --output")
+        outputs = watch(args.variants, interval=args.interval * 60, use_store=not args.api,
+                        email_budget=email_budget)
+    elif args.from_date:
+        if args.date or args.output:
+            parser.error("--from/--to cannot be combined with --date or --output")
+        to_date = args.to_date or datetime.now(PACIFIC).strftime("%Y-%m-%d")
+        try:
+            if not date_range(args.from_date, to_date):
+                parser.error("--from must not be after --to")
+        except ValueError:
+            parser.error("--from and --to must be dates (YYYY-MM-DD)")
+        results = generate_range(args.from_date, to_date, args.variants, args.output_dir, jobs=args.jobs,
+                                 force=args.force, use_store=not args.api, sync=not args.no_sync,
+                                 email_budget=email_budget)
+        outputs = {f"{date}:{variant}": path for date, paths in results.items() for variant, path in paths.items()}
+    else:
+        outputs = generate(args.date, args.variants, args.output, use_store=not args.api, sync=not args.no_sync,
+                           email_budget=email_budget)
+
+    if args.open:
+        for output_file in outputs.values():
+            if output_file.suffix == ".html":
+                webbrowser.open(f"file://{output_file.absolute()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+"""
+Email Weight Post-Processor
+
+Shrinks digest/newsletter HTML for email delivery:
+
+  - inlines the <style> rules into style attributes (rules that can't be
+    inlined, like :hover and @media, stay in a minified <style> block)
+  - strips WordPress classes and attributes that email clients don't use
+  - rewrites WordPress images to size-bounded Photon CDN variants (?w=)
+    with a 2x srcset
+  - collapses whitespace and drops comments
+
+It then reports the byte size of each section and warns when the message is
+over budget (Gmail clips messages larger than about 102 KB). With --trim,
+the largest articles are cut back to their first paragraph until it fits.
+
+Usage:
+    python3 email_weight.py digest_2026-01-14.html             # Optimize in place
+    python3 email_weight.py digest_2026-01-14.html -o out.html # Write elsewhere
+    python3 email_weight.py digest_2026-01-14.html --budget 90 --trim
+
+daily.py runs this for its HTML outputs when given --optimize.
+"""
+
+import re
+import argparse
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from bs4 import BeautifulSoup, Comment, Doctype, NavigableString
+
+# Gmail clips at ~102 KB; leave some headroom for the MIME envelope
+DEFAULT_BUDGET_KB = 100
+
+# Widest image the templates display (body max-width)
+IMAGE_WIDTH = 800
+
+# Hosts whose images can be served through the Photon CDN
+PHOTON_HOSTS = re.compile(r'^i[0-3]\.wp\.com$')
+WORDPRESS_HOSTS = {"boingboing.net", "www.boingboing.net"}
+
+# Attributes worth keeping in email; everything else is dropped
+ALLOWED_ATTRIBUTES = {
+    "a": {"href", "title"},
+    "img": {"src", "srcset", "alt", "width", "height"},
+    "td": {"colspan", "rowspan"},
+    "th": {"colspan", "rowspan"},
+    "ol": {"start"},
+    "html": {"lang"},
+    "meta": {"charset", "name", "content"},
+}
+GLOBAL_ATTRIBUTES = {"style"}
+
+# Whitespace-only text next to these elements (or at the edge of them) is insignificant
+BLOCK_TAGS = {
+    "html", "head", "body", "meta", "title", "style", "div", "article", "section",
+    "figure", "figcaption", "blockquote", "ul", "ol", "li", "table", "thead", "tbody",
+    "tr", "td", "th", "p", "h1", "h2", "h3", "h4", "h5", "h6",
+}
+
+# Content blocks that count as "the excerpt" when trimming an article
+TEXT_BLOCKS = {"p", "blockquote", "ul", "ol"}
+KEEP_WHEN_TRIMMING = {"figure", "a", "img", "h1", "h2", "h3", "h4", "h5", "h6"}
+# Wrappers (WordPress blocks) that trimming looks inside for the first text block
+CONTAINER_TAGS = {"div", "section"}
+
+
+def parse_css(css):
+    """Split a stylesheet into (inlinable_rules, leftover_css).
+
+    inlinable_rules is a list of (selector, [(property, value), ...]) in
+    source order. Selectors with pseudo-classes and @-rules can't be
+    expressed as style attributes, so they are returned as leftover CSS.
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    rules, leftover = [], []
+    pos = 0
+
+    while True:
+        brace = css.find("{", pos)
+        if brace == -1:
+            break
+        prelude = css[pos:brace].strip()
+
+        # Find the matching closing brace (at-rules can nest)
+        depth, end = 1, brace + 1
+        while end < len(css) and depth:
+            depth += {"{": 1, "}": -1}.get(css[end], 0)
+            end += 1
+        block = css[brace + 1:end - 1]
+        pos = end
+
+        if prelude.startswith("@") or ":" in prelude:
+            leftover.append(f"{prelude}{{{minify_css(block)}}}")
+            continue
+
+        declarations = []
+        for declaration in block.split(";"):
+            if ":" in declaration:
+                prop, value = declaration.split(":", 1)
+                declarations.append((prop.strip().lower(), " ".join(value.split())))
+
+        for selector in prelude.split(","):
+            rules.append((selector.strip(), declarations))
+
+    return rules, "".join(leftover)
+
+
+def minify_css(css):
+    """Collapse whitespace in a CSS fragment."""
+    css = " ".join(css.split())
+    return re.sub(r'\s*([{};:,])\s*', r'\1', css).rstrip(";")
+
+
+def specificity(selector):
+    """Approximate CSS specificity as (ids, classes/attributes, elements)."""
+    ids = selector.count("#")
+    classes = selector.count(".") + selector.count("[")
+    elements = len(re.findall(r'(?:^|[\s>+~])[a-zA-Z][\w-]*', selector))
+    return ids, classes, elements
+
+
+def parse_style(style):
+    """Parse a style attribute into an ordered {property: value} dict."""
+    declarations = {}
+    for declaration in (style or "").split(";"):
+        if ":" in declaration:
+            prop, value = declaration.split(":", 1)
+            declarations[prop.strip().lower()] = " ".join(value.split())
+    return declarations
+
+
+def inline_css(soup):
+    """Move <style> rules onto matching elements' style attributes.
+
+    Returns the class names still referenced by the leftover <style> block,
+    which strip_attributes() must keep.
+    """
+    rules, leftover = [], []
+    for style in soup.find_all("style"):
+        style_rules, style_leftover = parse_css(style.get_text())
+        rules.extend(style_rules)
+        if style_leftover:
+            leftover.append(style_leftover)
+        style.decompose()
+
+    computed = {}
+    ordered = sorted(enumerate(rules), key=lambda item: (specificity(item[1][0]), item[0]))
+    for _, (selector, declarations) in ordered:
+        for element in soup.select(selector):
+            styles = computed.setdefault(id(element), (element, {}))[1]
+            styles.update(declarations)
+
+    for element, styles in computed.values():
+        # Existing inline styles win over stylesheet rules
+        styles.update(parse_style(element.get("style")))
+        element["style"] = ";".join(f"{prop}:{value}" for prop, value in styles.items())
+
+    leftover = "".join(leftover)
+    if leftover and soup.head:
+        style = soup.new_tag("style")
+        style.string = leftover
+        soup.head.append(style)
+
+    return set(re.findall(r'\.([\w-]+)', re.sub(r'\{[^{}]*\}', '', leftover)))
+
+
+def photon_url(src, width):
+    """Return a Photon CDN URL for a WordPress image at the given width, or None."""
+    parts = urlsplit(src)
+    if PHOTON_HOSTS.match(parts.netloc):
+        base = f"https://{parts.netloc}{parts.path}"
+    elif parts.netloc in WORDPRESS_HOSTS and "/wp-content/uploads/" in parts.path:
+        base = f"https://i0.wp.com/{parts.netloc}{parts.path}"
+    else:
+        return None
+    return f"{base}?w={width}&ssl=1"
+
+
+def rewrite_images(soup, width=IMAGE_WIDTH):
+    """Point WordPress images at size-bounded Photon variants with a 2x srcset."""
+    for img in soup.find_all("img"):
+        src = img.get("src", "")
+        url_1x = photon_url(src, width)
+        if not url_1x:
+            continue
+        img["src"] = url_1x
+        img["srcset"] = f"{url_1x} 1x, {photon_url(src, width * 2)} 2x"
+
+
+def strip_attributes(soup, keep_classes=()):
+    """Drop classes, ids, data-* and other attributes email clients ignore.
+
+    Class names in keep_classes (used by rules that couldn't be inlined) survive.
+    """
+    for element in soup.find_all(True):
+        allowed = ALLOWED_ATTRIBUTES.get(element.name, set()) | GLOBAL_ATTRIBUTES
+        classes = [name for name in element.get("class", []) if name in keep_classes]
+        element.attrs = {key: value for key, value in element.attrs.items() if key in allowed}
+        if classes:
+            element["class"] = classes
+
+
+def is_block_boundary(text):
+    """True if a whitespace-only string only separates block-level elements."""
+    def neighbour_is_block(attr):
+        node = getattr(text, attr)
+        # Skip over other whitespace-only strings
+        while isinstance(node, NavigableString) and not isinstance(node, Doctype) and not node.strip():
+            node = getattr(node, attr)
+        return node is None or isinstance(node, Doctype) or getattr(node, "name", None) in BLOCK_TAGS
+
+    return neighbour_is_block("previous_sibling") and neighbour_is_block("next_sibling")
+
+
+def collapse_whitespace(soup):
+    """Remove comments and insignificant whitespace (outside <pre>)."""
+    for comment in soup.find_all(string=lambda s: isinstance(s, Comment)):
+        comment.extract()
+
+    for text in soup.find_all(string=True):
+        if not isinstance(text, NavigableString) or text.find_parent("pre"):
+            continue
+        if not text.strip() and is_block_boundary(text):
+            text.extract()
+        elif re.search(r'\s{2,}|[\n\t]', text):
+            text.replace_with(re.sub(r'\s+', ' ', text))
+
+
+def byte_size(element):
+    return len(str(element).encode("utf-8"))
+
+
+def section_sizes(soup):
+    """Return [(label, bytes)] for the head, header and each article."""
+    sections = []
+    if soup.head:
+        sections.append(("<head> and styles", byte_size(soup.head)))
+
+    body = soup.body or soup
+    for child in body.find_all(recursive=False):
+        if child.name == "article":
+            heading = child.find("h2")
+            label = heading.get_text(strip=True) if heading else "(untitled article)"
+        else:
+            label = f"<{child.name}>"
+        sections.append((label, byte_size(child)))
+
+    return sections
+
+
+def content_wrapper(article):
+    """The element holding an article's content: the digest's .article-content div, or the article itself.
+
+    Must be called before strip_attributes(), which removes the class.
+    """
+    return article.find("div", class_="article-content", recursive=False) or article
+
+
+def trim_blocks(container, kept_text=False):
+    """Remove everything in container after the first text block, except images and headings.
+
+    Block wrappers ahead of the first text block are trimmed from the inside,
+    so a paragraph inside a wp-block div can be the one kept. Returns
+    (removed anything, kept a text block).
+    """
+    removed = False
+    for child in list(container.find_all(recursive=False)):
+        if child.name in TEXT_BLOCKS:
+            if kept_text:
+                child.decompose()
+                removed = True
+            kept_text = True
+        elif child.name in KEEP_WHEN_TRIMMING:
+            continue
+        elif not kept_text and child.name in CONTAINER_TAGS and child.find(list(TEXT_BLOCKS)):
+            child_removed, kept_text = trim_blocks(child, kept_text)
+            removed = removed or child_removed
+        else:
+            child.decompose()
+            removed = True
+    return removed, kept_text
+
+
+def trim_article(article, content=None):
+    """Cut an article's content back to its image and first text block.
+
+    content is the article's content_wrapper(), found before attributes were
+    stripped. Returns True if anything was removed.
+    """
+    return trim_blocks(content or content_wrapper(article))[0]
+
+
+def optimize(html, budget_kb=DEFAULT_BUDGET_KB, trim=False, image_width=IMAGE_WIDTH):
+    """Optimize an HTML email. Returns (html, report).
+
+    report is a dict with the per-section sizes, total bytes, budget bytes,
+    the titles of any trimmed articles and whether the result is over budget.
+    """
+    original_bytes = len(html.encode("utf-8"))
+    soup = BeautifulSoup(html, "html.parser")
+
+    rewrite_images(soup, image_width)
+    # Found while the content wrappers still have their class
+    contents = [(article, content_wrapper(article)) for article in soup.find_all("article")]
+    keep_classes = inline_css(soup)
+    strip_attributes(soup, keep_classes)
+    collapse_whitespace(soup)
+
+    budget = budget_kb * 1024
+    trimmed = []
+
+    if trim and byte_size(soup) > budget:
+        for article, content in sorted(contents, key=lambda pair: byte_size(pair[0]), reverse=True):
+            if byte_size(soup) <= budget:
+                break
+            if trim_article(article, content):
+                heading = article.find("h2")
+                trimmed.append(heading.get_text(strip=True) if heading else "(untitled article)")
+
+    output = str(soup).strip()
+    total = len(output.encode("utf-8"))
+
+    report = {
+        "original_bytes": original_bytes,
+        "total_bytes": total,
+        "budget_bytes": budget,
+        "over_budget": total > budget,
+        "sections": section_sizes(soup),
+        "trimmed": trimmed,
+    }
+    return output, report
+
+
+def print_report(report, name="HTML"):
+    """Print the per-section size report and any budget warning."""
+    print(f"{name}: {report['original_bytes'] / 1024:,.1f} KB -> {report['total_bytes'] / 1024:,.1f} KB "
+          f"(budget {report['budget_bytes'] / 1024:,.0f} KB)")
+    for label, size in report["sections"]:
+        if len(label) > 50:
+            label = label[:47] + "..."
+        print(f"  {size / 1024:>7,.1f} KB  {label}")
+
+    if report["trimmed"]:
+        print(f"  Trimmed {len(report['trimmed'])} articles to their first paragraph to fit the budget")
+    if report["over_budget"]:
+        print(f"Warning: {name} is {report['total_bytes'] / 1024:,.1f} KB, over the "
+              f"{report['budget_bytes'] / 1024:,.0f} KB budget. Gmail may clip it"
+              + ("" if report["trimmed"] else " (use --trim to cut excerpts)") + ".")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inline CSS, minify and size-check HTML email output")
+    parser.add_argument("input", type=Path, help="HTML file to optimize")
+    parser.add_argument("--output", "-o", type=Path, help="Output file. Default: overwrite the input")
+    parser.add_argument("--budget", type=int, default=DEFAULT_BUDGET_KB,
+                        help=f"Size budget in KB. Default: {DEFAULT_BUDGET_KB}")
+    parser.add_argument("--trim", action="store_true", help="Trim excerpts of the largest articles to fit the budget")
+    args = parser.parse_args()
+
+    html, report = optimize(args.input.read_text(), budget_kb=args.budget, trim=args.trim)
+    output_file = args.output or args.input
+    output_file.write_text(html)
+
+    print_report(report, args.input.name)
+    print(f"Saved to: {output_file}")
+
+
+if __name__ == "__main__":
+    main()
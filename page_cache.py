@@ -0,0 +1,169 @@
+"""
+Disk cache of fetched source pages, shared by postgen.py and the Node server.
+
+Each page is stored under the SHA-256 of its normalized URL (see
+normalize_url) as two files in CACHE_DIR:
+
+  <key>.json     url, status, fetched time, validators (etag, last_modified),
+                 content_type, encoding, size, and the extracted title/text
+  <key>.html.gz  the response body, gzip-compressed
+
+Both are plain JSON and gzip so server/services/scraper.js can read them
+with Node built-ins. A cached page is revalidated with If-None-Match /
+If-Modified-Since; on a 304 the stored extraction is used without parsing
+the page again. The cache is capped at MAX_BYTES of compressed bodies, and
+the least recently used pages (by the .json file's mtime) are evicted first.
+"""
+import os
+import gzip
+import json
+import time
+import hashlib
+import tempfile
+from pathlib import Path
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode, quote, quote_plus
+
+SCRIPT_DIR = Path(__file__).parent
+CACHE_DIR = Path(os.environ.get('BB_PAGE_CACHE', SCRIPT_DIR / '.page_cache'))
+
+MAX_BYTES = 100 * 1024 * 1024
+
+# Characters left alone in paths, as the WHATWG URL parser (and so Node) does
+PATH_SAFE = "!$%&'()*+,-./:;=@[]^_|~"
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {'fbclid', 'gclid', 'mc_cid', 'mc_eid', 'cmpid', 'smid', 'smtyp', 'ref', 'ref_src', 'taid'}
+
+
+def normalize_url(url):
+    """The cache identity of a URL.
+
+    Lower-case scheme and host, no default port, no fragment, no tracking
+    parameters (utm_* and TRACKING_PARAMS), remaining parameters sorted, and
+    an empty path as '/'. Paths and parameters are percent-encoded the way
+    Node's URL and URLSearchParams do it, since scraper.js's normalizeUrl()
+    has to produce the same string.
+    """
+    parts = urlsplit(url.strip())
+    scheme, host = parts.scheme.lower(), (parts.hostname or '').lower()
+    port = parts.port
+    if port and (scheme, port) not in (('http', 80), ('https', 443)):
+        host = f'{host}:{port}'
+    query = sorted(
+        (name, value) for name, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not name.lower().startswith('utm_') and name.lower() not in TRACKING_PARAMS
+    )
+    query = urlencode(query, quote_via=lambda value, *_: quote_plus(value, safe='*').replace('~', '%7E'))
+    return urlunsplit((scheme, host, quote(parts.path, safe=PATH_SAFE) or '/', query, ''))
+
+
+def cache_key(url):
+    return hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+
+
+def _paths(key, cache_dir=None):
+    cache_dir = cache_dir or CACHE_DIR
+    return cache_dir / f'{key}.json', cache_dir / f'{key}.html.gz'
+
+
+def _write_atomic(path, data):
+    """Write bytes to path via a temporary file, so readers never see half a file."""
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix='.', suffix='.tmp', delete=False) as f:
+        f.write(data)
+    os.replace(f.name, path)
+
+
+def get(url, cache_dir=None):
+    """Return the cached entry (a dict) for url, or None."""
+    meta_path, body_path = _paths(cache_key(url), cache_dir)
+    try:
+        with open(meta_path) as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return entry if body_path.exists() else None
+
+
+def validators(entry):
+    """Conditional request headers for a cached entry."""
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+
+def body(entry, cache_dir=None):
+    """The cached page as text."""
+    _, body_path = _paths(entry['key'], cache_dir)
+    return gzip.decompress(body_path.read_bytes()).decode(entry.get('encoding') or 'utf-8', errors='replace')
+
+
+def touch(entry, cache_dir=None):
+    """Mark an entry as just used (for LRU eviction)."""
+    meta_path, _ = _paths(entry['key'], cache_dir)
+    try:
+        os.utime(meta_path)
+    except OSError:
+        pass
+
+
+def update(entry, cache_dir=None, **fields):
+    """Rewrite an entry's metadata with some fields changed (e.g. a fresh extraction)."""
+    entry.update(fields)
+    meta_path, _ = _paths(entry['key'], cache_dir)
+    _write_atomic(meta_path, json.dumps(entry).encode('utf-8'))
+    return entry
+
+
+def put(url, response, title, text, extractor, cache_dir=None, max_bytes=MAX_BYTES):
+    """Store a 200 response (a requests.Response) with its extracted title and text."""
+    cache_dir = cache_dir or CACHE_DIR
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    key = cache_key(url)
+    meta_path, body_path = _paths(key, cache_dir)
+
+    compressed = gzip.compress(response.content)
+    _write_atomic(body_path, compressed)
+
+    entry = {
+        'key': key,
+        'url': normalize_url(url),
+        'status': response.status_code,
+        'fetched': time.time(),
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'content_type': response.headers.get('Content-Type'),
+        'encoding': response.encoding or 'utf-8',
+        'size': len(compressed),
+        'extractor': extractor,
+        'title': title,
+        'text': text,
+    }
+    update(entry, cache_dir)
+    evict(cache_dir, max_bytes)
+    return entry
+
+
+def evict(cache_dir=None, max_bytes=MAX_BYTES):
+    """Delete least recently used pages until the bodies fit in max_bytes. Returns how many."""
+    cache_dir = cache_dir or CACHE_DIR
+    entries = []
+    for meta_path in cache_dir.glob('*.json'):
+        body_path = meta_path.with_name(meta_path.stem + '.html.gz')
+        try:
+            entries.append((meta_path.stat().st_mtime, meta_path, body_path, body_path.stat().st_size))
+        except OSError:
+            continue
+
+    total = sum(entry[3] for entry in entries)
+    evicted = 0
+    for _, meta_path, body_path, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        for path in (meta_path, body_path):
+            path.unlink(missing_ok=True)
+        total -= size
+        evicted += 1
+    return evicted
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Local Post Store
+
+Keeps a SQLite copy of published Boing Boing posts (rendered content, embedded
+author and featured media) so digests, newsletters and reports can be answered
+with indexed date-range queries instead of re-downloading from WordPress.
+
+The store is kept current by an incremental sync on `modified_after`, starting
+from the newest `modified_gmt` already stored. Older date ranges are backfilled
+once, the first time something asks for them.
+
+WordPress doesn't touch `modified_gmt` when a scheduled post goes live, and a
+trashed or unpublished post simply stops being returned, so the modified sync
+alone misses both. Each sync therefore also re-fetches a short recent tail by
+publish date (REFRESH_TAIL before the previous sync, up to now) and drops
+stored posts in it that are no longer published.
+
+A window that ended before the last sync is answered from the store without
+asking WordPress anything.
+
+Usage:
+    python3 post_store.py sync                      # Fetch posts modified since the last sync
+    python3 post_store.py sync --since 2025-11-01   # Backfill from a date, then sync
+    python3 post_store.py info                      # Show what the store covers
+
+Environment variables:
+    WP_USER          Your WordPress username
+    WP_APP_PASSWORD  WordPress application password
+    BB_POST_STORE    Store location. Default: posts.db next to this script
+"""
+
+import os
+import json
+import zlib
+import sqlite3
+import argparse
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytz
+
+from daily import SCRIPT_DIR, PACIFIC, get_auth_headers, fetch_post_pages, set_author_names
+
+STORE_FILE = Path(os.environ.get("BB_POST_STORE", SCRIPT_DIR / "posts.db"))
+
+# WordPress GMT timestamps, e.g. 2026-01-14T19:30:00 (sortable as text)
+GMT_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+# How far before the previous sync the publish-date refresh reaches back, to
+# catch scheduled posts that went live late and posts unpublished since
+REFRESH_TAIL = timedelta(hours=48)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS posts (
+    id INTEGER PRIMARY KEY,
+    date_gmt TEXT NOT NULL,
+    modified_gmt TEXT NOT NULL,
+    author_name TEXT NOT NULL,
+    title TEXT NOT NULL,
+    link TEXT NOT NULL,
+    data BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS posts_date ON posts(date_gmt);
+CREATE INDEX IF NOT EXISTS posts_author_date ON posts(author_name, date_gmt);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+@contextmanager
+def open_store(path=None, read_only=False):
+    """Open (and create if needed) the post store.
+
+    A read-only connection never takes a write lock, so several threads can
+    query the store while nothing is syncing it.
+    """
+    if read_only:
+        conn = sqlite3.connect(f"file:{path or STORE_FILE}?mode=ro", uri=True)
+    else:
+        conn = sqlite3.connect(path or STORE_FILE)
+        conn.executescript(SCHEMA)
+    try:
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def get_meta(conn, key):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def set_meta(conn, key, value):
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+
+def to_gmt(dt):
+    """Format an aware datetime as a WordPress GMT timestamp."""
+    return dt.astimezone(pytz.UTC).strftime(GMT_FORMAT)
+
+
+def from_gmt(value):
+    """Parse a WordPress GMT timestamp into an aware datetime."""
+    return pytz.UTC.localize(datetime.strptime(value, GMT_FORMAT))
+
+
+def save_posts(conn, posts):
+    """Insert or update posts (with _author_name already set)."""
+    conn.executemany(
+        "INSERT OR REPLACE INTO posts (id, date_gmt, modified_gmt, author_name, title, link, data) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [
+            (
+                post["id"],
+                post["date_gmt"],
+                post["modified_gmt"],
+                post["_author_name"],
+                post.get("title", {}).get("rendered", ""),
+                post.get("link", ""),
+                zlib.compress(json.dumps(post).encode()),
+            )
+            for post in posts
+        ]
+    )
+
+
+def backfill(conn, start_utc, end_utc=None, headers=None):
+    """Download every post published in [start_utc, end_utc) into the store."""
+    headers = headers or get_auth_headers()
+    params = {"after": start_utc.strftime(GMT_FORMAT), "orderby": "date", "order": "asc"}
+    if end_utc:
+        params["before"] = end_utc.strftime(GMT_FORMAT)
+
+    posts = fetch_post_pages(params, headers)
+    set_author_names(posts, headers)
+    save_posts(conn, posts)
+    return len(posts)
+
+
+def refresh_window(conn, start_utc, end_utc=None, headers=None):
+    """Re-fetch posts published in [start_utc, end_utc) and drop stored ones no longer published.
+
+    Returns (posts fetched, posts deleted). Nothing is written until every
+    page has been fetched.
+    """
+    headers = headers or get_auth_headers()
+    # after is exclusive; step back a second so a post published exactly at start_utc is returned
+    params = {
+        "after": (start_utc - timedelta(seconds=1)).strftime(GMT_FORMAT),
+        "orderby": "date",
+        "order": "asc",
+    }
+    if end_utc:
+        params["before"] = end_utc.strftime(GMT_FORMAT)
+
+    posts = fetch_post_pages(params, headers)
+    set_author_names(posts, headers)
+    save_posts(conn, posts)
+
+    published = {post["id"] for post in posts}
+    query = "SELECT id FROM posts WHERE date_gmt >= ?"
+    args = [to_gmt(start_utc)]
+    if end_utc:
+        query += " AND date_gmt < ?"
+        args.append(to_gmt(end_utc))
+    gone = [(post_id,) for (post_id,) in conn.execute(query, args) if post_id not in published]
+    conn.executemany("DELETE FROM posts WHERE id = ?", gone)
+    return len(posts), len(gone)
+
+
+def sync(conn, since=None, until=None, headers=None):
+    """Bring the store up to date for the window [since, until).
+
+    If `since` is older than anything the store covers, that range is
+    backfilled first. A window that ended before the last sync is then
+    complete, and nothing else is fetched. Otherwise every post modified
+    after the newest stored `modified_gmt` is fetched, which picks up new
+    posts and edits alike, and the recent tail is re-fetched by publish date
+    (see refresh_window) for scheduled posts that went live and posts that
+    were trashed or unpublished.
+
+    Each step commits before the next request, so the store isn't locked
+    while waiting on WordPress.
+    """
+    started = datetime.now(pytz.UTC)
+    covered_from = get_meta(conn, "covered_from")
+    synced_at = get_meta(conn, "synced_at")
+    if since is None and covered_from is None:
+        since = started - timedelta(days=1)
+
+    count = 0
+    if since is not None and (covered_from is None or to_gmt(since) < covered_from):
+        headers = headers or get_auth_headers()
+        end_utc = from_gmt(covered_from) if covered_from else None
+        count = backfill(conn, since, end_utc, headers)
+        set_meta(conn, "covered_from", to_gmt(since))
+        if covered_from is None:
+            # The backfill ran up to now, so there is nothing newer to sync
+            set_meta(conn, "synced_at", to_gmt(started))
+        conn.commit()
+        print(f"Backfilled {count} posts from {since.astimezone(PACIFIC).strftime('%Y-%m-%d')}")
+        if covered_from is None:
+            return count
+
+    if until is not None and synced_at and to_gmt(until) <= synced_at:
+        return count
+
+    watermark = conn.execute("SELECT MAX(modified_gmt) FROM posts").fetchone()[0]
+    if watermark:
+        # modified_after is exclusive; step back a second so same-second edits aren't missed
+        modified_after = datetime.strptime(watermark, GMT_FORMAT) - timedelta(seconds=1)
+
+        headers = headers or get_auth_headers()
+        posts = fetch_post_pages({
+            "modified_after": modified_after.strftime(GMT_FORMAT) + "+00:00",
+            "orderby": "modified",
+            "order": "asc",
+        }, headers)
+        set_author_names(posts, headers)
+        save_posts(conn, posts)
+        conn.commit()
+        count += len(posts)
+        if posts:
+            print(f"Synced {len(posts)} new or updated posts")
+
+    tail_start = (from_gmt(synced_at) if synced_at else started) - REFRESH_TAIL
+    if covered_from:
+        tail_start = max(tail_start, from_gmt(covered_from))
+    _, deleted = refresh_window(conn, tail_start, None, headers)
+    set_meta(conn, "synced_at", to_gmt(started))
+    conn.commit()
+    if deleted:
+        print(f"Removed {deleted} posts that are no longer published")
+    return count + deleted
+
+
+def posts_between(conn, start_utc, end_utc):
+    """Return stored posts published in [start_utc, end_utc), newest first.
+
+    Posts come back in the same shape as the WordPress API returns them, with
+    `_author_name` set, so they can be passed straight to the renderers.
+    """
+    rows = conn.execute(
+        "SELECT data, author_name FROM posts WHERE date_gmt >= ? AND date_gmt < ? ORDER BY date_gmt DESC",
+        (to_gmt(start_utc), to_gmt(end_utc))
+    )
+    posts = []
+    for data, author_name in rows:
+        post = json.loads(zlib.decompress(data))
+        post["_author_name"] = author_name
+        posts.append(post)
+    return posts
+
+
+def post_summaries_between(conn, start_utc, end_utc):
+    """Return (id, author_name, date_gmt, title) rows without decoding post bodies."""
+    return conn.execute(
+        "SELECT id, author_name, date_gmt, title FROM posts WHERE date_gmt >= ? AND date_gmt < ? "
+        "ORDER BY date_gmt",
+        (to_gmt(start_utc), to_gmt(end_utc))
+    ).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain the local store of published Boing Boing posts")
+    parser.add_argument("command", choices=["sync", "info"], help="sync: fetch new and updated posts; info: show coverage")
+    parser.add_argument("--since", help="Backfill posts published since this date (YYYY-MM-DD, Pacific)")
+    args = parser.parse_args()
+
+    since = None
+    if args.since:
+        since = PACIFIC.localize(datetime.strptime(args.since, "%Y-%m-%d")).astimezone(pytz.UTC)
+
+    with open_store() as conn:
+        if args.command == "sync":
+            sync(conn, since=since)
+
+        count, first, last = conn.execute(
+            "SELECT COUNT(*), MIN(date_gmt), MAX(date_gmt) FROM posts"
+        ).fetchone()
+        print(f"Store: {STORE_FILE}")
+        print(f"  Posts: {count}")
+        if count:
+            print(f"  Published: {first} to {last} (GMT)")
+            print(f"  Covered from: {get_meta(conn, 'covered_from')}")
+
+
+if __name__ == "__main__":
+    main()
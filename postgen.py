@@ -0,0 +1,375 @@
+"""
+Post generation shared by the memeorandum and writeposts scripts.
+
+Every article is fetched at once (at most PER_HOST requests to any one site),
+and each article goes to Claude as soon as its fetch finishes, with up to
+--jobs generations in flight. Finished posts print in input order: a post is
+held back only until the ones before it are done. A per-URL timing and token
+summary follows the last post.
+
+Only the article's own text goes into the prompt (article_text.py finds it
+and fits it to a token budget), not the whole page. Fetched pages and their
+extracted text are cached and revalidated by page_cache.py. A story covered
+by several outlets (see river.py) is one job: all of its sources are fetched
+and go into a single prompt.
+
+With jsonl=True, generate_posts() instead writes each post to stdout as a
+JSON record (see post_record) the moment it's done, in the order they
+finish, and the summary goes to stderr, so the scripts can feed a pipeline.
+"""
+import os
+import re
+import sys
+import json
+import time
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlparse
+
+import requests
+
+import article_text
+import page_cache
+
+HEADERS = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'}
+MODEL = 'claude-opus-4-5-20251101'
+MAX_TOKENS = 1500
+
+FETCH_TIMEOUT = 10
+
+# Concurrent requests to one site, so a batch of links from one paper isn't a burst
+PER_HOST = 2
+# Generations in flight unless --jobs says otherwise
+DEFAULT_JOBS = 4
+# Outlets of one story fetched and put in its prompt
+MAX_SOURCES = 5
+
+COMMON_SOURCES = {
+    'nytimes': 'the New York Times',
+    'washingtonpost': 'the Washington Post',
+    'cnn': 'CNN',
+    'bbc': 'BBC',
+    'theguardian': 'the Guardian',
+    'reuters': 'Reuters',
+    'apnews': 'the Associated Press',
+    'politico': 'Politico',
+    'theatlantic': 'the Atlantic',
+    'npr': 'NPR',
+    'nbcnews': 'NBC News',
+    'cbsnews': 'CBS News',
+    'abcnews': 'ABC News',
+    'axios': 'Axios',
+    'thehill': 'The Hill',
+    'huffpost': 'HuffPost',
+    'vox': 'Vox',
+    'slate': 'Slate',
+    'salon': 'Salon',
+    'motherjones': 'Mother Jones',
+    'thedailybeast': 'The Daily Beast',
+    'rollingstone': 'Rolling Stone',
+    'vanityfair': 'Vanity Fair',
+    'newyorker': 'The New Yorker',
+    'wired': 'Wired',
+    'arstechnica': 'Ars Technica',
+    'theverge': 'The Verge',
+    'techcrunch': 'TechCrunch'
+}
+
+# A numbered line of the HEADLINES: block
+HEADLINE_LINE = re.compile(r'^\s*\d+[.)]\s*(.+?)\s*$', re.MULTILINE)
+
+PROMPT = """Based on this article, write a ~250 word blog post suitable for Boingboing.net. The post should:
+
+1. Mention the source name naturally somewhere in the text (e.g., "reports {source_name}" or "according to {source_name}")
+2. Do NOT include URLs or hyperlinks in the post text itself
+3. Be engaging and conversational in Boingboing's style
+4. Be approximately 250 words
+5. Focus on what's interesting or notable about the story
+
+Article Title: {title}
+Article Content: {text}
+Source Name: {source_name}
+
+After the post, provide 5 different headline options in sentence case (not title case). Each headline should be engaging and Boingboing-appropriate.
+
+Format your response EXACTLY as:
+POST:
+[the 250-word post here - no URLs in the text]
+
+HEADLINES:
+1. [headline option 1]
+2. [headline option 2]
+3. [headline option 3]
+4. [headline option 4]
+5. [headline option 5]"""
+
+PROMPT_SOURCES = """Based on these {count} articles about the same story, write one ~250 word blog post suitable for Boingboing.net. The post should:
+
+1. Mention the source names naturally somewhere in the text (at least {source_name}, e.g., "reports {source_name}"), crediting other outlets for details only they have
+2. Do NOT include URLs or hyperlinks in the post text itself
+3. Be engaging and conversational in Boingboing's style
+4. Be approximately 250 words
+5. Focus on what's interesting or notable about the story, drawing on all the sources
+
+{articles}
+
+After the post, provide 5 different headline options in sentence case (not title case). Each headline should be engaging and Boingboing-appropriate.
+
+Format your response EXACTLY as:
+POST:
+[the 250-word post here - no URLs in the text]
+
+HEADLINES:
+1. [headline option 1]
+2. [headline option 2]
+3. [headline option 3]
+4. [headline option 4]
+5. [headline option 5]"""
+
+
+def source_name(url):
+    """Publication name for a URL: a known name, or the capitalized domain."""
+    name = urlparse(url).netloc.replace('www.', '').split('.')[0]
+    return COMMON_SOURCES.get(name.lower(), name.title())
+
+
+def get_client():
+    """An Anthropic client, or exit if ANTHROPIC_API_KEY isn't set."""
+    import anthropic
+
+    api_key = os.environ.get('ANTHROPIC_API_KEY')
+    if not api_key:
+        print("Error: ANTHROPIC_API_KEY environment variable not set", file=sys.stderr)
+        sys.exit(1)
+    return anthropic.Anthropic(api_key=api_key)
+
+
+class HostLimiter:
+    """Per-host semaphores, created on first use."""
+
+    def __init__(self, limit=PER_HOST):
+        self.limit = limit
+        self.lock = threading.Lock()
+        self.hosts = {}
+
+    def __call__(self, url):
+        host = urlparse(url).netloc.lower()
+        with self.lock:
+            if host not in self.hosts:
+                self.hosts[host] = threading.BoundedSemaphore(self.limit)
+            return self.hosts[host]
+
+
+def fetch_article(url, limiter=None):
+    """Return (page title or None, article text) for a URL.
+
+    The text is the story itself (see article_text.py), cut to fit
+    article_text.TOKEN_BUDGET. Pages are kept in page_cache.py and
+    revalidated, so an unchanged page costs a 304 and no parsing. If the site
+    can't be reached or answers with an error, a cached copy is used as is;
+    without one, requests.HTTPError is raised rather than passing the error
+    page off as the article.
+    """
+    cached = page_cache.get(url)
+    headers = {**HEADERS, **(page_cache.validators(cached) if cached else {})}
+    try:
+        with limiter(url) if limiter else nullcontext():
+            response = requests.get(url, headers=headers, timeout=FETCH_TIMEOUT)
+    except requests.RequestException:
+        if not cached:
+            raise
+        response = None
+
+    if response is not None and response.status_code not in (200, 304):
+        # An error page is never the article: fall back to the cached copy
+        if not cached:
+            raise requests.HTTPError(f"{response.status_code} {response.reason} for {url}", response=response)
+        response = None
+
+    if cached and (response is None or response.status_code == 304):
+        if cached.get('extractor') != article_text.VERSION:
+            title, text = article_text.extract(page_cache.body(cached))
+            page_cache.update(cached, title=title, text=text, extractor=article_text.VERSION)
+        page_cache.touch(cached)
+        return cached['title'], cached['text']
+
+    title, text = article_text.extract(response.text)
+    if response.status_code == 200:
+        page_cache.put(url, response, title, text, article_text.VERSION)
+    return title, text
+
+
+def source_prompt(sources):
+    """The prompt for a story covered by several outlets: the first source leads."""
+    lead = sources[0]
+    other_budget = article_text.TOKEN_BUDGET // 3
+    articles = []
+    for i, source in enumerate(sources, 1):
+        text = source['text']
+        if i > 1:
+            # The lead source gets the full budget; the others add what they add
+            text = '\n\n'.join(article_text.within_budget(text.split('\n\n'), other_budget))
+        articles.append(f"Source {i}: {source_name(source['url'])}\nArticle Title: {source['title']}\n"
+                        f"Article Content: {text}")
+    return PROMPT_SOURCES.format(
+        count=len(sources), source_name=source_name(lead['url']), articles='\n\n'.join(articles)
+    )
+
+
+def generate(client, prompt):
+    """Ask Claude for a post. Returns (response text, input tokens, output tokens)."""
+    message = client.messages.create(
+        model=MODEL,
+        max_tokens=MAX_TOKENS,
+        messages=[{"role": "user", "content": prompt}]
+    )
+    return message.content[0].text, message.usage.input_tokens, message.usage.output_tokens
+
+
+def fetch_source(source, limiter):
+    """Fill in a source's 'title' and 'text', falling back to its known title if the fetch fails.
+
+    A source that already has its text (fetched ahead of time) is left as is.
+    """
+    if 'text' in source:
+        return source
+    url = source['url']
+    try:
+        page_title, source['text'] = fetch_article(url, limiter)
+        source['title'] = source.get('title') or page_title or url
+    except Exception as e:
+        source['warning'] = f"Could not fetch {url}: {e}"
+        source['title'] = source.get('title') or url
+        source['text'] = source['title'] if source['title'] != url else ''
+    return source
+
+
+def run_job(job, client, limiter, generations):
+    """Fetch and generate one post, filling in job's result and timing fields.
+
+    job is a dict with 'url' and optionally 'title' (used when the page
+    can't be fetched), or, for a story covered by several outlets, 'sources':
+    a list of such dicts, the lead source first. generations is the semaphore
+    capping calls to Claude.
+    """
+    sources = job.setdefault('sources', [{'url': job['url'], 'title': job.get('title')}])
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=len(sources)) as pool:
+        list(pool.map(lambda source: fetch_source(source, limiter), sources))
+    job['title'] = sources[0]['title']
+    warnings = [source['warning'] for source in sources if source.get('warning')]
+    if warnings:
+        job['warning'] = '\n'.join(warnings)
+    job['fetch_seconds'] = time.perf_counter() - started
+
+    if len(sources) == 1:
+        prompt = PROMPT.format(title=job['title'], text=sources[0]['text'], source_name=source_name(job['url']))
+    else:
+        prompt = source_prompt(sources)
+
+    with generations:
+        started = time.perf_counter()
+        try:
+            job['post'], job['input_tokens'], job['output_tokens'] = generate(client, prompt)
+        except Exception as e:
+            job['error'] = f"Generation failed: {e}"
+        job['generate_seconds'] = time.perf_counter() - started
+    return job
+
+
+def print_post(job, number, total):
+    print(f"\n{'='*80}")
+    print(f"Post {number}/{total}")
+    print(f"{'='*80}\n")
+    if job.get('warning'):
+        print(f"Warning: {job['warning']}\n")
+    print(job.get('post') or job.get('error'))
+    print(f"\nSource: {job['url']}")
+    for source in job['sources'][1:]:
+        print(f"Also: {source['url']}")
+    print(f"\n{'='*80}\n")
+
+
+def parse_post(text):
+    """Split Claude's response into (post body, [headline options])."""
+    body, _, headlines = text.partition('HEADLINES:')
+    body = re.sub(r'^\s*POST:\s*', '', body).strip()
+    return body, HEADLINE_LINE.findall(headlines)
+
+
+def post_record(job, number):
+    """A finished job as a JSON-ready dict, one line of --jsonl output.
+
+    number is the job's place in the input (from 1), since records are
+    written in the order they finish. A failed job has an empty body and
+    an 'error'.
+    """
+    body, headlines = parse_post(job['post']) if job.get('post') else ('', [])
+    record = {
+        'number': number,
+        'url': job['url'],
+        'source': source_name(job['url']),
+        'title': job.get('title'),
+        'body': body,
+        'headlines': headlines,
+        'sources': [{'url': source['url'], 'source': source_name(source['url']), 'title': source.get('title')}
+                    for source in job['sources']],
+        'input_tokens': job.get('input_tokens', 0),
+        'output_tokens': job.get('output_tokens', 0),
+        'fetch_seconds': round(job.get('fetch_seconds', 0), 3),
+        'generate_seconds': round(job.get('generate_seconds', 0), 3),
+    }
+    for field in ('warning', 'error'):
+        if job.get(field):
+            record[field] = job[field]
+    return record
+
+
+def write_record(job, number, out=None):
+    """Write a job's record as a line of JSON, flushed so a reader gets it right away."""
+    out = out or sys.stdout
+    out.write(json.dumps(post_record(job, number), ensure_ascii=False) + '\n')
+    out.flush()
+
+
+def print_summary(jobs, elapsed, file=None):
+    """Per-URL fetch and generation times and token counts, with totals."""
+    file = file or sys.stdout
+    print(f"{'#':>3}  {'fetch':>6}  {'generate':>8}  {'in tok':>7}  {'out tok':>7}  url", file=file)
+    for i, job in enumerate(jobs, 1):
+        status = '' if job.get('post') else '  (failed)'
+        if len(job.get('sources', [])) > 1:
+            status += f"  (+{len(job['sources']) - 1} sources)"
+        print(f"{i:>3}  {job.get('fetch_seconds', 0):>5.1f}s  {job.get('generate_seconds', 0):>7.1f}s  "
+              f"{job.get('input_tokens', 0):>7,}  {job.get('output_tokens', 0):>7,}  {job['url']}{status}", file=file)
+    serial = sum(job.get('fetch_seconds', 0) + job.get('generate_seconds', 0) for job in jobs)
+    print(f"Total: {sum(job.get('input_tokens', 0) for job in jobs):,} input and "
+          f"{sum(job.get('output_tokens', 0) for job in jobs):,} output tokens; "
+          f"{elapsed:.1f}s wall clock for {serial:.1f}s of fetching and generating.", file=file)
+
+
+def generate_posts(jobs, client, max_generations=DEFAULT_JOBS, jsonl=False):
+    """Fetch and generate posts for jobs concurrently, printing them in input order.
+
+    With jsonl, each post is written to stdout as a JSON record as soon as
+    it's done, and the summary goes to stderr.
+    """
+    limiter = HostLimiter()
+    generations = threading.BoundedSemaphore(max_generations)
+    started = time.perf_counter()
+
+    # One thread per job: fetches all start at once (per-host limits permitting)
+    # and generation threads wait on the semaphore
+    with ThreadPoolExecutor(max_workers=max(len(jobs), 1)) as pool:
+        futures = [pool.submit(run_job, job, client, limiter, generations) for job in jobs]
+        if jsonl:
+            numbers = {future: number for number, future in enumerate(futures, 1)}
+            for future in as_completed(futures):
+                write_record(future.result(), numbers[future])
+        else:
+            for number, future in enumerate(futures, 1):
+                print_post(future.result(), number, len(jobs))
+
+    print_summary(jobs, time.perf_counter() - started, sys.stderr if jsonl else sys.stdout)
+    return jobs
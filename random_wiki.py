@@ -8,184 +8,186 @@ Usage:
   python3 random_wiki.py url                  # Fetch content from a Wikipedia URL
   python3 random_wiki.py --preview "Article"  # Quick 2-3 sentence summary
   python3 random_wiki.py -p "Article"         # Short form of --preview
-  python3 random_wiki.py --refresh            # Rebuild the article index
+  python3 random_wiki.py --section History "Article"  # Fetch one section ("intro" for the lead)
+  python3 random_wiki.py --refresh            # Merge new and removed articles into the index
   python3 random_wiki.py --reset              # Reshuffle and start from beginning
   python3 random_wiki.py --remaining          # Show how many unseen articles remain
+  python3 random_wiki.py --used "Article"     # Don't list an article again
+  python3 random_wiki.py --search "haunted"  # Search titles, descriptions and cached articles
+
+The index lives in ~/.random_wiki_index.db (see wiki_index.py). Listings prefetch
+summaries into ~/.wiki_cache.db, so --preview of a listed article is instant.
+Articles that match a published post or a preview in posts/ (see wiki_coverage.py)
+are listed separately at the end.
 """
-import urllib.request
 import urllib.parse
-import json
 import re
 import sys
-import os
-import random
+import textwrap
 from html import unescape
 from pathlib import Path
-from datetime import datetime
-
-INDEX_FILE = Path.home() / '.random_wiki_index.json'
-
-
-def fetch_article_summary(title):
-    """Fetch a quick 2-3 sentence summary via Wikipedia API."""
-    encoded = urllib.parse.quote(title.replace(' ', '_'))
-    api_url = f'https://en.wikipedia.org/api/rest_v1/page/summary/{encoded}'
-    req = urllib.request.Request(api_url, headers={
-        'User-Agent': 'Mozilla/5.0 (compatible; BoingBoingBot/1.0)',
-        'Accept': 'application/json'
-    })
-    try:
-        response = urllib.request.urlopen(req).read().decode('utf-8')
-        data = json.loads(response)
-        extract = data.get('extract', 'No summary available.')
-        url = data.get('content_urls', {}).get('desktop', {}).get('page', '')
-        return extract, url
-    except urllib.error.HTTPError as e:
-        return f"Error fetching summary: {e.code} {e.reason}", ""
-
-
-def fetch_article_content(title):
-    """Fetch article content via Wikipedia API (avoids 403 errors)."""
-    encoded = urllib.parse.quote(title.replace(' ', '_'))
-    api_url = f'https://en.wikipedia.org/api/rest_v1/page/html/{encoded}'
-    req = urllib.request.Request(api_url, headers={
-        'User-Agent': 'Mozilla/5.0 (compatible; BoingBoingBot/1.0)',
-        'Accept': 'text/html'
-    })
-    try:
-        html = urllib.request.urlopen(req).read().decode('utf-8')
-        # Strip HTML tags for plain text
-        text = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL)
-        text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL)
-        text = re.sub(r'<[^>]+>', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        text = unescape(text)
-        return text
-    except urllib.error.HTTPError as e:
-        return f"Error fetching article: {e.code} {e.reason}"
-
-
-def extract_title_from_url(url):
-    """Extract article title from Wikipedia URL."""
-    match = re.search(r'wikipedia\.org/wiki/([^#?]+)', url)
-    if match:
-        return urllib.parse.unquote(match.group(1).replace('_', ' '))
-    return None
-
-
-def build_index():
-    """Fetch all unusual articles and build a shuffled index."""
-    print("Building article index from Wikipedia:Unusual_articles...")
-    req = urllib.request.Request(
-        'https://en.wikipedia.org/wiki/Wikipedia:Unusual_articles',
-        headers={'User-Agent': 'Mozilla/5.0'}
-    )
-    html = urllib.request.urlopen(req).read().decode('utf-8')
 
-    # The page uses tables: <td><b><a href="/wiki/...">Title</a></b></td><td>Description</td>
-    pattern = r'<td><b><a href="/wiki/([^":#]+)"[^>]*>([^<]+)</a></b>\s*</td>\s*<td>([^<]+)'
+import wiki_coverage
+import wiki_index
+import wiki_search
+from wiki_dump import normalize_title
+from wiki_fetch import (
+    extract_title_from_url, fetch_article_content, fetch_article_summary, fetch_wikitext, latest_revision,
+    listing_summaries
+)
+
+INDEX_FILE = Path.home() / '.random_wiki_index.db'
+LEGACY_INDEX_FILE = Path.home() / '.random_wiki_index.json'
+SOURCE_PAGE = 'Wikipedia:Unusual_articles'
+
+
+def article_url(slug):
+    return f'https://en.wikipedia.org/wiki/{slug}'
+
+
+def strip_wikitext(text):
+    """Reduce a wikitext table cell to plain text."""
+    text = re.sub(r'<ref[^>]*/>|<ref[^>]*>.*?</ref>', '', text, flags=re.DOTALL)
+    text = re.sub(r'\{\{[^{}]*\}\}', '', text)
+    text = re.sub(r'\[\[(?:[^|\]]*\|)?([^\]]*)\]\]', r'\1', text)
+    text = re.sub(r'<[^>]+>', '', text)
+    return ' '.join(unescape(text.replace("'''", '').replace("''", '')).split())
+
+
+def parse_unusual_articles(wikitext, linked_articles=None):
+    """Extract article records from the Unusual articles tables.
 
+    Each row is a bold (or bold italic) link to the article followed by a
+    description cell, with cells on separate lines or joined with ||. The
+    parse API has no structured form of the description column, so rows come
+    from the wikitext; `linked_articles`, the page's existing article links
+    from the parse API (see fetch_wikitext), decides which rows are articles.
+    Without it, targets with a namespace prefix are skipped.
+    """
     articles, seen = [], set()
-    matches = re.findall(pattern, html)
-    for slug, title, desc in matches:
-        if title in seen or len(title) < 2 or len(desc.strip()) < 10:
+    for row in re.split(r'\n\|-', wikitext):
+        cells = []
+        for line in row.split('\n'):
+            if line.startswith('|') and not line.startswith(('|}', '|+')):
+                cells.extend(cell.strip() for cell in line[1:].split('||'))
+        link = re.search(r"'''(?:'')?\s*\[\[([^|\]#]+)(?:\|([^\]]+))?\]\]\s*(?:'')?'''", cells[0]) if cells else None
+        if not link or len(cells) < 2:
+            continue
+
+        target = normalize_title(link.group(1))
+        is_article = target in linked_articles if linked_articles is not None else ':' not in target
+        if not is_article:
+            continue
+        title = strip_wikitext(link.group(2) or target)
+        desc = strip_wikitext(cells[1]).rstrip('.')
+        if title in seen or len(title) < 2 or len(desc) < 10:
             continue
         seen.add(title)
-        desc = unescape(desc.strip().rstrip('.'))
         # Get first complete sentence if possible
         if '. ' in desc:
             desc = desc.split('. ')[0]
         if len(desc) > 150:
             desc = desc[:147] + '...'
         articles.append({
-            'slug': slug,
             'title': title,
+            'url': article_url(urllib.parse.quote(target.replace(' ', '_'), safe="/,()'")),
             'desc': desc
         })
+    return articles
 
-    # Shuffle the articles
-    random.shuffle(articles)
-
-    index_data = {
-        'articles': articles,
-        'position': 0,
-        'created': datetime.now().isoformat(),
-        'total': len(articles)
-    }
-
-    with open(INDEX_FILE, 'w') as f:
-        json.dump(index_data, f, indent=2)
 
+def build_index(conn):
+    """Fetch all unusual articles and build a shuffled index."""
+    print(f"Building article index from {SOURCE_PAGE}...")
+    wikitext, revision, linked_articles = fetch_wikitext(SOURCE_PAGE)
+    articles = parse_unusual_articles(wikitext, linked_articles)
+    wiki_index.build(conn, articles)
+    wiki_index.set_meta(conn, 'source_revision', revision)
+    conn.commit()
     print(f"Index created with {len(articles)} articles.")
-    return index_data
 
 
-def load_index():
-    """Load the index, creating it if it doesn't exist."""
-    if not INDEX_FILE.exists():
-        return build_index()
+def refresh_index():
+    """Merge changes to the Unusual articles page into the index, keeping progress."""
+    conn = load_index()
+    revision = latest_revision(SOURCE_PAGE)
+    if revision is not None and str(revision) == wiki_index.get_meta(conn, 'source_revision'):
+        print(f"{SOURCE_PAGE} is unchanged (revision {revision}).")
+        return
 
-    with open(INDEX_FILE, 'r') as f:
-        return json.load(f)
+    wikitext, revision, linked_articles = fetch_wikitext(SOURCE_PAGE)
+    added, removed = wiki_index.merge(conn, parse_unusual_articles(wikitext, linked_articles))
+    wiki_index.set_meta(conn, 'source_revision', revision)
+    conn.commit()
+    remaining, total = wiki_index.counts(conn)
+    print(f"Index refreshed: {added} new, {removed} removed. {remaining} unseen of {total}.")
 
 
-def save_index(index_data):
-    """Save the index with updated position."""
-    with open(INDEX_FILE, 'w') as f:
-        json.dump(index_data, f, indent=2)
+def load_index():
+    """Open the index, creating it (or importing the old JSON index) if needed."""
+    conn = wiki_index.connect(INDEX_FILE)
+    if wiki_index.is_empty(conn):
+        if not wiki_index.migrate_json(conn, LEGACY_INDEX_FILE, lambda a: article_url(a['slug'])):
+            build_index(conn)
+    return conn
 
 
 def reset_index():
-    """Reshuffle the index and reset position to 0."""
-    index_data = load_index()
-    random.shuffle(index_data['articles'])
-    index_data['position'] = 0
-    index_data['created'] = datetime.now().isoformat()
-    save_index(index_data)
-    print(f"Index reshuffled. {index_data['total']} articles ready.")
+    """Reshuffle the index and start from the beginning."""
+    conn = load_index()
+    wiki_index.reshuffle(conn)
+    _, total = wiki_index.counts(conn)
+    print(f"Index reshuffled. {total} articles ready.")
 
 
 def show_remaining():
     """Show how many unseen articles remain."""
-    index_data = load_index()
-    remaining = index_data['total'] - index_data['position']
-    print(f"{remaining} unseen articles remaining out of {index_data['total']} total.")
+    remaining, total = wiki_index.counts(load_index())
+    print(f"{remaining} unseen articles remaining out of {total} total.")
     if remaining == 0:
         print("Run with --reset to reshuffle and start over.")
 
 
+def mark_used(title):
+    """Mark an article as used so it isn't listed again."""
+    if wiki_index.mark(load_index(), title, 'used'):
+        print(f"Marked as used: {title}")
+    else:
+        print(f"Not in the index: {title}")
+
+
 def list_unusual_articles(count=20):
     """Show the next N articles from the shuffled index."""
-    index_data = load_index()
+    conn = load_index()
+    batch = wiki_index.next_batch(conn, count)
+    remaining, total = wiki_index.counts(conn)
 
-    position = index_data['position']
-    total = index_data['total']
-    articles = index_data['articles']
-
-    # Check if we've exhausted the list
-    if position >= total:
+    if not batch:
         print(f"You've seen all {total} articles!")
         print("Run with --reset to reshuffle and start over.")
         return
 
-    # Get the next batch
-    end_pos = min(position + count, total)
-    batch = articles[position:end_pos]
-
-    # Update position
-    index_data['position'] = end_pos
-    save_index(index_data)
-
-    remaining = total - end_pos
+    summaries = listing_summaries(batch)
+    covered = wiki_coverage.covered_articles(batch, summaries)
 
     print("UNUSUAL WIKIPEDIA ARTICLES")
     print(f"──────────────────────────  ({remaining} remaining)")
-    for i, article in enumerate(batch, 1):
+    for i, article in enumerate([a for a in batch if a['title'] not in covered], 1):
         print(f"{i}. {article['title']}")
         print(f"   {article['desc']}.")
-        print(f"   https://en.wikipedia.org/wiki/{article['slug']}")
+        print(f"   {article['url']}")
+        summary = summaries.get(article['title'])
+        if summary:
+            print(textwrap.fill(summary[0], width=100, initial_indent='   > ', subsequent_indent='     '))
         print()
 
+    if covered:
+        print("ALREADY COVERED")
+        for article in batch:
+            if article['title'] in covered:
+                score, post_title, link = covered[article['title']]
+                print(f"- {article['title']}  ~ \"{post_title}\" ({score:.0%})  {link}")
+
 
 if __name__ == '__main__':
     if len(sys.argv) > 1:
@@ -193,11 +195,33 @@ if __name__ == '__main__':
 
         # Handle flags
         if arg == '--refresh':
-            build_index()
+            refresh_index()
         elif arg == '--reset':
             reset_index()
         elif arg == '--remaining':
             show_remaining()
+        elif arg == '--used':
+            if len(sys.argv) > 2:
+                mark_used(' '.join(sys.argv[2:]))
+            else:
+                print("Usage: random_wiki.py --used \"Article Title\"")
+        elif arg == '--search':
+            if len(sys.argv) > 2:
+                load_index()
+                wiki_search.run_search(' '.join(sys.argv[2:]), {'random': INDEX_FILE})
+            else:
+                print("Usage: random_wiki.py --search \"words\"")
+        elif arg == '--section':
+            if len(sys.argv) > 3:
+                section, query = sys.argv[2], ' '.join(sys.argv[3:])
+                title = extract_title_from_url(query) if 'wikipedia.org/wiki/' in query else query
+                if title:
+                    print(f"=== {title}: {section} ===\n")
+                    print(fetch_article_content(title, section))
+                else:
+                    print("Could not parse Wikipedia URL")
+            else:
+                print("Usage: random_wiki.py --section \"Section\" \"Article Title\"")
         elif arg in ('--preview', '-p'):
             if len(sys.argv) > 2:
                 query = ' '.join(sys.argv[2:])
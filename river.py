@@ -0,0 +1,176 @@
+"""
+The memeorandum river, grouped into stories.
+
+The river lists the same story from several outlets. Headlines are clustered
+by MinHash similarity of their titles' content words (wiki_coverage.py's
+signatures), plus the lead of the article text when the page is already in
+page_cache.py. Candidate pairs come from shared LSH bands, so nothing is
+compared with every other headline; each candidate pair is then checked on
+the full signatures.
+
+--monitor mode remembers which headlines it has shown in a seen-URL store:
+a flat file of 64-bit hashes of normalized URLs (8 bytes a headline), loaded
+into a set and appended to on each poll.
+"""
+import os
+import hashlib
+from array import array
+from pathlib import Path
+
+import requests
+from bs4 import BeautifulSoup
+
+import wiki_coverage
+import page_cache
+import postgen
+
+RIVER_URL = "https://www.memeorandum.com/river"
+
+SEEN_FILE = Path(os.environ.get('BB_RIVER_SEEN', Path(__file__).parent / '.memeorandum_seen'))
+# Hashes kept in the seen store; the oldest go first (the river only shows recent links)
+MAX_SEEN = 100_000
+
+# Headlines (or cached leads) with at least this estimated Jaccard similarity are one story
+TITLE_THRESHOLD = 0.3
+LEAD_THRESHOLD = 0.25
+
+# Words of cached article text compared between headlines
+LEAD_WORDS = 60
+
+
+def fetch_river():
+    """Headline links from the river, in river order: [{'title', 'url'}]."""
+    r = requests.get(RIVER_URL, headers=postgen.HEADERS, timeout=postgen.FETCH_TIMEOUT)
+    soup = BeautifulSoup(r.text, "html.parser")
+
+    # Extract headlines (skip source-only links)
+    articles = []
+    seen_urls = set()
+    for a in soup.select('a[href]'):
+        href = a.get('href', '')
+        text = a.get_text(strip=True)
+
+        # Filter for actual article links (not source names, not internal links)
+        if (text and
+            len(text) > 30 and  # Headlines are longer than source names
+            href.startswith('http') and
+            'memeorandum' not in href and
+            href not in seen_urls):
+
+            seen_urls.add(href)
+            articles.append({"title": text, "url": href})
+    return articles
+
+
+def lead_text(url):
+    """The start of a page's extracted article text, if the page is cached."""
+    cached = page_cache.get(url)
+    if not cached or not cached.get('text'):
+        return ''
+    return ' '.join(cached['text'].split()[:LEAD_WORDS])
+
+
+def cluster_headlines(articles):
+    """Group articles about the same story.
+
+    Returns clusters in river order (a cluster sits where its first headline
+    does): dicts with the representative's 'title' and 'url' and every
+    article in 'sources', representative first.
+    """
+    signatures = []
+    for article in articles:
+        lead = lead_text(article['url'])
+        signatures.append((
+            wiki_coverage.signature(wiki_coverage.shingles(article['title'])),
+            wiki_coverage.signature(wiki_coverage.shingles(lead)) if lead else None,
+        ))
+
+    # Headlines that share an LSH band of either signature are candidate pairs
+    buckets = {}
+    for i, sigs in enumerate(signatures):
+        for kind, sig in enumerate(sigs):
+            if sig is not None:
+                for band in wiki_coverage.band_hashes(sig):
+                    buckets.setdefault((kind, band), []).append(i)
+
+    parent = list(range(len(articles)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    checked = set()
+    for members in buckets.values():
+        for position, i in enumerate(members):
+            for j in members[position + 1:]:
+                if (i, j) in checked or find(i) == find(j):
+                    continue
+                checked.add((i, j))
+                (title_i, lead_i), (title_j, lead_j) = signatures[i], signatures[j]
+                if (wiki_coverage.similarity(title_i, title_j) >= TITLE_THRESHOLD or
+                        (lead_i and lead_j and wiki_coverage.similarity(lead_i, lead_j) >= LEAD_THRESHOLD)):
+                    # The earlier headline stays the root, so it represents the story
+                    parent[max(find(i), find(j))] = min(find(i), find(j))
+
+    clusters = {}
+    for i, article in enumerate(articles):
+        clusters.setdefault(find(i), []).append(article)
+    return [
+        {'title': members[0]['title'], 'url': members[0]['url'], 'sources': members}
+        for _, members in sorted(clusters.items())
+    ]
+
+
+def outlets(cluster):
+    """The cluster's publication names, in order, without repeats."""
+    names = []
+    for source in cluster['sources']:
+        name = postgen.source_name(source['url'])
+        if name not in names:
+            names.append(name)
+    return names
+
+
+def url_hash(url):
+    """64-bit hash of a normalized URL, as kept in the seen store."""
+    digest = hashlib.blake2b(page_cache.normalize_url(url).encode('utf-8'), digest_size=8).digest()
+    return int.from_bytes(digest, 'little')
+
+
+def load_seen(path=SEEN_FILE):
+    """The set of seen URL hashes, trimming the file to the newest MAX_SEEN."""
+    hashes = array('Q')
+    if path.exists():
+        data = path.read_bytes()
+        hashes.frombytes(data[:len(data) - len(data) % hashes.itemsize])
+    if len(hashes) > MAX_SEEN:
+        hashes = hashes[-MAX_SEEN:]
+        path.write_bytes(hashes.tobytes())
+    return set(hashes)
+
+
+def add_seen(seen, urls, path=SEEN_FILE):
+    """Add URLs to the seen set and append their hashes to the store."""
+    new = array('Q', {url_hash(url) for url in urls} - seen)
+    seen.update(new)
+    with open(path, 'ab') as f:
+        f.write(new.tobytes())
+
+
+def prefetched_source(article, prefetched):
+    """A source dict for article, with 'title' and 'text' filled in if a background fetch got them.
+
+    prefetched maps URLs to futures of postgen.fetch_article(); an unfinished
+    fetch is waited for, a failed one leaves the source to be fetched again.
+    """
+    source = dict(article)
+    future = prefetched.get(article['url'])
+    if future:
+        try:
+            page_title, source['text'] = future.result()
+            source['title'] = source.get('title') or page_title or article['url']
+        except Exception:
+            pass
+    return source
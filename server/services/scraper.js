@@ -1,4 +1,14 @@
 import * as cheerio from 'cheerio';
+import { createHash } from 'crypto';
+import { readFileSync, utimesSync } from 'fs';
+import { gunzipSync } from 'zlib';
+import { fileURLToPath } from 'url';
+import { dirname, join } from 'path';
+
+// Page cache written by page_cache.py (see there for the layout)
+const PAGE_CACHE_DIR = process.env.BB_PAGE_CACHE ||
+  join(dirname(fileURLToPath(import.meta.url)), '..', '..', '.page_cache');
+const TRACKING_PARAMS = new Set(['fbclid', 'gclid', 'mc_cid', 'mc_eid', 'cmpid', 'smid', 'smtyp', 'ref', 'ref_src', 'taid']);
 
 const USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36';
 
@@ -51,8 +61,67 @@ export async function fetchMemeorandum() {
   return headlines.slice(0, 20);
 }
 
+// Same rules as normalize_url() in page_cache.py
+export function normalizeUrl(url) {
+  const parsed = new URL(url.trim());
+  const params = [...parsed.searchParams.entries()]
+    .filter(([name]) => !name.toLowerCase().startsWith('utm_') && !TRACKING_PARAMS.has(name.toLowerCase()))
+    .sort((a, b) => (a[0] === b[0] ? (a[1] < b[1] ? -1 : a[1] > b[1] ? 1 : 0) : a[0] < b[0] ? -1 : 1));
+  const query = new URLSearchParams(params).toString();
+  // URL already lower-cases the scheme and host and drops default ports
+  return `${parsed.protocol}//${parsed.host}${parsed.pathname || '/'}${query ? `?${query}` : ''}`;
+}
+
+// Returns { entry, body } from the page cache, or null
+export function readCachedPage(url) {
+  const key = createHash('sha256').update(normalizeUrl(url)).digest('hex');
+  try {
+    const metaPath = join(PAGE_CACHE_DIR, `${key}.json`);
+    const entry = JSON.parse(readFileSync(metaPath, 'utf8'));
+    const body = gunzipSync(readFileSync(join(PAGE_CACHE_DIR, `${key}.html.gz`))).toString('utf8');
+    const now = new Date();
+    utimesSync(metaPath, now, now);
+    return { entry, body };
+  } catch (e) {
+    return null;
+  }
+}
+
+// Fetch a page, revalidating a cached copy: a 304, an error status or a network error returns the cached one
+async function fetchPageCached(url) {
+  const cached = readCachedPage(url);
+  const headers = {
+    'User-Agent': USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+  };
+  if (cached?.entry.etag) headers['If-None-Match'] = cached.entry.etag;
+  if (cached?.entry.last_modified) headers['If-Modified-Since'] = cached.entry.last_modified;
+
+  let response;
+  try {
+    response = await fetch(url, { headers });
+  } catch (e) {
+    if (cached) return { html: cached.body, cached };
+    throw e;
+  }
+  // A 304, or an error page when there's a cached copy to fall back on
+  if (cached && (response.status === 304 || !response.ok)) {
+    return { html: cached.body, cached };
+  }
+  if (!response.ok) {
+    throw new Error(`Failed to fetch ${url}: ${response.status}`);
+  }
+  return { html: await response.text(), cached: null };
+}
+
 export async function fetchArticleContent(url) {
-  const html = await fetchPage(url);
+  const { html, cached } = await fetchPageCached(url);
+
+  // An unchanged page already has its article text extracted
+  if (cached?.entry.text) {
+    return { title: cached.entry.title || '', content: cached.entry.text };
+  }
+
   const $ = cheerio.load(html);
 
   // Remove script, style, nav, footer, aside elements
@@ -0,0 +1,27 @@
+from pathlib import Path
+
+import pytest
+
+import article_text
+from bench_article_text import overlap
+
+SAVED = Path(__file__).resolve().parent.parent / 'fixtures' / 'news-saved'
+
+
+@pytest.mark.parametrize('page', sorted(SAVED.glob('*.html')), ids=lambda page: page.stem)
+def test_saved_pages_keep_the_story(page):
+    _, text = article_text.extract(page.read_text())
+    recall, precision = overlap(text, page.with_suffix('.txt').read_text())
+    assert recall >= 0.95
+    assert precision >= 0.8
+
+
+def test_a_sidebar_layout_wrapper_is_not_furniture():
+    story = '<p>' + 'The council voted, after a long debate, to keep the goats. ' * 4 + '</p>'
+    html = (
+        '<body><div class="o-row c-fixed-sidebar-layout--140--left@lg"><div class="c-article__main">'
+        f'{story * 3}</div></div><div class="sidebar"><p>{"Popular now, elsewhere, today. " * 3}</p></div></body>'
+    )
+    _, text = article_text.extract(html)
+    assert 'keep the goats' in text
+    assert 'Popular now' not in text
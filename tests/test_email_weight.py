@@ -0,0 +1,40 @@
+from email_weight import optimize
+
+FILLER = "<p>" + "Words that pad the article out well past the budget. " * 30 + "</p>"
+
+
+def newsletter(articles):
+    return f"<html><head></head><body>{''.join(articles)}</body></html>"
+
+
+def test_trims_inside_nested_block_divs():
+    # Newsletter articles hold the post's full HTML, which usually opens with a wp-block div
+    article = (
+        '<article><h2>Big story</h2><img src="https://example.com/a.jpg"/>'
+        '<div class="wp-block-group"><div class="wp-block-group__inner-container">'
+        '<p>The lede stays.</p>' + FILLER * 10 + '</div></div>'
+        + FILLER * 10 + '</article>'
+    )
+    html = newsletter([article])
+    assert len(html) > 20 * 1024
+
+    output, report = optimize(html, budget_kb=5, trim=True)
+
+    assert report["trimmed"] == ["Big story"]
+    assert not report["over_budget"]
+    assert "The lede stays." in output
+    assert "Words that pad" not in output
+    assert "a.jpg" in output
+
+
+def test_trims_digest_article_content():
+    article = (
+        '<article><h2>Digest story</h2><div class="article-content">'
+        '<p>First paragraph.</p>' + FILLER * 20 + '</div><a href="https://example.com/">Read more</a></article>'
+    )
+    output, report = optimize(newsletter([article]), budget_kb=5, trim=True)
+
+    assert report["trimmed"] == ["Digest story"]
+    assert "First paragraph." in output
+    assert "Read more" in output
+    assert "Words that pad" not in output
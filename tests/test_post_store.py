@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytz
+
+import post_store
+
+HEADERS = {"Authorization": "Basic test"}
+
+
+class FakeWordPress:
+    """Answers fetch_post_pages() queries from a dict of published posts, recording each one."""
+
+    def __init__(self):
+        self.posts = {}
+        self.requests = []
+
+    def publish(self, post_id, date, modified=None):
+        self.posts[post_id] = {
+            "id": post_id,
+            "date_gmt": post_store.to_gmt(date),
+            "modified_gmt": post_store.to_gmt(modified or date),
+            "_author_name": "Author",
+            "title": {"rendered": f"Post {post_id}"},
+            "link": f"https://boingboing.net/{post_id}",
+        }
+
+    def __call__(self, params, headers):
+        self.requests.append(params)
+        posts = list(self.posts.values())
+        if "modified_after" in params:
+            return [p for p in posts if p["modified_gmt"] > params["modified_after"][:19]]
+        return [p for p in posts
+                if p["date_gmt"] > params["after"] and ("before" not in params or p["date_gmt"] < params["before"])]
+
+
+@pytest.fixture
+def wordpress(monkeypatch):
+    fake = FakeWordPress()
+    monkeypatch.setattr(post_store, "fetch_post_pages", fake)
+    monkeypatch.setattr(post_store, "set_author_names", lambda posts, headers: None)
+    return fake
+
+
+@pytest.fixture
+def conn(tmp_path):
+    with post_store.open_store(tmp_path / "posts.db") as conn:
+        yield conn
+
+
+def stored_ids(conn):
+    return sorted(row[0] for row in conn.execute("SELECT id FROM posts"))
+
+
+def test_covered_past_window_is_answered_locally(wordpress, conn):
+    now = datetime.now(pytz.UTC)
+    start, end = now - timedelta(days=40), now - timedelta(days=10)
+    wordpress.publish(1, now - timedelta(days=30))
+    wordpress.publish(2, now - timedelta(days=20))
+
+    post_store.sync(conn, since=start, until=end, headers=HEADERS)
+    # One backfill, not a backfill plus a refresh of the same window
+    assert len(wordpress.requests) == 1
+
+    wordpress.requests.clear()
+    post_store.sync(conn, since=start, until=end, headers=HEADERS)
+    assert wordpress.requests == []
+    assert [p["id"] for p in post_store.posts_between(conn, start, end)] == [2, 1]
+
+
+def test_recent_sync_catches_scheduled_and_removed_posts(wordpress, conn):
+    now = datetime.now(pytz.UTC)
+    wordpress.publish(1, now - timedelta(hours=30))
+    wordpress.publish(2, now - timedelta(hours=20))
+    post_store.sync(conn, since=now - timedelta(days=2), headers=HEADERS)
+    assert stored_ids(conn) == [1, 2]
+
+    # Scheduled yesterday (last edited before the previous sync), live now; post 2 trashed
+    wordpress.publish(3, now - timedelta(minutes=5), modified=now - timedelta(days=3))
+    del wordpress.posts[2]
+    wordpress.requests.clear()
+    post_store.sync(conn, since=now - timedelta(days=1), until=now + timedelta(hours=1), headers=HEADERS)
+
+    assert stored_ids(conn) == [1, 3]
+    # The publish-date refresh only covers the recent tail, not the whole store
+    refresh = [params for params in wordpress.requests if "after" in params]
+    assert len(refresh) == 1
+    assert refresh[0]["after"] >= post_store.to_gmt(now - post_store.REFRESH_TAIL - timedelta(minutes=1))
@@ -0,0 +1,43 @@
+import json
+from pathlib import Path
+
+import pytest
+
+import random_wiki
+
+FIXTURES = Path(__file__).resolve().parent.parent / 'fixtures' / 'wiki'
+
+
+@pytest.fixture
+def page():
+    """The excerpt's wikitext and its article links as the parse API reports them."""
+    wikitext = (FIXTURES / 'unusual-articles-excerpt.wikitext').read_text()
+    links = json.loads((FIXTURES / 'unusual-articles-excerpt.links.json').read_text())
+    return wikitext, {link['title'] for link in links if link['ns'] == 0 and link['exists']}
+
+
+def test_rows_become_articles(page):
+    articles = random_wiki.parse_unusual_articles(*page)
+    assert [a['title'] for a in articles] == [
+        'Emu War', 'Mike the Headless Chicken', 'Tsutomu Yamaguchi', 'Cats', 'Toynbee tiles'
+    ]
+
+    by_title = {a['title']: a for a in articles}
+    assert by_title['Emu War']['desc'] == 'A 1932 military operation in Australia against emus'
+    assert by_title['Mike the Headless Chicken']['desc'] == (
+        'A chicken that lived for 18 months after its head was cut off'
+    )
+    assert by_title['Cats']['url'] == 'https://en.wikipedia.org/wiki/Cats_(musical)'
+    assert by_title['Tsutomu Yamaguchi']['url'] == 'https://en.wikipedia.org/wiki/Tsutomu_Yamaguchi'
+    assert len(by_title['Toynbee tiles']['desc']) == 150
+    assert by_title['Toynbee tiles']['desc'].endswith('...')
+
+
+def test_rows_outside_the_article_namespace_are_skipped(page):
+    wikitext, _ = page
+    titles = [a['title'] for a in random_wiki.parse_unusual_articles(wikitext)]
+    assert 'Wikipedia:Lamest edit wars' not in titles
+    assert 'Redlinked hoax article' in titles
+
+    titles = [a['title'] for a in random_wiki.parse_unusual_articles(*page)]
+    assert 'Redlinked hoax article' not in titles
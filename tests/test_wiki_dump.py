@@ -0,0 +1,113 @@
+import tracemalloc
+from pathlib import Path
+
+import pytest
+
+import wiki_dump
+
+DUMP = Path(__file__).resolve().parent.parent / 'fixtures' / 'wiki' / 'enwiki-sample-pages-articles.xml.bz2'
+
+# As index_titles() would give them: one redirect title, one under-scored URL title
+WANTED = {'Toynbee Tile', 'The Mary Celeste', 'emu_War', 'Wikipedia:Unusual articles'}
+
+
+@pytest.fixture
+def conn():
+    conn = wiki_dump.connect(':memory:')
+    yield conn
+    conn.close()
+
+
+def stored_titles(conn):
+    return {row[0] for row in conn.execute('SELECT title FROM pages')}
+
+
+def test_iter_pages_streams_every_page():
+    pages = list(wiki_dump.iter_pages(DUMP))
+
+    assert [page[0] for page in pages] == [
+        'Wikipedia:Unusual articles', 'Toynbee Tile', 'Mary Celeste', 'Toynbee tiles',
+        'The Mary Celeste', 'Unrelated article', 'Ourang Medan', 'Emu War',
+    ]
+    title, ns, redirect, revision, text = pages[3]
+    assert (ns, redirect) == (0, None)
+    # The revision's ID, not the contributor's
+    assert revision == 1180000004
+    assert text.startswith('{{Short description')
+    assert pages[1][2] == 'Toynbee tiles'
+    assert pages[0][1] == 4
+
+
+def test_ingest_keeps_only_wanted_articles(conn):
+    stored, redirects, missed = wiki_dump.ingest(DUMP, WANTED, conn=conn)
+
+    # Toynbee tiles comes in through its redirect; the project page is skipped
+    assert stored_titles(conn) == {'Toynbee tiles', 'Emu War'}
+    assert (stored, redirects) == (2, 2)
+    # Mary Celeste came before the redirect to it
+    assert missed == 1
+
+
+def test_ingest_picks_up_earlier_redirect_targets_on_a_second_run(conn):
+    wiki_dump.ingest(DUMP, WANTED, conn=conn)
+    _, _, missed = wiki_dump.ingest(DUMP, WANTED, conn=conn)
+
+    assert missed == 0
+    assert 'Mary Celeste' in stored_titles(conn)
+
+
+def test_ingest_keeps_category_members(conn):
+    wiki_dump.ingest(DUMP, set(), categories=['Ghost_ships'], conn=conn)
+
+    assert stored_titles(conn) == {'Ourang Medan'}
+
+
+def test_get_page_follows_redirects(conn):
+    wiki_dump.ingest(DUMP, WANTED, conn=conn)
+
+    title, revision, wikitext = wiki_dump.get_page(conn, 'toynbee_Tile')
+    assert (title, revision) == ('Toynbee tiles', 1180000004)
+    assert "'''Toynbee tiles'''" in wikitext
+    assert wiki_dump.get_page(conn, 'Unrelated article') is None
+
+
+def test_summary_text_strips_markup(conn):
+    wiki_dump.ingest(DUMP, WANTED, conn=conn)
+    _, _, wikitext = wiki_dump.get_page(conn, 'Toynbee tiles')
+
+    assert wiki_dump.summary_text(wikitext) == (
+        'The Toynbee tiles are messages of unknown origin found embedded in asphalt of streets in about '
+        'two dozen major cities in the United States and four South American capitals. Since the 1980s, '
+        'several hundred tiles have been discovered. They are generally about the size of a license plate.'
+    )
+    assert wiki_dump.summary_text(wikitext, sentences=1).endswith('South American capitals.')
+
+
+def write_dump(path, pages, text_size=4000):
+    body = 'Filler text for a large article. ' * (text_size // 33)
+    with open(path, 'w') as f:
+        f.write('<mediawiki xmlns="http://www.mediawiki.org/xml/export-0.10/">\n')
+        for i in range(pages):
+            f.write(f'<page><title>Page {i}</title><ns>0</ns><id>{i}</id><revision><id>{i}</id>'
+                    f'<text xml:space="preserve">{body}</text></revision></page>\n')
+        f.write('</mediawiki>\n')
+
+
+def peak_memory(path):
+    tracemalloc.start()
+    try:
+        for _ in wiki_dump.iter_pages(path):
+            pass
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_iter_pages_memory_stays_flat(tmp_path):
+    small, large = tmp_path / 'small.xml', tmp_path / 'large.xml'
+    write_dump(small, 500)
+    write_dump(large, 5000)
+
+    # 5000 pages are about 20 MB of text; if parsed pages weren't released,
+    # the peak would grow with the dump
+    assert peak_memory(large) < 2 * peak_memory(small) + 1024 * 1024
@@ -0,0 +1,64 @@
+import pytest
+
+import wiki_cache
+import wiki_index
+import wiki_search
+
+
+@pytest.fixture
+def conn(tmp_path):
+    return wiki_cache.connect(tmp_path / 'cache.db')
+
+
+def build_index(path, articles):
+    index = wiki_index.connect(path)
+    wiki_index.build(index, [
+        {'title': title, 'url': f'https://en.wikipedia.org/wiki/{slug}', 'desc': f'About {title}'}
+        for title, slug in articles
+    ])
+    index.close()
+
+
+def doc(conn, key):
+    return conn.execute(
+        'SELECT title, url, sources, desc FROM search_docs WHERE key = ?', (key,)
+    ).fetchone()
+
+
+def test_cache_writes_keep_the_index_title_and_url(conn, tmp_path):
+    build_index(tmp_path / 'random.db', [('The Emu War', 'Emu_War')])
+    wiki_search.sync_index(conn, tmp_path / 'random.db', 'random')
+
+    wiki_cache.put_summaries(conn, {'Emu War': ('Emus won.', 'https://en.m.wikipedia.org/wiki/Emu_War')})
+    wiki_cache.put_content(conn, 'Emu War', '<p>In 1932 the emus won.</p>')
+
+    assert doc(conn, 'Emu War') == ('The Emu War', 'https://en.wikipedia.org/wiki/Emu_War', 'random', 'About The Emu War')
+    assert [row[0] for row in wiki_search.search(conn, 'emus')] == ['The Emu War']
+
+
+def test_cache_writes_fill_in_a_missing_url(conn):
+    wiki_cache.put_summaries(conn, {'Toynbee tiles': ('Tiles in asphalt.', 'https://en.wikipedia.org/wiki/Toynbee_tiles')})
+    assert doc(conn, 'Toynbee tiles') == ('Toynbee tiles', 'https://en.wikipedia.org/wiki/Toynbee_tiles', '', '')
+
+
+def test_articles_dropped_from_an_index_leave_the_search(conn, tmp_path):
+    random_file, weird_file = tmp_path / 'random.db', tmp_path / 'weird.db'
+    build_index(random_file, [
+        ('Emu War', 'Emu_War'), ('Mike the Headless Chicken', 'Mike_the_Headless_Chicken'),
+        ('Toynbee tiles', 'Toynbee_tiles'), ('Cats', 'Cats_(musical)'),
+    ])
+    build_index(weird_file, [('Cats', 'Cats_(musical)')])
+    wiki_search.sync_index(conn, random_file, 'random')
+    wiki_search.sync_index(conn, weird_file, 'weird')
+    wiki_cache.put_summaries(conn, {'Toynbee tiles': ('Tiles in asphalt.', '')})
+
+    build_index(random_file, [('Emu War', 'Emu_War')])
+    wiki_search.sync_index(conn, random_file, 'random')
+
+    assert doc(conn, 'Emu War')[2] == 'random'
+    assert doc(conn, 'Cats (musical)')[2] == 'weird'
+    assert doc(conn, 'Mike the Headless Chicken') is None
+    # Still cached, so still searchable, but no longer listed by any index
+    assert doc(conn, 'Toynbee tiles')[2:] == ('', '')
+    assert [row[0] for row in wiki_search.search(conn, 'headless')] == []
+    assert [row[0] for row in wiki_search.search(conn, 'asphalt')] == ['Toynbee tiles']
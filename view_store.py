@@ -0,0 +1,351 @@
+#!/usr/bin/env python3
+"""
+Daily Post Views Store
+
+Keeps a SQLite time series of per-post daily views from the WordPress.com
+stats API, so questions the monthly author report can't answer (how fast a
+post's views decay, how much of an author's traffic is evergreen) become
+local queries.
+
+Each synced day is one `stats/top-authors?period=day` request, which gives
+every viewed post with its author. Sync only fetches days that aren't stored
+yet, several at a time, and records publish dates for the posts written in
+the synced range.
+
+The layout is kept small for years of data: views are (day, post_id, views)
+integer rows in a WITHOUT ROWID table clustered by day, so a date-range query
+reads one contiguous slice (the same pruning monthly partitions would give),
+days are stored as day numbers, authors as integer codes, and days without
+views for a post aren't stored at all.
+
+Usage:
+    python3 view_store.py sync --from 2025-01-01     # Fetch missing days up to the last settled day
+    python3 view_store.py info                       # Show what the store covers
+    python3 view_store.py decay --from 2025-01-01    # Average views by post age
+    python3 view_store.py decay --author "Rob Beschizza" --days 60
+    python3 view_store.py authors --from 2025-06-01 --to 2025-12-31   # First-7-day views, long-tail share
+
+Environment variables:
+    WP_ACCESS_TOKEN  WordPress.com API token (for sync)
+    BB_VIEW_STORE    Store location. Default: ~/.author_report_cache/daily_views.db
+"""
+
+import os
+import sqlite3
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import author_report
+from author_analytics import EXCLUDED_AUTHORS
+
+STORE_FILE = Path(os.environ.get("BB_VIEW_STORE", author_report.CACHE_DIR / "daily_views.db"))
+
+EPOCH = date(1970, 1, 1)
+
+# Stats keep trickling in for a day or so; only store days this old or older
+SETTLE_DAYS = 2
+
+# Views this many days (or more) after publication count as long-tail traffic
+LONG_TAIL_DAYS = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS views (
+    day INTEGER NOT NULL,
+    post_id INTEGER NOT NULL,
+    views INTEGER NOT NULL,
+    PRIMARY KEY (day, post_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS days (
+    day INTEGER PRIMARY KEY,
+    total INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS posts (
+    post_id INTEGER PRIMARY KEY,
+    author INTEGER NOT NULL,
+    published INTEGER
+);
+CREATE INDEX IF NOT EXISTS posts_published ON posts(published);
+CREATE TABLE IF NOT EXISTS authors (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+"""
+
+
+@contextmanager
+def open_store(path=None):
+    """Open (and create if needed) the views store."""
+    path = Path(path or STORE_FILE)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    try:
+        yield conn
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def day_number(day):
+    """Days since 1970-01-01 for a date or YYYY-MM-DD string."""
+    if isinstance(day, str):
+        day = datetime.strptime(day[:10], "%Y-%m-%d").date()
+    return (day - EPOCH).days
+
+
+def day_date(number):
+    return EPOCH + timedelta(days=number)
+
+
+def last_settled_day():
+    return day_number(date.today()) - SETTLE_DAYS
+
+
+def author_codes(conn, names):
+    """Return {name: code} for author names, adding any new ones."""
+    conn.executemany("INSERT OR IGNORE INTO authors (name) VALUES (?)", [(name,) for name in set(names)])
+    return dict(conn.execute("SELECT name, id FROM authors").fetchall())
+
+
+def missing_days(conn, first, last):
+    """Day numbers in [first, last] that aren't stored yet."""
+    stored = {row[0] for row in conn.execute("SELECT day FROM days WHERE day BETWEEN ? AND ?", (first, last))}
+    return [day for day in range(first, last + 1) if day not in stored]
+
+
+def fetch_day(token, day):
+    """Fetch one day's views per post (with author) from the stats API."""
+    url = "{}/sites/{}/stats/top-authors?period=day&date={}&max=0".format(
+        author_report.BASE_URL, author_report.SITE_ID, day_date(day).isoformat()
+    )
+    return author_report.api_request(url, token, group="daily")
+
+
+def save_day(conn, day, stats_data):
+    """Store one day's stats response. Returns the number of post rows."""
+    views, posts = {}, {}
+    for day_stats in stats_data.get("days", {}).values():
+        for author in day_stats.get("authors", []):
+            for post in author.get("posts", []):
+                views[post["id"]] = views.get(post["id"], 0) + post["views"]
+                posts[post["id"]] = author["name"]
+
+    codes = author_codes(conn, posts.values())
+    conn.executemany(
+        "INSERT INTO posts (post_id, author) VALUES (?, ?) ON CONFLICT (post_id) DO NOTHING",
+        [(post_id, codes[name]) for post_id, name in posts.items()]
+    )
+    conn.executemany(
+        "INSERT OR REPLACE INTO views (day, post_id, views) VALUES (?, ?, ?)",
+        [(day, post_id, count) for post_id, count in views.items() if count]
+    )
+    conn.execute("INSERT OR REPLACE INTO days (day, total) VALUES (?, ?)", (day, sum(views.values())))
+    return len(views)
+
+
+def save_publish_dates(conn, posts_data):
+    """Record publish dates (and authors) for posts from the posts API."""
+    posts = posts_data.get("posts", [])
+    codes = author_codes(conn, [post.get("author", {}).get("name", "Unknown") for post in posts])
+    conn.executemany(
+        "INSERT INTO posts (post_id, author, published) VALUES (?, ?, ?) "
+        "ON CONFLICT (post_id) DO UPDATE SET author = excluded.author, published = excluded.published",
+        [
+            (post["ID"], codes[post.get("author", {}).get("name", "Unknown")], day_number(post["date"]))
+            for post in posts if post.get("date")
+        ]
+    )
+    return len(posts)
+
+
+def sync(conn, token, first, last=None):
+    """Fetch every day in [first, last] that isn't stored yet.
+
+    Days are fetched concurrently and saved as they arrive, so an
+    interrupted sync resumes where it stopped. Publish dates are fetched
+    for the posts written in the span of the new days.
+    """
+    last = min(last if last is not None else last_settled_day(), last_settled_day())
+    days = missing_days(conn, first, last)
+    if not days:
+        return 0
+
+    with ThreadPoolExecutor(max_workers=author_report.MAX_IN_FLIGHT) as pool:
+        posts_future = pool.submit(
+            author_report.fetch_posts, token,
+            day_date(days[0]).strftime("%Y-%m-%dT00:00:00"),
+            day_date(days[-1] + 1).strftime("%Y-%m-%dT00:00:00"),
+        )
+        rows = 0
+        for day, stats_data in zip(days, pool.map(lambda d: fetch_day(token, d), days)):
+            rows += save_day(conn, day, stats_data)
+            conn.commit()
+        published = save_publish_dates(conn, posts_future.result())
+        conn.commit()
+
+    print(f"Synced {len(days)} days ({rows} post-day rows, {published} publish dates)")
+    return len(days)
+
+
+def coverage(conn):
+    """Return (first day, last day, days stored) or (None, None, 0)."""
+    first, last, count = conn.execute("SELECT MIN(day), MAX(day), COUNT(*) FROM days").fetchone()
+    return first, last, count
+
+
+def decay_curve(conn, first, last, days=LONG_TAIL_DAYS, author=None):
+    """Average views per post by age (days since publication).
+
+    Only posts published in [first, last - days + 1] are counted, so every
+    post has a full window of stored days. Returns (posts, [views by age]).
+    """
+    cohort_end = last - days + 1
+    author_filter, params = "", []
+    if author:
+        author_filter = " AND p.author = (SELECT id FROM authors WHERE name = ?)"
+        params = [author]
+
+    num_posts = conn.execute(
+        "SELECT COUNT(*) FROM posts p WHERE p.published BETWEEN ? AND ?" + author_filter,
+        [first, cohort_end] + params
+    ).fetchone()[0]
+
+    # Scan the day slice and look each row's post up, not the other way round
+    rows = conn.execute(
+        "SELECT v.day - p.published AS age, SUM(v.views) FROM views v CROSS JOIN posts p "
+        "ON p.post_id = v.post_id "
+        "WHERE v.day BETWEEN ? AND ? AND p.published BETWEEN ? AND ? AND v.day - p.published < ?"
+        + author_filter + " GROUP BY age",
+        [first, last, first, cohort_end, days] + params
+    )
+    curve = [0] * days
+    for age, views in rows:
+        if age >= 0:
+            curve[age] = views
+    return num_posts, curve
+
+
+def author_stats(conn, first, last, tail_days=LONG_TAIL_DAYS):
+    """Per-author first-7-day views and long-tail share over [first, last].
+
+    Returns a list of dicts (author, views, tail_share, cohort, first_week)
+    sorted by views. Posts published before the store's first day have no
+    publish date and count as long tail, which is exact once `first` is
+    tail_days past the start of the store.
+    """
+    cohort_end = last - 6
+    cohort_counts = dict(conn.execute(
+        "SELECT author, COUNT(*) FROM posts WHERE published BETWEEN ? AND ? GROUP BY author",
+        (first, cohort_end)
+    ).fetchall())
+
+    rows = conn.execute(
+        "SELECT a.name, SUM(v.views), "
+        "SUM(CASE WHEN p.published IS NULL OR v.day - p.published >= ? THEN v.views ELSE 0 END), "
+        "SUM(CASE WHEN p.published BETWEEN ? AND ? AND v.day - p.published < 7 THEN v.views ELSE 0 END), "
+        "p.author "
+        "FROM views v CROSS JOIN posts p ON p.post_id = v.post_id JOIN authors a ON a.id = p.author "
+        "WHERE v.day BETWEEN ? AND ? GROUP BY p.author",
+        (tail_days, first, cohort_end, first, last)
+    )
+
+    results = []
+    for name, views, tail_views, first_week, code in rows:
+        if name in EXCLUDED_AUTHORS:
+            continue
+        cohort = cohort_counts.get(code, 0)
+        results.append({
+            "author": name,
+            "views": views,
+            "tail_share": tail_views / views if views else 0.0,
+            "cohort": cohort,
+            "first_week": first_week / cohort if cohort else None,
+        })
+    results.sort(key=lambda row: row["views"], reverse=True)
+    return results
+
+
+def print_decay(num_posts, curve, label):
+    print(f"Decay curve for {label}: {num_posts} posts with a full {len(curve)}-day window")
+    if not num_posts:
+        return
+    total = sum(curve)
+    running = 0
+    print(f"{'Day':>4} {'Avg views':>10} {'Cumulative':>11}")
+    for age, views in enumerate(curve):
+        running += views
+        share = running / total if total else 0
+        print(f"{age:>4} {views / num_posts:>10,.1f} {share:>10.1%}")
+
+
+def print_authors(results, tail_days):
+    print(f"{'Author':<24} {'Views':>10} {'Long tail':>10} {'New posts':>10} {'Avg first 7d':>13}")
+    print("-" * 71)
+    for row in results:
+        first_week = "-" if row["first_week"] is None else f"{row['first_week']:,.0f}"
+        print(f"{row['author'][:24]:<24} {row['views']:>10,} {row['tail_share']:>10.1%} "
+              f"{row['cohort']:>10} {first_week:>13}")
+    print()
+    print(f"Long tail: share of views on posts published {tail_days}+ days earlier.")
+    print("Avg first 7d: average views in a post's first week, for posts with a full week stored.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain and query the store of daily per-post views")
+    parser.add_argument("command", choices=["sync", "info", "decay", "authors"],
+                        help="sync: fetch missing days; info: show coverage; "
+                             "decay: views by post age; authors: first-week views and long-tail share")
+    parser.add_argument("--from", dest="from_date", help="First day (YYYY-MM-DD). Default: start of the store")
+    parser.add_argument("--to", dest="to_date", help="Last day (YYYY-MM-DD). Default: end of the store")
+    parser.add_argument("--author", help="Limit the decay curve to one author")
+    parser.add_argument("--days", type=int, default=LONG_TAIL_DAYS,
+                        help=f"Decay window / long-tail age in days. Default: {LONG_TAIL_DAYS}")
+    args = parser.parse_args()
+
+    try:
+        first = day_number(args.from_date) if args.from_date else None
+        last = day_number(args.to_date) if args.to_date else None
+    except ValueError:
+        parser.error("dates must be YYYY-MM-DD")
+
+    with open_store() as conn:
+        if args.command == "sync":
+            if first is None:
+                stored_first, _, _ = coverage(conn)
+                if stored_first is None:
+                    parser.error("the first sync needs --from")
+                first = stored_first
+            sync(conn, author_report.get_token(), first, last)
+
+        stored_first, stored_last, count = coverage(conn)
+        if args.command in ("sync", "info"):
+            print(f"Store: {STORE_FILE}")
+            print(f"  Days: {count}")
+            if count:
+                rows = conn.execute("SELECT COUNT(*) FROM views").fetchone()[0]
+                print(f"  Covers: {day_date(stored_first)} to {day_date(stored_last)}")
+                print(f"  Post-day rows: {rows:,}")
+                print(f"  Size: {STORE_FILE.stat().st_size / 1024 / 1024:,.1f} MB")
+            return
+
+        if not count:
+            print("The store is empty. Run: python3 view_store.py sync --from YYYY-MM-DD")
+            return
+
+        first = max(first if first is not None else stored_first, stored_first)
+        last = min(last if last is not None else stored_last, stored_last)
+
+        if args.command == "decay":
+            num_posts, curve = decay_curve(conn, first, last, args.days, args.author)
+            print_decay(num_posts, curve, args.author or "all authors")
+        else:
+            print(f"Authors, {day_date(first)} to {day_date(last)}")
+            print()
+            print_authors(author_stats(conn, first, last, args.days), args.days)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,32 +10,40 @@ Usage:
   python3 weird_wiki.py url                  # Fetch content from a Wikipedia URL
   python3 weird_wiki.py --preview "Article"  # Quick 2-3 sentence summary
   python3 weird_wiki.py -p "Article"         # Short form of --preview
+  python3 weird_wiki.py --section History "Article"  # Fetch one section ("intro" for the lead)
   python3 weird_wiki.py --reset              # Reshuffle and start from beginning
   python3 weird_wiki.py --remaining          # Show how many unseen articles remain
+  python3 weird_wiki.py --used "Article"     # Don't list an article again
+  python3 weird_wiki.py --search "haunted"  # Search titles, descriptions and cached articles
+
+The index lives in ~/.weird_wiki_index.db (see wiki_index.py); edits to
+weird.html are merged into it without losing your place. Listings prefetch
+summaries into ~/.wiki_cache.db, so --preview of a listed article is instant.
+Articles that match a published post or a preview in posts/ (see wiki_coverage.py)
+are listed separately at the end.
 """
-import urllib.request
-import urllib.parse
-import json
 import re
+import json
+import hashlib
+import textwrap
 import sys
-import random
 from html import unescape
 from pathlib import Path
-from datetime import datetime
+
+import wiki_coverage
+import wiki_index
+import wiki_search
+from wiki_fetch import extract_title_from_url, fetch_article_content, fetch_article_summary, listing_summaries
 
 SCRIPT_DIR = Path(__file__).parent
 ARCHIVE_FILE = SCRIPT_DIR / "weird.html"
-INDEX_FILE = Path.home() / '.weird_wiki_index.json'
-
-
-def parse_archive():
-    """Parse weird.html and extract articles."""
-    if not ARCHIVE_FILE.exists():
-        print(f"Error: {ARCHIVE_FILE} not found")
-        sys.exit(1)
+ARCHIVE_CACHE_FILE = SCRIPT_DIR / ".weird_archive.json"
+INDEX_FILE = Path.home() / '.weird_wiki_index.db'
+LEGACY_INDEX_FILE = Path.home() / '.weird_wiki_index.json'
 
-    html = ARCHIVE_FILE.read_text()
 
+def parse_archive(html):
+    """Extract articles from the weird.html markup."""
     # Pattern to match: <a href="URL"><b>Title</b></a>: Description
     pattern = r'<a href="(https://en\.wikipedia\.org/wiki/[^"]+)"[^>]*><b>([^<]+)</b></a>(?:<sup>.*?</sup>)?:\s*([^<]+)'
 
@@ -64,136 +72,129 @@ def parse_archive():
     return articles
 
 
-def fetch_article_summary(title):
-    """Fetch a quick 2-3 sentence summary via Wikipedia API."""
-    encoded = urllib.parse.quote(title.replace(' ', '_'))
-    api_url = f'https://en.wikipedia.org/api/rest_v1/page/summary/{encoded}'
-    req = urllib.request.Request(api_url, headers={
-        'User-Agent': 'Mozilla/5.0 (compatible; BoingBoingBot/1.0)',
-        'Accept': 'application/json'
-    })
-    try:
-        response = urllib.request.urlopen(req).read().decode('utf-8')
-        data = json.loads(response)
-        extract = data.get('extract', 'No summary available.')
-        url = data.get('content_urls', {}).get('desktop', {}).get('page', '')
-        return extract, url
-    except urllib.error.HTTPError as e:
-        return f"Error fetching summary: {e.code} {e.reason}", ""
-
-
-def fetch_article_content(title):
-    """Fetch article content via Wikipedia API."""
-    encoded = urllib.parse.quote(title.replace(' ', '_'))
-    api_url = f'https://en.wikipedia.org/api/rest_v1/page/html/{encoded}'
-    req = urllib.request.Request(api_url, headers={
-        'User-Agent': 'Mozilla/5.0 (compatible; BoingBoingBot/1.0)',
-        'Accept': 'text/html'
-    })
-    try:
-        html = urllib.request.urlopen(req).read().decode('utf-8')
-        text = re.sub(r'<script[^>]*>.*?</script>', '', html, flags=re.DOTALL)
-        text = re.sub(r'<style[^>]*>.*?</style>', '', text, flags=re.DOTALL)
-        text = re.sub(r'<[^>]+>', ' ', text)
-        text = re.sub(r'\s+', ' ', text).strip()
-        text = unescape(text)
-        return text
-    except urllib.error.HTTPError as e:
-        return f"Error fetching article: {e.code} {e.reason}"
-
-
-def extract_title_from_url(url):
-    """Extract article title from Wikipedia URL."""
-    match = re.search(r'wikipedia\.org/wiki/([^#?]+)', url)
-    if match:
-        return urllib.parse.unquote(match.group(1).replace('_', ' '))
-    return None
-
-
-def build_index():
-    """Build a shuffled index from the archive."""
-    print("Building article index from weird.html...")
-    articles = parse_archive()
+def load_archive():
+    """Return (articles, content hash) for weird.html.
 
-    random.shuffle(articles)
+    The parsed records are kept in a sidecar file keyed by the archive's
+    mtime, size and SHA-256, so weird.html is only re-parsed after an edit.
+    """
+    if not ARCHIVE_FILE.exists():
+        print(f"Error: {ARCHIVE_FILE} not found")
+        sys.exit(1)
 
-    index_data = {
-        'articles': articles,
-        'position': 0,
-        'created': datetime.now().isoformat(),
-        'total': len(articles)
-    }
+    stat = ARCHIVE_FILE.stat()
+    try:
+        cached = json.loads(ARCHIVE_CACHE_FILE.read_text())
+    except (OSError, ValueError):
+        cached = None
 
-    with open(INDEX_FILE, 'w') as f:
-        json.dump(index_data, f, indent=2)
+    def records(rows):
+        return [{'url': url, 'title': title, 'desc': desc} for url, title, desc in rows]
 
-    print(f"Index created with {len(articles)} articles.")
-    return index_data
+    if cached and (cached['mtime_ns'], cached['size']) == (stat.st_mtime_ns, stat.st_size):
+        return records(cached['articles']), cached['hash']
 
+    data = ARCHIVE_FILE.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    if cached and cached['hash'] == digest:
+        # Touched but not edited
+        articles = records(cached['articles'])
+    else:
+        articles = parse_archive(data.decode('utf-8'))
 
-def load_index():
-    """Load the index, creating it if it doesn't exist."""
-    if not INDEX_FILE.exists():
-        return build_index()
+    ARCHIVE_CACHE_FILE.write_text(json.dumps({
+        'mtime_ns': stat.st_mtime_ns,
+        'size': stat.st_size,
+        'hash': digest,
+        'articles': [[a['url'], a['title'], a['desc']] for a in articles],
+    }, separators=(',', ':')))
+    return articles, digest
 
-    with open(INDEX_FILE, 'r') as f:
-        return json.load(f)
 
+def build_index(conn, articles, digest):
+    """Build a shuffled index from the archive."""
+    print("Building article index from weird.html...")
+    wiki_index.build(conn, articles)
+    wiki_index.set_meta(conn, 'source_hash', digest)
+    conn.commit()
+    print(f"Index created with {len(articles)} articles.")
 
-def save_index(index_data):
-    """Save the index with updated position."""
-    with open(INDEX_FILE, 'w') as f:
-        json.dump(index_data, f, indent=2)
+
+def load_index():
+    """Open the index, creating it (or importing the old JSON index) if needed.
+
+    Edits to weird.html are merged in: new entries join the unseen part of
+    the shuffle and seen state is kept.
+    """
+    conn = wiki_index.connect(INDEX_FILE)
+    articles, digest = load_archive()
+    if wiki_index.is_empty(conn) and not wiki_index.migrate_json(conn, LEGACY_INDEX_FILE):
+        build_index(conn, articles, digest)
+    elif wiki_index.get_meta(conn, 'source_hash') != digest:
+        added, removed = wiki_index.merge(conn, articles)
+        wiki_index.set_meta(conn, 'source_hash', digest)
+        conn.commit()
+        if added or removed:
+            print(f"weird.html changed: {added} new, {removed} removed.\n")
+    return conn
 
 
 def reset_index():
-    """Reshuffle the index and reset position to 0."""
-    index_data = load_index()
-    random.shuffle(index_data['articles'])
-    index_data['position'] = 0
-    index_data['created'] = datetime.now().isoformat()
-    save_index(index_data)
-    print(f"Index reshuffled. {index_data['total']} articles ready.")
+    """Reshuffle the index and start from the beginning."""
+    conn = load_index()
+    wiki_index.reshuffle(conn)
+    _, total = wiki_index.counts(conn)
+    print(f"Index reshuffled. {total} articles ready.")
 
 
 def show_remaining():
     """Show how many unseen articles remain."""
-    index_data = load_index()
-    remaining = index_data['total'] - index_data['position']
-    print(f"{remaining} unseen articles remaining out of {index_data['total']} total.")
+    remaining, total = wiki_index.counts(load_index())
+    print(f"{remaining} unseen articles remaining out of {total} total.")
     if remaining == 0:
         print("Run with --reset to reshuffle and start over.")
 
 
+def mark_used(title):
+    """Mark an article as used so it isn't listed again."""
+    if wiki_index.mark(load_index(), title, 'used'):
+        print(f"Marked as used: {title}")
+    else:
+        print(f"Not in the index: {title}")
+
+
 def list_weird_articles(count=10):
     """Show the next N articles from the shuffled index."""
-    index_data = load_index()
-
-    position = index_data['position']
-    total = index_data['total']
-    articles = index_data['articles']
+    conn = load_index()
+    batch = wiki_index.next_batch(conn, count)
+    remaining, total = wiki_index.counts(conn)
 
-    if position >= total:
+    if not batch:
         print(f"You've seen all {total} articles!")
         print("Run with --reset to reshuffle and start over.")
         return
 
-    end_pos = min(position + count, total)
-    batch = articles[position:end_pos]
-
-    index_data['position'] = end_pos
-    save_index(index_data)
-
-    remaining = total - end_pos
+    summaries = listing_summaries(batch)
+    covered = wiki_coverage.covered_articles(batch, summaries)
 
     print("WEIRD WIKIPEDIA ARTICLES")
     print(f"────────────────────────  ({remaining} remaining)")
-    for i, article in enumerate(batch, 1):
+    for i, article in enumerate([a for a in batch if a['title'] not in covered], 1):
         print(f"{i}. {article['title']}")
         print(f"   {article['desc']}.")
         print(f"   {article['url']}")
+        summary = summaries.get(article['title'])
+        if summary:
+            print(textwrap.fill(summary[0], width=100, initial_indent='   > ', subsequent_indent='     '))
         print()
 
+    if covered:
+        print("ALREADY COVERED")
+        for article in batch:
+            if article['title'] in covered:
+                score, post_title, link = covered[article['title']]
+                print(f"- {article['title']}  ~ \"{post_title}\" ({score:.0%})  {link}")
+
 
 if __name__ == '__main__':
     if len(sys.argv) > 1:
@@ -203,6 +204,28 @@ if __name__ == '__main__':
             reset_index()
         elif arg == '--remaining':
             show_remaining()
+        elif arg == '--used':
+            if len(sys.argv) > 2:
+                mark_used(' '.join(sys.argv[2:]))
+            else:
+                print("Usage: weird_wiki.py --used \"Article Title\"")
+        elif arg == '--search':
+            if len(sys.argv) > 2:
+                load_index()
+                wiki_search.run_search(' '.join(sys.argv[2:]), {'weird': INDEX_FILE})
+            else:
+                print("Usage: weird_wiki.py --search \"words\"")
+        elif arg == '--section':
+            if len(sys.argv) > 3:
+                section, query = sys.argv[2], ' '.join(sys.argv[3:])
+                title = extract_title_from_url(query) if 'wikipedia.org/wiki/' in query else query
+                if title:
+                    print(f"=== {title}: {section} ===\n")
+                    print(fetch_article_content(title, section))
+                else:
+                    print("Could not parse Wikipedia URL")
+            else:
+                print("Usage: weird_wiki.py --section \"Section\" \"Article Title\"")
         elif arg in ('--preview', '-p'):
             if len(sys.argv) > 2:
                 query = ' '.join(sys.argv[2:])
@@ -0,0 +1,138 @@
+"""
+On-disk cache of Wikipedia lookups shared by random_wiki.py and weird_wiki.py.
+
+Summaries are kept in a SQLite file for SUMMARY_TTL, so a listing prefetches
+them once and later --preview calls are answered locally.
+
+Article HTML is kept gzip-compressed with its revision ID and ETag, so a
+reopened article is revalidated with If-None-Match (a 304 instead of a
+full download). The content table is capped at CONTENT_MAX_BYTES; the least
+recently read articles are evicted first.
+
+Everything stored here is also added to the full-text index (wiki_search.py).
+"""
+import re
+import gzip
+import time
+import sqlite3
+from pathlib import Path
+
+import wiki_search
+import wiki_text
+
+CACHE_FILE = Path.home() / '.wiki_cache.db'
+
+# Summaries change rarely; refetch them after a week
+SUMMARY_TTL = 7 * 24 * 3600
+
+# Compressed article HTML kept before evicting the least recently used
+CONTENT_MAX_BYTES = 50 * 1024 * 1024
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS summaries (
+    title TEXT PRIMARY KEY,
+    extract TEXT NOT NULL,
+    url TEXT NOT NULL,
+    fetched REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS contents (
+    title TEXT PRIMARY KEY,
+    revision INTEGER,
+    etag TEXT,
+    html BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS contents_accessed ON contents(accessed);
+"""
+
+
+def connect(path=None):
+    """Open (and create if needed) the cache."""
+    conn = sqlite3.connect(path or CACHE_FILE)
+    conn.executescript(SCHEMA)
+    conn.executescript(wiki_search.SCHEMA)
+    return conn
+
+
+def get_summary(conn, title):
+    """Return a fresh cached (extract, url) for title, or None."""
+    row = conn.execute(
+        'SELECT extract, url FROM summaries WHERE title = ? AND fetched > ?',
+        (title, time.time() - SUMMARY_TTL)
+    ).fetchone()
+    return tuple(row) if row else None
+
+
+def missing_summaries(conn, titles):
+    """Titles without a fresh cached summary, in the given order."""
+    fresh = {
+        row[0] for row in conn.execute(
+            f'SELECT title FROM summaries WHERE fetched > ? AND title IN ({",".join("?" * len(titles))})',
+            [time.time() - SUMMARY_TTL] + list(titles)
+        )
+    } if titles else set()
+    return [title for title in titles if title not in fresh]
+
+
+def put_summaries(conn, summaries):
+    """Store {title: (extract, url)}."""
+    now = time.time()
+    conn.executemany(
+        'INSERT OR REPLACE INTO summaries (title, extract, url, fetched) VALUES (?, ?, ?, ?)',
+        [(title, extract, url, now) for title, (extract, url) in summaries.items()]
+    )
+    for title, (extract, url) in summaries.items():
+        wiki_search.index_document(conn, title, defaults={'url': url}, summary=extract)
+    conn.commit()
+
+
+def revision_from_etag(etag):
+    """Parsoid ETags look like W/"1234567890/uuid"; return the revision ID or None."""
+    match = re.search(r'"(\d+)/', etag or '')
+    return int(match.group(1)) if match else None
+
+
+def get_content(conn, title, revision=None):
+    """Return the cached (html, etag, revision) for title, or None.
+
+    With revision set, only that revision counts as a hit.
+    """
+    row = conn.execute('SELECT html, etag, revision FROM contents WHERE title = ?', (title,)).fetchone()
+    if not row or (revision is not None and row[2] != revision):
+        return None
+    return gzip.decompress(row[0]).decode('utf-8'), row[1], row[2]
+
+
+def touch_content(conn, title):
+    """Mark an article as just read (for LRU eviction)."""
+    conn.execute('UPDATE contents SET accessed = ? WHERE title = ?', (time.time(), title))
+    conn.commit()
+
+
+def put_content(conn, title, html, etag=None, max_bytes=CONTENT_MAX_BYTES):
+    """Store an article's HTML, replacing any older revision, then evict down to max_bytes."""
+    body = gzip.compress(html.encode('utf-8'))
+    conn.execute(
+        'INSERT OR REPLACE INTO contents (title, revision, etag, html, size, accessed) VALUES (?, ?, ?, ?, ?, ?)',
+        (title, revision_from_etag(etag), etag, body, len(body), time.time())
+    )
+    wiki_search.index_document(conn, title, content=wiki_text.extract_text(html))
+    evict_contents(conn, max_bytes)
+    conn.commit()
+
+
+def evict_contents(conn, max_bytes=CONTENT_MAX_BYTES):
+    """Drop least recently read articles until the content table fits in max_bytes."""
+    total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM contents').fetchone()[0]
+    if total <= max_bytes:
+        return 0
+
+    evicted = []
+    for title, size in conn.execute('SELECT title, size FROM contents ORDER BY accessed'):
+        if total <= max_bytes:
+            break
+        evicted.append((title,))
+        total -= size
+    conn.executemany('DELETE FROM contents WHERE title = ?', evicted)
+    return len(evicted)
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+What Boing Boing has already covered, for the wiki tools.
+
+Each published post (title and excerpt, from the post store) and each local
+preview in posts/ gets a MinHash signature over its content words. Signatures
+are split into LSH bands stored in an indexed table, so checking a wiki
+candidate is one lookup per band, not a scan of every post; the few posts
+that share a band are then compared on their full signatures.
+
+The index is updated incrementally: posts modified since the last update and
+previews whose files changed are re-signed, deleted previews are dropped.
+
+Usage:
+  python3 wiki_coverage.py update                # Sign new and changed posts and previews
+  python3 wiki_coverage.py check "Ourang Medan"  # Which covered posts match a topic
+  python3 wiki_coverage.py info
+"""
+import os
+import re
+import sys
+import json
+import zlib
+import sqlite3
+import hashlib
+from array import array
+from html import unescape
+from pathlib import Path
+
+SCRIPT_DIR = Path(__file__).parent
+POSTS_DIR = SCRIPT_DIR / 'posts'
+INDEX_FILE = Path.home() / '.bb_coverage.db'
+
+# post_store.py's store, read directly: importing post_store pulls in daily.py
+# and the Anthropic client, which would add a second to every wiki listing
+POST_STORE_FILE = Path(os.environ.get('BB_POST_STORE', SCRIPT_DIR / 'posts.db'))
+
+# 64 bands of 2 rows: documents sharing ~20% of their words usually share a band
+NUM_PERM = 128
+BAND_ROWS = 2
+BANDS = NUM_PERM // BAND_ROWS
+
+# A candidate counts as covered when about this share of its words are in a post
+THRESHOLD = 0.4
+
+# Words of post body text (the lede) signed along with the title
+EXCERPT_WORDS = 50
+
+MERSENNE_PRIME = (1 << 61) - 1
+MAX_HASH = (1 << 32) - 1
+
+STOPWORDS = set("""
+a about after all also an and any are as at be been but by can could did do does for from had has
+have he her his how i if in into is it its just more most my new no not of on one or our out over
+she so some than that the their them then there these they this to up us was we were what when which
+who will with would you your
+""".split())
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    ref TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    link TEXT NOT NULL,
+    stamp TEXT NOT NULL,
+    words INTEGER NOT NULL,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS bands (
+    band INTEGER NOT NULL,
+    hash INTEGER NOT NULL,
+    doc_id INTEGER NOT NULL,
+    PRIMARY KEY (band, hash, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS bands_doc ON bands(doc_id);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def _permutations():
+    """NUM_PERM fixed (a, b) pairs for the hash family (a * x + b) mod p."""
+    pairs, counter = [], 0
+    while len(pairs) < NUM_PERM:
+        digest = hashlib.blake2b(f'minhash-{counter}'.encode(), digest_size=16).digest()
+        a, b = int.from_bytes(digest[:8], 'big') % MERSENNE_PRIME, int.from_bytes(digest[8:], 'big') % MERSENNE_PRIME
+        if a:
+            pairs.append((a, b))
+        counter += 1
+    return pairs
+
+
+PERMUTATIONS = _permutations()
+
+
+def connect(path=None):
+    """Open (and create if needed) the coverage index."""
+    conn = sqlite3.connect(path or INDEX_FILE)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def get_meta(conn, key, default=None):
+    row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+    return row[0] if row else default
+
+
+def set_meta(conn, key, value):
+    conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, str(value)))
+
+
+def shingles(text):
+    """Content words of text: lower-cased, stopwords and short words dropped, plural s trimmed."""
+    words = set()
+    for word in re.findall(r"[a-z0-9']+", text.lower()):
+        word = word.strip("'")
+        if len(word) < 3 or word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith('s') and not word.endswith('ss'):
+            word = word[:-1]
+        words.add(word)
+    return words
+
+
+def signature(words):
+    """MinHash signature (NUM_PERM 32-bit values) of a set of words."""
+    values = [int.from_bytes(hashlib.blake2b(w.encode(), digest_size=8).digest(), 'big') for w in words]
+    if not values:
+        return [MAX_HASH] * NUM_PERM
+    return [min(((a * x + b) % MERSENNE_PRIME) & MAX_HASH for x in values) for a, b in PERMUTATIONS]
+
+
+def band_hashes(sig):
+    """One 63-bit hash per LSH band of a signature."""
+    for band in range(BANDS):
+        rows = array('I', sig[band * BAND_ROWS:(band + 1) * BAND_ROWS]).tobytes()
+        yield band, int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(), 'big') >> 1
+
+
+def similarity(sig, other):
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for x, y in zip(sig, other) if x == y) / NUM_PERM
+
+
+def containment(jaccard, size, other_size):
+    """Share of a set of size words that is in another set, from their Jaccard similarity.
+
+    A wiki summary and a post lede about the same thing share few words
+    overall, but most of the candidate's key words show up in the post.
+    """
+    if not size:
+        return 0.0
+    return min(jaccard * (size + other_size) / (size * (1 + jaccard)), 1.0)
+
+
+def put_doc(conn, ref, title, link, stamp, text):
+    """Sign a document and (re)place it and its bands in the index."""
+    words = shingles(f'{title} {text}')
+    sig = signature(words)
+    remove_doc(conn, ref)
+    doc_id = conn.execute(
+        'INSERT INTO docs (ref, title, link, stamp, words, signature) VALUES (?, ?, ?, ?, ?, ?)',
+        (ref, title, link, stamp, len(words), array('I', sig).tobytes())
+    ).lastrowid
+    conn.executemany(
+        'INSERT OR IGNORE INTO bands (band, hash, doc_id) VALUES (?, ?, ?)',
+        [(band, value, doc_id) for band, value in band_hashes(sig)]
+    )
+
+
+def remove_doc(conn, ref):
+    row = conn.execute('SELECT id FROM docs WHERE ref = ?', (ref,)).fetchone()
+    if row:
+        conn.execute('DELETE FROM bands WHERE doc_id = ?', row)
+        conn.execute('DELETE FROM docs WHERE id = ?', row)
+
+
+def strip_tags(html):
+    return ' '.join(unescape(re.sub(r'<[^>]+>', ' ', html)).split())
+
+
+def lede(html):
+    """The first EXCERPT_WORDS words of a post body's paragraphs."""
+    paragraphs = re.findall(r'<p[^>]*>(.*?)</p>', html, re.DOTALL | re.IGNORECASE)
+    return ' '.join(strip_tags(' '.join(paragraphs)).split()[:EXCERPT_WORDS])
+
+
+def update_posts(conn, store_file=POST_STORE_FILE):
+    """Sign posts modified in the post store since the last update. Returns how many."""
+    if not store_file.exists():
+        return 0
+    watermark = get_meta(conn, 'posts_modified', '')
+    store = sqlite3.connect(store_file)
+    rows = store.execute(
+        'SELECT id, modified_gmt, title, link, data FROM posts WHERE modified_gmt > ? ORDER BY modified_gmt',
+        (watermark,)
+    )
+    count = 0
+    for post_id, modified, title, link, data in rows:
+        post = json.loads(zlib.decompress(data))
+        put_doc(conn, f'post:{post_id}', strip_tags(title), link, modified,
+                lede(post.get('content', {}).get('rendered', '')))
+        watermark = modified
+        count += 1
+    store.close()
+    set_meta(conn, 'posts_modified', watermark)
+    conn.commit()
+    return count
+
+
+def read_preview(path):
+    """(headline, lede) of a generated post preview in posts/."""
+    html = path.read_text()
+    headline = re.search(r'<h1[^>]*id="headline"[^>]*>(.*?)</h1>', html, re.DOTALL)
+    body = re.search(r'<article[^>]*id="postBody"[^>]*>(.*?)</article>', html, re.DOTALL)
+    return strip_tags(headline.group(1)) if headline else path.stem, lede(body.group(1) if body else '')
+
+
+def update_previews(conn, posts_dir=POSTS_DIR):
+    """Sign new and changed previews and drop deleted ones. Returns (signed, removed)."""
+    known = {ref: stamp for ref, stamp in conn.execute("SELECT ref, stamp FROM docs WHERE ref LIKE 'preview:%'")}
+    signed = 0
+    current = set()
+    for path in sorted(posts_dir.glob('*.html')) if posts_dir.exists() else []:
+        ref, stamp = f'preview:{path.name}', str(path.stat().st_mtime_ns)
+        current.add(ref)
+        if known.get(ref) != stamp:
+            title, excerpt = read_preview(path)
+            put_doc(conn, ref, title, f'posts/{path.name}', stamp, excerpt)
+            signed += 1
+    removed = known.keys() - current
+    for ref in removed:
+        remove_doc(conn, ref)
+    conn.commit()
+    return signed, len(removed)
+
+
+def update(conn=None):
+    """Bring the index up to date with the post store and posts/. Returns how many docs changed."""
+    conn = conn or connect()
+    signed, removed = update_previews(conn)
+    return update_posts(conn) + signed + removed
+
+
+def matches(conn, text, threshold=THRESHOLD):
+    """Covered posts that contain most of text's words: [(score, title, link)], best first."""
+    words = shingles(text)
+    sig = signature(words)
+    candidates = set()
+    for band, value in band_hashes(sig):
+        candidates.update(row[0] for row in conn.execute(
+            'SELECT doc_id FROM bands WHERE band = ? AND hash = ?', (band, value)
+        ))
+
+    found = []
+    for doc_id in candidates:
+        title, link, size, stored = conn.execute(
+            'SELECT title, link, words, signature FROM docs WHERE id = ?', (doc_id,)
+        ).fetchone()
+        score = containment(similarity(sig, array('I', stored)), len(words), size)
+        if score >= threshold:
+            found.append((score, title, link))
+    return sorted(found, reverse=True)
+
+
+def covered_articles(articles, summaries):
+    """Map listed article titles to their best coverage match (similarity, post title, link).
+
+    Matches on each article's title, description and the first sentence of
+    its summary, the part that says what the article is about.
+    """
+    conn = connect()
+    update(conn)
+
+    covered = {}
+    for article in articles:
+        summary = summaries.get(article['title'], ('', ''))[0]
+        summary = re.split(r'(?<=[.!?])\s+', summary, maxsplit=1)[0]
+        found = matches(conn, f"{article['title']} {article['desc']} {summary}")
+        if found:
+            covered[article['title']] = found[0]
+    return covered
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] not in ('update', 'check', 'info'):
+        print(__doc__.strip().split('Usage:')[1])
+        sys.exit(1)
+
+    conn = connect()
+    command = sys.argv[1]
+    if command == 'update':
+        print(f'Updated {update(conn)} documents.')
+    elif command == 'check':
+        update(conn)
+        for score, title, link in matches(conn, ' '.join(sys.argv[2:])):
+            print(f'{score:.2f}  {title}\n      {link}')
+
+    docs = conn.execute('SELECT COUNT(*) FROM docs').fetchone()[0]
+    if command != 'check':
+        print(f'Index: {INDEX_FILE}')
+        print(f'  Documents: {docs} (posts watermark {get_meta(conn, "posts_modified", "none")})')
+
+
+if __name__ == '__main__':
+    main()
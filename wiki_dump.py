@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Offline Wikipedia dump store for random_wiki.py and weird_wiki.py.
+
+Stream-parses a pages-articles XML dump (.xml.bz2 or .xml) and keeps only
+the pages the wiki tools care about: every article in the random and weird
+indexes, plus any pages in the categories given with --category. The dump is
+decompressed and parsed incrementally and each <page> is cleared once read,
+so memory stays flat however large the dump is.
+
+Kept pages go into a SQLite store (compressed wikitext, indexed by title,
+with redirects), which fetch_article_summary() and fetch_article_content()
+read before going to the network.
+
+Usage:
+  python3 wiki_dump.py ingest enwiki-latest-pages-articles.xml.bz2
+  python3 wiki_dump.py ingest dump.xml.bz2 --category "Hoaxes" --category "Ghost ships"
+  python3 wiki_dump.py info
+
+A redirect whose target came earlier in the dump than the redirect itself
+can't be followed in one pass; ingest reports unresolved redirects, and
+running it again picks the targets up.
+"""
+import re
+import bz2
+import zlib
+import sqlite3
+import argparse
+from html import unescape
+from pathlib import Path
+from xml.etree.ElementTree import iterparse
+
+STORE_FILE = Path.home() / '.wiki_dump.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    title TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL,
+    wikitext BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS redirects (
+    title TEXT PRIMARY KEY,
+    target TEXT NOT NULL
+);
+"""
+
+DROPPED_LINK_PREFIXES = ('file:', 'image:', 'category:', 'media:')
+
+
+def connect(path=None):
+    """Open (and create if needed) the dump store."""
+    conn = sqlite3.connect(path or STORE_FILE)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def normalize_title(title):
+    """Wikipedia titles use spaces and an upper-case first letter."""
+    title = ' '.join(title.replace('_', ' ').split())
+    return title[:1].upper() + title[1:]
+
+
+def index_titles():
+    """Titles of every article in the random and weird indexes."""
+    import wiki_index
+    from random_wiki import INDEX_FILE as RANDOM_INDEX_FILE
+    from weird_wiki import INDEX_FILE as WEIRD_INDEX_FILE
+    from wiki_fetch import extract_title_from_url
+
+    titles = set()
+    for index_file in (RANDOM_INDEX_FILE, WEIRD_INDEX_FILE):
+        if not index_file.exists():
+            continue
+        conn = wiki_index.connect(index_file)
+        for title, url in conn.execute('SELECT title, url FROM articles'):
+            titles.add(normalize_title(extract_title_from_url(url) or title))
+    return titles
+
+
+def local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+
+def iter_pages(path):
+    """Yield (title, namespace, redirect target, revision ID, wikitext) for each page in a dump."""
+    opener = bz2.open if str(path).endswith('.bz2') else open
+    with opener(path, 'rb') as f:
+        events = iterparse(f, events=('start', 'end'))
+        _, root = next(events)
+        page, in_revision = {}, False
+        for event, elem in events:
+            tag = local_name(elem.tag)
+            if event == 'start':
+                in_revision = in_revision or tag == 'revision'
+                continue
+
+            if tag == 'title':
+                page['title'] = elem.text or ''
+            elif tag == 'ns':
+                page['ns'] = int(elem.text or 0)
+            elif tag == 'redirect':
+                page['redirect'] = elem.get('title')
+            elif tag == 'id' and in_revision and 'revision' not in page:
+                # The revision's own ID comes before the contributor's
+                page['revision'] = int(elem.text)
+            elif tag == 'text':
+                page['text'] = elem.text or ''
+            elif tag == 'page':
+                yield (page.get('title', ''), page.get('ns', 0), page.get('redirect'),
+                       page.get('revision', 0), page.get('text', ''))
+                page, in_revision = {}, False
+                # Drop everything parsed so far so memory stays flat
+                root.clear()
+
+
+def ingest(path, titles, categories=(), conn=None):
+    """Store the wanted pages from a dump. Returns (pages stored, redirects stored, targets missed)."""
+    conn = conn or connect()
+    wanted = {normalize_title(title) for title in titles}
+    wanted |= {row[0] for row in conn.execute('SELECT target FROM redirects')}
+    category_pattern = None
+    if categories:
+        names = '|'.join(re.escape(normalize_title(name)).replace(r'\ ', '[ _]') for name in categories)
+        category_pattern = re.compile(r'\[\[\s*Category\s*:\s*(?:' + names + r')\s*[|\]]', re.IGNORECASE)
+
+    stored, redirects = 0, 0
+    for title, ns, redirect, revision, text in iter_pages(path):
+        if ns != 0:
+            continue
+        if redirect is not None:
+            if title in wanted:
+                target = normalize_title(redirect)
+                conn.execute('INSERT OR REPLACE INTO redirects (title, target) VALUES (?, ?)', (title, target))
+                wanted.add(target)
+                redirects += 1
+            continue
+        if title in wanted or (category_pattern and category_pattern.search(text)):
+            conn.execute(
+                'INSERT OR REPLACE INTO pages (title, revision, wikitext) VALUES (?, ?, ?)',
+                (title, revision, zlib.compress(text.encode('utf-8')))
+            )
+            stored += 1
+            if stored % 500 == 0:
+                conn.commit()
+    conn.commit()
+
+    missed = conn.execute(
+        'SELECT COUNT(*) FROM redirects WHERE target NOT IN (SELECT title FROM pages)'
+    ).fetchone()[0]
+    return stored, redirects, missed
+
+
+def get_page(conn, title):
+    """Return (title, revision, wikitext) for a stored article, following redirects, or None."""
+    title = normalize_title(title)
+    row = conn.execute('SELECT target FROM redirects WHERE title = ?', (title,)).fetchone()
+    if row:
+        title = row[0]
+    row = conn.execute('SELECT title, revision, wikitext FROM pages WHERE title = ?', (title,)).fetchone()
+    if not row:
+        return None
+    return row[0], row[1], zlib.decompress(row[2]).decode('utf-8')
+
+
+def remove_nested(text, pattern):
+    """Remove innermost matches of pattern until none are left (for nested templates and tables)."""
+    count = 1
+    while count:
+        text, count = re.subn(pattern, '', text, flags=re.DOTALL)
+    return text
+
+
+def replace_link(match):
+    target, label = match.group(1), match.group(2)
+    if target.strip().lower().startswith(DROPPED_LINK_PREFIXES):
+        return ''
+    return label if label is not None else target
+
+
+def plain_wikitext(text):
+    """Strip markup from wikitext, keeping line structure."""
+    text = re.sub(r'<!--.*?-->', '', text, flags=re.DOTALL)
+    text = re.sub(r'<ref[^>/]*/>|<ref[^>]*>.*?</ref>', '', text, flags=re.DOTALL | re.IGNORECASE)
+    text = remove_nested(text, r'\{\{[^{}]*\}\}')
+    text = remove_nested(text, r'\{\|(?:(?!\{\|).)*?\|\}')
+    # Innermost links first, so links inside file captions go before the file itself
+    previous = None
+    while previous != text:
+        previous = text
+        text = re.sub(r'\[\[([^\[\]|]*)(?:\|([^\[\]]*))?\]\]', replace_link, text)
+    text = re.sub(r'\[https?://[^\s\]]+\s*([^\]]*)\]', r'\1', text)
+    text = re.sub(r"'{2,}", '', text)
+    text = re.sub(r'<[^>]+>', '', text)
+    return unescape(text)
+
+
+def wikitext_blocks(wikitext):
+    """Convert wikitext to the (kind, level, text) blocks wiki_text.py renders."""
+    blocks, paragraph = [], []
+
+    def flush():
+        text = ' '.join(' '.join(paragraph).split())
+        if text:
+            blocks.append(('text', 0, text))
+        paragraph.clear()
+
+    for line in plain_wikitext(wikitext).split('\n'):
+        stripped = line.strip()
+        heading = re.match(r'^(={2,6})\s*(.*?)\s*\1$', stripped)
+        if heading:
+            flush()
+            blocks.append(('heading', len(heading.group(1)), heading.group(2)))
+        elif stripped.startswith(('*', '#')):
+            flush()
+            marker = re.match(r'^[*#]+', stripped).group(0)
+            text = ' '.join(stripped[len(marker):].split())
+            if text:
+                blocks.append(('item', len(marker), text))
+        elif not stripped:
+            flush()
+        else:
+            paragraph.append(stripped.lstrip(':;'))
+    flush()
+    return blocks
+
+
+def summary_text(wikitext, sentences=3):
+    """The first few sentences of an article's lead."""
+    lead = []
+    for kind, _, text in wikitext_blocks(wikitext):
+        if kind == 'heading':
+            break
+        if kind == 'text':
+            lead.append(text)
+    parts = re.split(r'(?<=[.!?])\s+', ' '.join(lead))
+    return ' '.join(parts[:sentences])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load articles from a Wikipedia XML dump for offline use")
+    parser.add_argument("command", choices=["ingest", "info"], help="ingest: read a dump; info: show the store")
+    parser.add_argument("dump", nargs="?", type=Path, help="pages-articles dump (.xml.bz2 or .xml)")
+    parser.add_argument("--category", action="append", default=[],
+                        help="Also keep articles in this category (repeatable)")
+    args = parser.parse_args()
+
+    conn = connect()
+    if args.command == "ingest":
+        if not args.dump:
+            parser.error("ingest needs a dump file")
+        titles = index_titles()
+        print(f"Reading {args.dump} for {len(titles)} indexed articles"
+              + (f" and categories: {', '.join(args.category)}" if args.category else "") + "...")
+        stored, redirects, missed = ingest(args.dump, titles, args.category, conn)
+        print(f"Stored {stored} articles and {redirects} redirects.")
+        if missed:
+            print(f"{missed} redirect targets aren't stored yet; run ingest again to pick them up.")
+
+    pages, redirects = (conn.execute(f'SELECT COUNT(*) FROM {table}').fetchone()[0] for table in ('pages', 'redirects'))
+    print(f"Store: {STORE_FILE}")
+    print(f"  Articles: {pages}")
+    print(f"  Redirects: {redirects}")
+
+
+if __name__ == '__main__':
+    main()
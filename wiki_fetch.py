@@ -0,0 +1,225 @@
+"""
+Wikipedia fetching shared by random_wiki.py and weird_wiki.py.
+
+Summaries go through the cache in wiki_cache.py. prefetch_summaries() fills
+it for a whole listing with the MediaWiki extracts query, 20 titles per
+request (the API's limit for intro extracts), several requests at a time.
+Article HTML is cached there too and revalidated with its ETag, then turned
+into structured text by wiki_text.py. Articles loaded from a Wikipedia dump
+(wiki_dump.py) are read locally before any of that.
+"""
+import urllib.error
+import urllib.request
+import urllib.parse
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import wiki_cache
+import wiki_text
+
+API_URL = 'https://en.wikipedia.org/w/api.php'
+REST_URL = 'https://en.wikipedia.org/api/rest_v1'
+USER_AGENT = 'Mozilla/5.0 (compatible; BoingBoingBot/1.0)'
+
+# exlimit for intro-only extracts is 20 titles per request
+EXTRACT_BATCH = 20
+MAX_IN_FLIGHT = 4
+
+
+def extract_title_from_url(url):
+    """Extract article title from Wikipedia URL."""
+    match = re.search(r'wikipedia\.org/wiki/([^#?]+)', url)
+    if match:
+        return urllib.parse.unquote(match.group(1).replace('_', ' '))
+    return None
+
+
+def api_query(params):
+    """Run a MediaWiki API request (action=query unless params say otherwise) and return the decoded JSON."""
+    query = urllib.parse.urlencode({'action': 'query', **params, 'format': 'json', 'formatversion': 2})
+    req = urllib.request.Request(f'{API_URL}?{query}', headers={'User-Agent': USER_AGENT})
+    return json.loads(urllib.request.urlopen(req, timeout=30).read().decode('utf-8'))
+
+
+def latest_revision(title):
+    """Return the ID of a page's latest revision, or None if it doesn't exist."""
+    pages = api_query({'prop': 'revisions', 'rvprop': 'ids', 'titles': title}).get('query', {}).get('pages', [])
+    if not pages or 'revisions' not in pages[0]:
+        return None
+    return pages[0]['revisions'][0]['revid']
+
+
+def fetch_wikitext(title):
+    """Return (wikitext, revision ID, linked article titles) of a page, via the parse API.
+
+    The titles come from the parser's own link table, already normalized, and
+    include only existing pages in the article namespace.
+    """
+    data = api_query({'action': 'parse', 'page': title, 'prop': 'wikitext|revid|links'})['parse']
+    articles = {link['title'] for link in data.get('links', []) if link['ns'] == 0 and link.get('exists')}
+    return data['wikitext'], data['revid'], articles
+
+
+def fetch_summary_batch(titles):
+    """Fetch intro summaries for up to EXTRACT_BATCH titles in one request.
+
+    Returns {requested title: (extract, url)}; missing pages are left out.
+    """
+    data = api_query({
+        'prop': 'extracts|info',
+        'exintro': 1,
+        'explaintext': 1,
+        'exsentences': 3,
+        'exlimit': EXTRACT_BATCH,
+        'inprop': 'url',
+        'redirects': 1,
+        'titles': '|'.join(titles),
+    }).get('query', {})
+
+    # Follow normalization and redirects back to the titles we asked for
+    renamed = {}
+    for item in data.get('normalized', []) + data.get('redirects', []):
+        renamed[item['from']] = item['to']
+
+    pages = {page['title']: page for page in data.get('pages', []) if not page.get('missing')}
+    summaries = {}
+    for title in titles:
+        target = title
+        while target in renamed and target not in pages:
+            target = renamed[target]
+        page = pages.get(target)
+        if page and page.get('extract'):
+            summaries[title] = (page['extract'], page.get('fullurl', ''))
+    return summaries
+
+
+def prefetch_summaries(titles):
+    """Make sure the cache has fresh summaries for titles. Returns how many were fetched."""
+    conn = wiki_cache.connect()
+    missing = wiki_cache.missing_summaries(conn, titles)
+    if not missing:
+        return 0
+
+    batches = [missing[i:i + EXTRACT_BATCH] for i in range(0, len(missing), EXTRACT_BATCH)]
+    with ThreadPoolExecutor(max_workers=MAX_IN_FLIGHT) as pool:
+        for summaries in pool.map(fetch_summary_batch, batches):
+            wiki_cache.put_summaries(conn, summaries)
+    return len(missing)
+
+
+def listing_summaries(articles):
+    """Prefetch summaries for listed articles; returns {title: (extract, url)} from the cache.
+
+    Lookups use the title in each article's URL, which is what Wikipedia
+    knows it by. Offline, whatever is cached (or in the dump store) is returned.
+    """
+    lookups = {article['title']: extract_title_from_url(article['url']) or article['title'] for article in articles}
+    try:
+        prefetch_summaries(list(lookups.values()))
+    except (urllib.error.URLError, OSError):
+        pass
+
+    conn = wiki_cache.connect()
+    summaries = {}
+    for title, lookup in lookups.items():
+        cached = wiki_cache.get_summary(conn, lookup) or dump_summary(lookup)
+        if cached:
+            summaries[title] = cached
+    return summaries
+
+
+def dump_page(title):
+    """Return (title, revision, wikitext) from the offline dump store (see wiki_dump.py), or None."""
+    import wiki_dump
+    if not wiki_dump.STORE_FILE.exists():
+        return None
+    return wiki_dump.get_page(wiki_dump.connect(), title)
+
+
+def dump_summary(title):
+    """Return (extract, url) for an article in the offline dump store, or None."""
+    import wiki_dump
+    page = dump_page(title)
+    if not page:
+        return None
+    return wiki_dump.summary_text(page[2]), f"https://en.wikipedia.org/wiki/{urllib.parse.quote(page[0].replace(' ', '_'))}"
+
+
+def fetch_article_summary(title):
+    """Fetch a quick 2-3 sentence summary: from the cache, the offline dump, then Wikipedia."""
+    conn = wiki_cache.connect()
+    cached = wiki_cache.get_summary(conn, title) or dump_summary(title)
+    if cached:
+        return cached
+
+    encoded = urllib.parse.quote(title.replace(' ', '_'))
+    api_url = f'{REST_URL}/page/summary/{encoded}'
+    req = urllib.request.Request(api_url, headers={
+        'User-Agent': USER_AGENT,
+        'Accept': 'application/json'
+    })
+    try:
+        response = urllib.request.urlopen(req).read().decode('utf-8')
+        data = json.loads(response)
+        extract = data.get('extract', 'No summary available.')
+        url = data.get('content_urls', {}).get('desktop', {}).get('page', '')
+        if data.get('extract'):
+            wiki_cache.put_summaries(conn, {title: (extract, url)})
+        return extract, url
+    except urllib.error.HTTPError as e:
+        return f"Error fetching summary: {e.code} {e.reason}", ""
+
+
+def fetch_article_html(title):
+    """Fetch an article's Parsoid HTML, revalidating the cached copy with its ETag.
+
+    An unchanged article costs a 304. If Wikipedia can't be reached, the
+    cached copy is returned as is. Raises urllib.error.HTTPError otherwise.
+    """
+    conn = wiki_cache.connect()
+    cached = wiki_cache.get_content(conn, title)
+
+    encoded = urllib.parse.quote(title.replace(' ', '_'))
+    headers = {'User-Agent': USER_AGENT, 'Accept': 'text/html'}
+    if cached and cached[1]:
+        headers['If-None-Match'] = cached[1]
+    req = urllib.request.Request(f'{REST_URL}/page/html/{encoded}', headers=headers)
+
+    try:
+        response = urllib.request.urlopen(req)
+        html = response.read().decode('utf-8')
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached:
+            wiki_cache.touch_content(conn, title)
+            return cached[0]
+        raise
+    except urllib.error.URLError:
+        if cached:
+            return cached[0]
+        raise
+
+    wiki_cache.put_content(conn, title, html, response.headers.get('ETag'))
+    return html
+
+
+def fetch_article_content(title, section=None):
+    """Fetch an article as structured plain text, or just one section of it.
+
+    Articles in the offline dump store are read from there.
+    """
+    page = dump_page(title)
+    if page:
+        import wiki_dump
+        blocks = wiki_dump.wikitext_blocks(page[2])
+    else:
+        try:
+            blocks = wiki_text.parse_blocks(fetch_article_html(title))
+        except urllib.error.HTTPError as e:
+            return f"Error fetching article: {e.code} {e.reason}"
+
+    selected = wiki_text.select_section(blocks, section)
+    if selected is None:
+        sections = ', '.join(wiki_text.section_titles(blocks))
+        return f"No section named \"{section}\". Sections: {sections or '(none)'}"
+    return wiki_text.render_blocks(selected)
@@ -0,0 +1,192 @@
+"""
+Shuffled article index shared by random_wiki.py and weird_wiki.py.
+
+The index is a small SQLite file with one row per article. The shuffle isn't
+stored as a rewritten list: an article's place is a keyed hash of its title
+under the index's seed, kept in an indexed sort_key column, and the cursor is
+the last sort key shown. Showing a batch is an index walk plus a write of the
+cursor and the batch's seen flags; marking an article used touches one row;
+reshuffling picks a new seed.
+"""
+import json
+import random
+import sqlite3
+import hashlib
+from datetime import datetime
+
+# Sort keys are 56-bit, so they fit SQLite's signed 64-bit integers
+KEY_BITS = 56
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    title TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL,
+    desc TEXT NOT NULL,
+    sort_key INTEGER NOT NULL,
+    seen INTEGER NOT NULL DEFAULT 0,
+    used INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS articles_order ON articles(sort_key);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def connect(path):
+    """Open (and create if needed) an index file."""
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def get_meta(conn, key, default=None):
+    row = conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+    return row[0] if row else default
+
+
+def set_meta(conn, key, value):
+    conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, str(value)))
+
+
+def shuffle_key(seed, title):
+    """An article's place in the shuffle for a given seed."""
+    digest = hashlib.blake2b(title.encode('utf-8'), key=seed.encode(), digest_size=KEY_BITS // 8).digest()
+    return int.from_bytes(digest, 'big')
+
+
+def new_seed():
+    return f'{random.getrandbits(64):016x}'
+
+
+def cursor(conn):
+    return int(get_meta(conn, 'cursor', -1))
+
+
+def is_empty(conn):
+    return conn.execute('SELECT 1 FROM articles LIMIT 1').fetchone() is None
+
+
+def build(conn, articles):
+    """Replace the index with a fresh shuffle of articles (dicts with title, url, desc)."""
+    seed = new_seed()
+    conn.execute('DELETE FROM articles')
+    conn.executemany(
+        'INSERT OR IGNORE INTO articles (title, url, desc, sort_key) VALUES (?, ?, ?, ?)',
+        [(a['title'], a['url'], a['desc'], shuffle_key(seed, a['title'])) for a in articles]
+    )
+    set_meta(conn, 'seed', seed)
+    set_meta(conn, 'cursor', -1)
+    set_meta(conn, 'created', datetime.now().isoformat())
+    set_meta(conn, 'updated', datetime.now().isoformat())
+    conn.commit()
+
+
+def migrate_json(conn, json_path, url_for=None):
+    """Import an old JSON index, keeping its order and position.
+
+    url_for(article) builds the URL for records that only have a slug.
+    Returns True if there was anything to import.
+    """
+    if not json_path.exists():
+        return False
+
+    with open(json_path) as f:
+        index_data = json.load(f)
+    articles = index_data.get('articles', [])
+    if not articles:
+        return False
+
+    # Spread the old order evenly over the key space so it survives as is
+    step = (1 << KEY_BITS) // (len(articles) + 1)
+    position = index_data.get('position', 0)
+    conn.executemany(
+        'INSERT OR IGNORE INTO articles (title, url, desc, sort_key, seen) VALUES (?, ?, ?, ?, ?)',
+        [
+            (a['title'], a.get('url') or url_for(a), a['desc'], (i + 1) * step, int(i < position))
+            for i, a in enumerate(articles)
+        ]
+    )
+    set_meta(conn, 'seed', new_seed())
+    set_meta(conn, 'cursor', position * step if position else -1)
+    set_meta(conn, 'created', index_data.get('created', datetime.now().isoformat()))
+    set_meta(conn, 'updated', datetime.now().isoformat())
+    conn.commit()
+    return True
+
+
+def merge(conn, articles):
+    """Bring the index in line with a new article list, keeping seen and used state.
+
+    New articles get keys after the cursor, so they land in the unseen part
+    of the shuffle; articles no longer listed are dropped; descriptions and
+    URLs of the rest are updated. Returns (added, removed) counts.
+    """
+    incoming = {a['title']: a for a in articles}
+    existing = {row[0] for row in conn.execute('SELECT title FROM articles')}
+    removed = existing - incoming.keys()
+    added = [a for title, a in incoming.items() if title not in existing]
+
+    # Map each new article's hash into the key range after the cursor
+    seed, start = get_meta(conn, 'seed') or new_seed(), cursor(conn) + 1
+    span = (1 << KEY_BITS) - start
+    conn.executemany(
+        'INSERT INTO articles (title, url, desc, sort_key) VALUES (?, ?, ?, ?)',
+        [(a['title'], a['url'], a['desc'], start + shuffle_key(seed, a['title']) % span) for a in added]
+    )
+    conn.executemany('DELETE FROM articles WHERE title = ?', [(title,) for title in removed])
+    conn.executemany(
+        'UPDATE articles SET url = ?, desc = ? WHERE title = ?',
+        [(a['url'], a['desc'], title) for title, a in incoming.items() if title in existing]
+    )
+    set_meta(conn, 'updated', datetime.now().isoformat())
+    conn.commit()
+    return len(added), len(removed)
+
+
+def next_batch(conn, count):
+    """Return the next count unseen articles and move the cursor past them."""
+    batch = conn.execute(
+        'SELECT title, url, desc, sort_key FROM articles WHERE sort_key > ? AND used = 0 '
+        'ORDER BY sort_key LIMIT ?',
+        (cursor(conn), count)
+    ).fetchall()
+    if batch:
+        set_meta(conn, 'cursor', batch[-1]['sort_key'])
+        conn.executemany('UPDATE articles SET seen = 1 WHERE title = ?', [(a['title'],) for a in batch])
+        conn.commit()
+    return batch
+
+
+def counts(conn):
+    """Return (remaining, total) article counts."""
+    remaining = conn.execute(
+        'SELECT COUNT(*) FROM articles WHERE sort_key > ? AND used = 0', (cursor(conn),)
+    ).fetchone()[0]
+    total = conn.execute('SELECT COUNT(*) FROM articles').fetchone()[0]
+    return remaining, total
+
+
+def reshuffle(conn):
+    """Shuffle under a new seed and start from the beginning (used articles stay used)."""
+    seed = new_seed()
+    conn.executemany(
+        'UPDATE articles SET sort_key = ?, seen = 0 WHERE id = ?',
+        [(shuffle_key(seed, title), article_id) for article_id, title in conn.execute('SELECT id, title FROM articles')]
+    )
+    set_meta(conn, 'seed', seed)
+    set_meta(conn, 'cursor', -1)
+    set_meta(conn, 'created', datetime.now().isoformat())
+    conn.commit()
+
+
+def mark(conn, title, flag):
+    """Set an article's seen or used flag. Returns False if it isn't in the index."""
+    if flag not in ('seen', 'used'):
+        raise ValueError(f'Unknown flag: {flag}')
+    changed = conn.execute(f'UPDATE articles SET {flag} = 1 WHERE title = ?', (title,)).rowcount
+    conn.commit()
+    return bool(changed)
@@ -0,0 +1,186 @@
+"""
+Full-text search over the wiki tools' articles.
+
+An SQLite FTS5 index in the wiki cache (~/.wiki_cache.db) covers each
+article's title, the index description, the cached summary and the cached
+article text, ranked with BM25. Summaries and content are indexed as
+wiki_cache.py stores them; index descriptions are synced the first time a
+search runs after an index changes.
+"""
+import time
+
+import wiki_index
+from wiki_dump import normalize_title
+
+# Relative BM25 weight of a match in each column
+COLUMN_WEIGHTS = (10.0, 4.0, 2.0, 1.0)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_docs (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    url TEXT NOT NULL DEFAULT '',
+    sources TEXT NOT NULL DEFAULT '',
+    title TEXT NOT NULL DEFAULT '',
+    desc TEXT NOT NULL DEFAULT '',
+    summary TEXT NOT NULL DEFAULT '',
+    content TEXT NOT NULL DEFAULT ''
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(
+    title, desc, summary, content,
+    content='search_docs', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS search_docs_insert AFTER INSERT ON search_docs BEGIN
+    INSERT INTO search (rowid, title, desc, summary, content)
+    VALUES (new.id, new.title, new.desc, new.summary, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS search_docs_delete AFTER DELETE ON search_docs BEGIN
+    INSERT INTO search (search, rowid, title, desc, summary, content)
+    VALUES ('delete', old.id, old.title, old.desc, old.summary, old.content);
+END;
+CREATE TRIGGER IF NOT EXISTS search_docs_update AFTER UPDATE ON search_docs BEGIN
+    INSERT INTO search (search, rowid, title, desc, summary, content)
+    VALUES ('delete', old.id, old.title, old.desc, old.summary, old.content);
+    INSERT INTO search (rowid, title, desc, summary, content)
+    VALUES (new.id, new.title, new.desc, new.summary, new.content);
+END;
+CREATE TABLE IF NOT EXISTS search_meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+
+def index_document(conn, lookup, defaults=None, **fields):
+    """Add or update an article's searchable fields (url, title, desc, summary, content, sources).
+
+    Documents are keyed by lookup, the title Wikipedia knows the article by.
+    Only the given fields change; the rest of the document is kept. Fields in
+    `defaults` are filled in only where the document has none yet, so the
+    cache's URL doesn't replace the one an index lists. A new document is
+    titled with its key until an index gives it a display title.
+    """
+    key = normalize_title(lookup)
+    conn.execute('INSERT OR IGNORE INTO search_docs (key, title) VALUES (?, ?)', (key, key))
+    assignments = [f'{name} = ?' for name in fields]
+    values = list(fields.values())
+    for name, value in (defaults or {}).items():
+        if name not in fields and value:
+            assignments.append(f"{name} = CASE WHEN {name} = '' THEN ? ELSE {name} END")
+            values.append(value)
+    if assignments:
+        conn.execute(f'UPDATE search_docs SET {", ".join(assignments)} WHERE key = ?', values + [key])
+
+
+def drop_source(conn, source, keep):
+    """Detach source from documents whose key isn't in keep.
+
+    A document left with no index and nothing cached is deleted; one with a
+    cached summary or article stays searchable by that alone.
+    """
+    rows = conn.execute(
+        "SELECT key, sources, summary = '' AND content = '' FROM search_docs "
+        "WHERE ' ' || sources || ' ' LIKE ?", (f'% {source} %',)
+    ).fetchall()
+    dropped = 0
+    for key, sources, uncached in rows:
+        if key in keep:
+            continue
+        remaining = ' '.join(name for name in sources.split() if name != source)
+        if remaining:
+            conn.execute('UPDATE search_docs SET sources = ? WHERE key = ?', (remaining, key))
+        elif uncached:
+            conn.execute('DELETE FROM search_docs WHERE key = ?', (key,))
+        else:
+            conn.execute("UPDATE search_docs SET sources = '', desc = '' WHERE key = ?", (key,))
+        dropped += 1
+    return dropped
+
+
+def sync_index(conn, index_file, source):
+    """Index the titles and descriptions of a wiki_index file, if it changed since the last sync.
+
+    Articles no longer in the index lose it as a source (see drop_source).
+    """
+    from wiki_fetch import extract_title_from_url
+
+    if not index_file.exists():
+        return 0
+    index = wiki_index.connect(index_file)
+    version = wiki_index.get_meta(index, 'updated') or wiki_index.get_meta(index, 'created') or ''
+    synced_key = f'synced:{index_file}'
+    row = conn.execute('SELECT value FROM search_meta WHERE key = ?', (synced_key,)).fetchone()
+    if row and row[0] == version:
+        return 0
+
+    count, keys = 0, set()
+    for title, url, desc in index.execute('SELECT title, url, desc FROM articles'):
+        key = normalize_title(extract_title_from_url(url) or title)
+        keys.add(key)
+        existing = conn.execute('SELECT sources FROM search_docs WHERE key = ?', (key,)).fetchone()
+        sources = set((existing[0] if existing else '').split()) | {source}
+        index_document(conn, key, title=title, url=url, desc=desc, sources=' '.join(sorted(sources)))
+        count += 1
+    drop_source(conn, source, keys)
+    conn.execute('INSERT OR REPLACE INTO search_meta (key, value) VALUES (?, ?)', (synced_key, version))
+    conn.commit()
+    return count
+
+
+def sync_cache(conn):
+    """Index summaries and articles cached before the search index existed (runs once)."""
+    import wiki_cache
+    import wiki_text
+
+    if conn.execute("SELECT 1 FROM search_meta WHERE key = 'cache_synced'").fetchone():
+        return
+    for title, extract, url in conn.execute('SELECT title, extract, url FROM summaries').fetchall():
+        index_document(conn, title, defaults={'url': url}, summary=extract)
+    for (title,) in conn.execute('SELECT title FROM contents').fetchall():
+        index_document(conn, title, content=wiki_text.extract_text(wiki_cache.get_content(conn, title)[0]))
+    conn.execute("INSERT OR REPLACE INTO search_meta (key, value) VALUES ('cache_synced', '1')")
+    conn.commit()
+
+
+def match_expression(query):
+    """Turn free text into an FTS5 query: any of the words, each quoted."""
+    terms = [term.replace('"', '') for term in query.split()]
+    return ' OR '.join(f'"{term}"' for term in terms if term)
+
+
+def search(conn, query, limit=10):
+    """Return [(title, url, sources, snippet)] for the best BM25 matches."""
+    expression = match_expression(query)
+    if not expression:
+        return []
+    weights = ', '.join(str(weight) for weight in COLUMN_WEIGHTS)
+    return conn.execute(
+        "SELECT d.title, d.url, d.sources, snippet(search, -1, '[', ']', '...', 16) "
+        f'FROM search JOIN search_docs d ON d.id = search.rowid '
+        f'WHERE search MATCH ? ORDER BY bm25(search, {weights}) LIMIT ?',
+        (expression, limit)
+    ).fetchall()
+
+
+def run_search(query, index_files, limit=10):
+    """Sync the given {source: index file} and print ranked results for query."""
+    import wiki_cache
+
+    conn = wiki_cache.connect()
+    sync_cache(conn)
+    for source, index_file in index_files.items():
+        sync_index(conn, index_file, source)
+
+    started = time.perf_counter()
+    results = search(conn, query, limit)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    print(f'SEARCH: {query}  ({len(results)} results in {elapsed:.1f} ms)')
+    print('─' * 40)
+    for i, (title, url, sources, snippet) in enumerate(results, 1):
+        label = f'  [{sources}]' if sources else ''
+        print(f'{i}. {title}{label}')
+        print(f'   {" ".join(snippet.split())}')
+        if url:
+            print(f'   {url}')
+        print()
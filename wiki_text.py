@@ -0,0 +1,179 @@
+"""
+Structured plain text from Wikipedia (Parsoid) article HTML.
+
+ArticleTextParser makes one streaming pass over the HTML with HTMLParser and
+keeps the article's shape: section headings, paragraphs and list items come
+out as separate blocks. Infoboxes, navboxes, citation markers, reference
+lists and similar page furniture are skipped, as are the reference-style
+sections at the end of an article (unless asked for with section=).
+"""
+from html.parser import HTMLParser
+
+HEADING_LEVELS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+BLOCK_TAGS = {'p', 'li', 'dd', 'dt', 'blockquote', 'pre', 'tr', 'caption', 'div', 'section'}
+LIST_TAGS = {'ul', 'ol', 'dl'}
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta', 'source', 'track', 'wbr'}
+
+# Elements skipped with everything inside them
+SKIP_TAGS = {'script', 'style', 'figure', 'audio', 'video', 'math', 'noscript'}
+SKIP_CLASSES = {
+    'infobox', 'navbox', 'vertical-navbox', 'sidebar', 'metadata', 'ambox', 'hatnote', 'reference',
+    'mw-ref', 'references', 'reflist', 'mw-references-wrap', 'mw-editsection', 'noprint', 'thumb',
+    'toc', 'shortdescription', 'mw-empty-elt',
+}
+
+# Trailing sections that are only references and links
+SKIP_SECTIONS = {
+    'references', 'notes', 'citations', 'footnotes', 'sources', 'bibliography',
+    'external links', 'further reading', 'notes and references',
+}
+
+LEAD_SECTION_NAMES = {'lead', 'intro', 'introduction'}
+
+
+class ArticleTextParser(HTMLParser):
+    """Collects (kind, level, text) blocks: kind is 'heading', 'item', 'row' or 'text'."""
+
+    def __init__(self):
+        super().__init__()
+        self.blocks = []
+        self.parts = []
+        self.skip = 0
+        self.list_depth = 0
+        self.kind, self.level = 'text', 0
+
+    def flush(self):
+        text = ' '.join(''.join(self.parts).split())
+        if text:
+            self.blocks.append((self.kind, self.level, text))
+        self.parts = []
+
+    def handle_starttag(self, tag, attrs):
+        if self.skip:
+            if tag not in VOID_TAGS:
+                self.skip += 1
+            return
+
+        attrs = dict(attrs)
+        classes = set((attrs.get('class') or '').split())
+        if tag in SKIP_TAGS or classes & SKIP_CLASSES or attrs.get('role') == 'navigation':
+            if tag not in VOID_TAGS:
+                self.skip = 1
+            return
+
+        if tag in HEADING_LEVELS:
+            self.flush()
+            self.kind, self.level = 'heading', HEADING_LEVELS[tag]
+        elif tag in LIST_TAGS:
+            self.flush()
+            self.list_depth += 1
+        elif tag in ('li', 'dd', 'dt'):
+            self.flush()
+            self.kind, self.level = 'item', self.list_depth
+        elif tag == 'tr':
+            self.flush()
+            self.kind, self.level = 'row', 0
+        elif tag in BLOCK_TAGS:
+            self.flush()
+            self.kind, self.level = 'text', 0
+        elif tag in ('td', 'th') and self.parts:
+            self.parts.append(' | ')
+        elif tag == 'br':
+            self.parts.append(' ')
+
+    def handle_endtag(self, tag):
+        if self.skip:
+            self.skip -= 1
+            return
+
+        if tag in HEADING_LEVELS or tag in BLOCK_TAGS:
+            self.flush()
+            self.kind, self.level = ('item', self.list_depth) if self.list_depth else ('text', 0)
+        elif tag in LIST_TAGS:
+            self.flush()
+            self.list_depth = max(self.list_depth - 1, 0)
+            self.kind, self.level = ('item', self.list_depth) if self.list_depth else ('text', 0)
+
+    def handle_data(self, data):
+        if not self.skip:
+            self.parts.append(data)
+
+    def close(self):
+        super().close()
+        self.flush()
+
+
+def parse_blocks(html):
+    parser = ArticleTextParser()
+    parser.feed(html)
+    parser.close()
+    return parser.blocks
+
+
+def section_titles(blocks):
+    """Headings of the article, in order."""
+    return [text for kind, _, text in blocks if kind == 'heading']
+
+
+def select_section(blocks, section=None):
+    """Blocks of one section (with its subsections), or of the whole article.
+
+    section=None drops the reference-style sections at the end. Returns None
+    if there is no section with that name.
+    """
+    if section and section.lower() in LEAD_SECTION_NAMES:
+        lead = []
+        for block in blocks:
+            if block[0] == 'heading':
+                break
+            lead.append(block)
+        return lead
+
+    selected = []
+    current = None  # (heading level, keep) of the section being selected or skipped
+    for block in blocks:
+        kind, level, text = block
+        if kind == 'heading':
+            # A section ends at the next heading of the same or a higher level
+            if current and level <= current[0]:
+                current = None
+            if current is None:
+                name = text.lower()
+                if section and name == section.lower():
+                    current = (level, True)
+                elif not section and name in SKIP_SECTIONS:
+                    current = (level, False)
+        keep = current[1] if current else not section
+        if keep:
+            selected.append(block)
+
+    if section and not selected:
+        return None
+    return selected
+
+
+def render_blocks(blocks):
+    """Join blocks into plain text: '## Heading' lines, '- ' list items, 'a | b' table rows."""
+    lines, previous = [], None
+    for kind, level, text in blocks:
+        if kind == 'heading':
+            line = '#' * level + ' ' + text
+        elif kind == 'item':
+            line = '  ' * max(level - 1, 0) + '- ' + text
+        else:
+            line = text
+        # List items and table rows stay together; everything else is its own paragraph
+        if lines and not (kind in ('item', 'row') and previous == kind):
+            lines.append('')
+        lines.append(line)
+        previous = kind
+    return '\n'.join(lines)
+
+
+def extract_text(html, section=None):
+    """Structured plain text of an article, or of one section. None if the section doesn't exist."""
+    blocks = select_section(parse_blocks(html), section)
+    if blocks is None:
+        return None
+    return render_blocks(blocks)
+